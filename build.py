@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+בנייה מצטברת של כל הפלטים - דפי תצוגה, קובץ ה-A4 המאוחד וקבצי PDF מתוצרי ביניים משותפים
+Incremental build of all outputs from shared, cached worksheet intermediates
+"""
+
+import sys
+import argparse
+from core.build_pipeline import BuildPipeline
+from core.pdf_engine import PDFEngine
+from core.catalog import WorksheetCatalog
+from core.answer_key import AnswerKey
+from build_preview import build_preview_pages
+from build_all_worksheets import build_all_worksheets
+
+TARGETS = ('preview', 'bundle', 'pdf', 'booklet')
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description='בנייה מצטברת של דפי העבודה - רק יעדים שהקלטים שלהם השתנו נבנים מחדש',
+        epilog='דוגמאות:\n'
+               '  python build.py\n'
+               '  python build.py pdf --jobs 8 --pdf-dir pdfs --with-keys\n'
+               '  python build.py bundle --grade 8 --topic שיפוע\n'
+               '  python build.py booklet --grade 8 --booklet-file unit.pdf',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('targets', nargs='*',
+                        help=f"יעדים לבנייה: {', '.join(TARGETS)} (ברירת מחדל: preview bundle)")
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+                        help='מספר תהליכים לשלבים המקביליים (ברירת מחדל: מספר הליבות)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='פענוח ובנייה מחדש של הכול, בלי מטמון הבנייה')
+    parser.add_argument('--cache-dir', default=None,
+                        help='תיקיית מטמון הבנייה (ברירת מחדל: .cache/build)')
+    parser.add_argument('--pdf-dir', default=None,
+                        help='תיקיית פלט לקבצי PDF (ברירת מחדל: ליד כל דף עבודה)')
+    parser.add_argument('--with-keys', action='store_true',
+                        help='ביעד pdf: גם מפתח למורה (<שם הדף>_key.pdf) לכל דף שיש לו פתרונות ב-SOLUTION_KEY.md')
+    parser.add_argument('--booklet-file', default='booklet.pdf',
+                        help='קובץ החוברת ליעד booklet (ברירת מחדל: booklet.pdf)')
+    parser.add_argument('--grade', default=None, help="רק דפים של כיתה: 8, ח או 'כיתה ח'")
+    parser.add_argument('--topic', default=None, help='רק דפים שהנושא או הכותרת שלהם מכילים את הטקסט')
+    args = parser.parse_args()
+
+    unknown = [target for target in args.targets if target not in TARGETS]
+    if unknown:
+        parser.error(f"יעד לא מוכר: {', '.join(unknown)}")
+
+    try:
+        worksheets = WorksheetCatalog().select(grade=args.grade, topic=args.topic)
+    except ValueError as e:
+        parser.error(str(e))
+
+    targets = args.targets or ['preview', 'bundle']
+    pipeline = BuildPipeline(cache_dir=args.cache_dir, use_cache=not args.no_cache)
+    failed = 0
+
+    if 'preview' in targets:
+        build_preview_pages(pipeline, jobs=args.jobs, worksheets=worksheets)
+
+    if 'bundle' in targets:
+        build_all_worksheets(pipeline, jobs=args.jobs, worksheets=worksheets)
+
+    if 'pdf' in targets:
+        sheets = pipeline.parse_many([ws['path'] for ws in worksheets], jobs=args.jobs)
+        key_file = AnswerKey.DEFAULT_KEY_FILE if args.with_keys else None
+        for result in pipeline.build_pdfs(sheets, output_dir=args.pdf_dir, jobs=args.jobs, key_file=key_file):
+            if result['error']:
+                failed += 1
+                sys.stderr.buffer.write(f"❌ {result['input']}: {result['error']}\n".encode('utf-8'))
+            elif result['skipped']:
+                sys.stdout.buffer.write(f"♻️ {result['output']} up to date\n".encode('utf-8'))
+            else:
+                key = f" + {result['key_output']}" if result['key_output'] else ''
+                sys.stdout.buffer.write(f"✅ {result['output']}{key} ({result['seconds']:.2f}s)\n".encode('utf-8'))
+
+    if 'booklet' in targets:
+        engine = PDFEngine(use_cache=not args.no_cache)
+        try:
+            path = engine.generate_booklet([ws['path'] for ws in worksheets], args.booklet_file)
+            sys.stdout.buffer.write(f"📚 {path} ({len(worksheets)} דפי עבודה)\n".encode('utf-8'))
+        except Exception as e:
+            failed += 1
+            sys.stderr.buffer.write(f"❌ {args.booklet_file}: {e}\n".encode('utf-8'))
+
+    sys.stdout.buffer.write(
+        f"\n📦 דפי עבודה: {pipeline.parsed} פוענחו, {pipeline.cache_hits} מהמטמון\n".encode('utf-8'))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
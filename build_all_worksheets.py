@@ -6,112 +6,22 @@ Build single HTML file with all worksheets divided into A4 pages
 """
 
 import sys
+import argparse
 from pathlib import Path
-import markdown
-import re
+from typing import Optional, Dict, List
+from core.image_derivatives import ImageDerivatives
+from core.build_pipeline import BuildPipeline
+from core.catalog import WorksheetCatalog
+from core.a4_paginator import A4Paginator
 
 # Ensure UTF-8 encoding
 if sys.stdout.encoding != 'utf-8':
     sys.stdout.reconfigure(encoding='utf-8')
 
+_derivatives = ImageDerivatives()
 
-def process_markdown_to_html(md_content: str) -> str:
-    """המרת Markdown ל-HTML"""
-    # הסרת front matter
-    if md_content.startswith('---'):
-        parts = md_content.split('---', 2)
-        if len(parts) >= 3:
-            md_content = parts[2].strip()
-
-    # המרת Markdown ל-HTML
-    html = markdown.markdown(md_content, extensions=['fenced_code', 'tables', 'nl2br'])
-
-    # עיבוד תמונות - תיקון נתיבים
-    html = re.sub(
-        r'<img src="([^"]+)"',
-        r'<img src="../\1"',
-        html
-    )
-
-    return html
-
-
-def split_into_a4_pages(html_content: str, title: str) -> list:
-    """חלוקת תוכן לדפי A4 - כל דף A4 נפרד"""
-    # חלוקה לפי h2 או h3 - כל חלק גדול לדף A4 נפרד
-    # נחלק לפי h2 (כותרות גדולות) - כל h2 מתחיל דף חדש
-    parts = re.split(r'(<h2[^>]*>.*?</h2>)', html_content, flags=re.DOTALL)
-
-    pages = []
-    current_page = f'<div class="worksheet-content"><h1 class="worksheet-title">{title}</h1>'
-    page_num = 1
-
-    for i, part in enumerate(parts):
-        if not part.strip():
-            continue
-
-        # אם זה h2, זה תחילת חלק חדש - בדוק אם צריך דף חדש
-        if part.startswith('<h2'):
-            # אם הדף הנוכחי כבר ארוך, סיים אותו
-            if len(current_page) > 3000 and page_num > 1:
-                current_page += '</div>'
-                pages.append(current_page)
-                current_page = f'<div class="worksheet-content"><h1 class="worksheet-title">{title} (המשך - דף {page_num})</h1>'
-                page_num += 1
-
-        current_page += part
-
-        # אם הדף ארוך מדי, חתוך אותו
-        if len(current_page) > 8000:
-            # מצא את הסעיף האחרון לפני 8000 תווים
-            last_h3 = current_page.rfind('<h3', 0, 8000)
-            if last_h3 > 0:
-                page_content = current_page[:last_h3]
-                current_page = f'<div class="worksheet-content"><h1 class="worksheet-title">{title} (המשך - דף {page_num})</h1>' + current_page[last_h3:]
-                page_content += '</div>'
-                pages.append(page_content)
-                page_num += 1
-
-    # הוסף את הדף האחרון
-    if current_page:
-        current_page += '</div>'
-        pages.append(current_page)
-
-    return pages if pages else [f'<div class="worksheet-content"><h1 class="worksheet-title">{title}</h1>{html_content}</div>']
-
-
-def build_all_worksheets():
-    """בניית דף HTML אחד עם כל דפי העבודה"""
-
-    # קריאת כל דפי העבודה
-    worksheets = [
-        {
-            'file': Path('worksheets/grade-8/kavba_a1_graph_reading.md'),
-            'title': 'קריאת גרף תנועה - מרחק וזמן'
-        },
-        {
-            'file': Path('worksheets/grade-8/kavba_a1_slope_table.md'),
-            'title': 'משמעות השיפוע באמצעות טבלת ערכים'
-        },
-        {
-            'file': Path('worksheets/grade-8/kavba_a1_50_questions_coefficients.md'),
-            'title': '50 שאלות על מקדמים בפונקציה קווית'
-        }
-    ]
-
-    # קריאת תבנית HTML
-    html_template_start = '''<!DOCTYPE html>
-<html dir="rtl" lang="he">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>כל דפי העבודה - כיתה ח' - מוכן להדפסה A4</title>
-    <script src="https://polyfill.io/v3/polyfill.min.js?features=es6"></script>
-    <script id="MathJax-script" async src="https://cdn.jsdelivr.net/npm/mathjax@3/es5/tex-mml-chtml.js"></script>
-    <script>
-        window.MathJax = {tex: {inlineMath: [['$', '$']], displayMath: [['$$', '$$']]}};
-    </script>
-    <style>
+# עיצוב דפי ה-A4 - משמש גם את מדידת הגבהים בחלוקה לדפים
+PAGE_CSS = '''
         @import url('https://fonts.googleapis.com/css2?family=Heebo:wght@400;500;700&family=Assistant:wght@400;600;700&display=swap');
 
         * {
@@ -308,42 +218,118 @@ def build_all_worksheets():
         .print-button:hover {
             background: #0056b3;
         }
-    </style>
-</head>
-<body>
-    <button class="print-button no-print" onclick="window.print()">🖨️ הדפס את כל הדפים</button>
 '''
 
-    html_content = html_template_start
+# נתיבי התמונות ב-HTML יחסיים לתיקייה אחת מתחת לשורש (prefix='../')
+_paginator = A4Paginator(PAGE_CSS, base_dir=Path('worksheets'))
+
+
+def worksheet_html(intermediate: Dict) -> str:
+    """גוף ה-HTML של דף עבודה מתוצר הביניים - נגזרת לתצוגת מסך במקום המקור ב-400 DPI, ותיקון נתיבים"""
+    return _derivatives.rewrite_img_sources(intermediate['html'], 'web', prefix='../')
+
+
+def split_into_a4_pages(html_content: str, title: str) -> list:
+    """חלוקת תוכן לדפי A4 לפי הגובה הנמדד של כל בלוק - שאלות שלמות בכל דף"""
+    return _paginator.paginate(html_content, title)
 
-    # עיבוד כל דף עבודה
-    for ws in worksheets:
-        if not ws['file'].exists():
-            print(f"Warning: {ws['file']} not found, skipping...")
-            continue
 
-        print(f"Processing: {ws['title']}")
-        content = ws['file'].read_text(encoding='utf-8')
-        html_body = process_markdown_to_html(content)
+def build_all_worksheets(pipeline: Optional[BuildPipeline] = None, jobs: Optional[int] = None,
+                         worksheets: Optional[List[Dict]] = None) -> bool:
+    """
+    בניית דף HTML אחד עם כל דפי העבודה
 
-        # חלוקה לדפי A4
-        pages = split_into_a4_pages(html_body, ws['title'])
+    Args:
+        pipeline: צינור הבנייה (ברירת מחדל: חדש, עם המטמון הרגיל)
+        jobs: מספר תהליכים לפענוח דפי עבודה שהשתנו
+        worksheets: רשומות קטלוג של הדפים לבנייה (ברירת מחדל: כל הקטלוג)
 
-        # הוספת כל הדפים
-        for page_html in pages:
-            html_content += f'<div class="a4-page">{page_html}</div>\n'
+    Returns:
+        True אם הקובץ נבנה, False אם היה עדכני
+    """
+    pipeline = pipeline or BuildPipeline()
 
-    # סיום HTML
-    html_content += '''
+    # דפי העבודה מהקטלוג (ברירת מחדל: כולם, לפי כיתה וסדר)
+    if worksheets is None:
+        worksheets = WorksheetCatalog().select()
+
+    # קריאת תבנית HTML
+    html_template_start = '''<!DOCTYPE html>
+<html dir="rtl" lang="he">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>כל דפי העבודה - כיתה ח' - מוכן להדפסה A4</title>
+    <script src="https://polyfill.io/v3/polyfill.min.js?features=es6"></script>
+    <script id="MathJax-script" async src="https://cdn.jsdelivr.net/npm/mathjax@3/es5/tex-mml-chtml.js"></script>
+    <script>
+        window.MathJax = {tex: {inlineMath: [['$', '$']], displayMath: [['$$', '$$']]}};
+    </script>
+    <style>
+''' + PAGE_CSS + '''    </style>
+</head>
+<body>
+    <button class="print-button no-print" onclick="window.print()">🖨️ הדפס את כל הדפים</button>
+'''
+
+    html_template_end = '''
 </body>
 </html>'''
 
-    # שמירה
+    # תוצרי הביניים של דפי העבודה - רק דפים שהשתנו מפוענחים
+    sheets = pipeline.parse_many([ws['path'] for ws in worksheets], jobs=jobs)
+
     output_file = Path('all_worksheets.html')
-    output_file.write_text(html_content, encoding='utf-8')
-    print(f"\n✅ Created: {output_file}")
-    print(f"📄 Total pages: {html_content.count('a4-page')}")
+    stamp = pipeline.stamp('bundle', sheets, html_template_start, html_template_end,
+                           _paginator.signature(), *(ws['title'] for ws in worksheets))
+    page_count = 0
 
+    def build():
+        nonlocal page_count
+        # כתיבה זורמת - כל דף A4 נכתב לקובץ ברגע שהוא מוכן, בלי לצבור את כל המסמך בזיכרון.
+        # הכתיבה לקובץ זמני שמחליף את הקובץ הקיים רק בסיום, כך שבנייה שנכשלה לא משאירה קובץ חלקי
+        tmp_file = output_file.with_name(output_file.name + '.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as out:
+            out.write(html_template_start)
+
+            # עיבוד כל דף עבודה
+            for ws, sheet in zip(worksheets, sheets):
+                print(f"Processing: {ws['title']}")
+
+                # חלוקה לדפי A4 והוספת כל הדפים
+                for page_html in split_into_a4_pages(worksheet_html(sheet), ws['title']):
+                    out.write(f'<div class="a4-page">{page_html}</div>\n')
+                    page_count += 1
+
+            out.write(html_template_end)
+
+        tmp_file.replace(output_file)
+
+    if not pipeline.build_target(output_file, stamp, build):
+        print(f"♻️ {output_file} up to date")
+        return False
+
+    print(f"\n✅ Created: {output_file}")
+    print(f"📄 Total pages: {page_count}")
+    print(f"📐 Block heights: {_paginator.measured} measured, {_paginator.cache_hits} from cache")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='בניית קובץ HTML אחד עם כל דפי העבודה מחולקים ל-A4')
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+                        help='מספר תהליכים לפענוח דפי עבודה (ברירת מחדל: מספר הליבות)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='פענוח ובנייה מחדש של הכול, בלי מטמון הבנייה')
+    parser.add_argument('--grade', default=None, help="רק דפים של כיתה: 8, ח או 'כיתה ח'")
+    parser.add_argument('--topic', default=None, help='רק דפים שהנושא או הכותרת שלהם מכילים את הטקסט')
+    args = parser.parse_args()
+
+    try:
+        worksheets = WorksheetCatalog().select(grade=args.grade, topic=args.topic)
+    except ValueError as e:
+        parser.error(str(e))
+    build_all_worksheets(BuildPipeline(use_cache=not args.no_cache), jobs=args.jobs, worksheets=worksheets)
 
 if __name__ == '__main__':
-    build_all_worksheets()
+    main()
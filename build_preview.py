@@ -6,64 +6,96 @@ Build static preview pages from Markdown files
 """
 
 import sys
+import argparse
 from pathlib import Path
-import markdown
+from typing import Optional, Dict, List
+from core.image_derivatives import ImageDerivatives
+from core.build_pipeline import BuildPipeline
+from core.catalog import WorksheetCatalog
 
 # Ensure UTF-8 encoding
 if sys.stdout.encoding != 'utf-8':
     sys.stdout.reconfigure(encoding='utf-8')
 
 
-def build_preview_pages():
-    """בניית דפי תצוגה לכל דפי העבודה"""
-    worksheets_dir = Path('worksheets/grade-8')
+def build_preview_pages(pipeline: Optional[BuildPipeline] = None, jobs: Optional[int] = None,
+                        worksheets: Optional[List[Dict]] = None) -> int:
+    """
+    בניית דפי תצוגה לכל דפי העבודה - רק דפים שהשתנו נבנים מחדש
+
+    Args:
+        pipeline: צינור הבנייה (ברירת מחדל: חדש, עם המטמון הרגיל)
+        jobs: מספר תהליכים לפענוח דפי עבודה שהשתנו
+        worksheets: רשומות קטלוג של הדפים לבנייה (ברירת מחדל: כל הקטלוג)
+
+    Returns:
+        מספר הדפים שנבנו
+    """
+    pipeline = pipeline or BuildPipeline()
     output_dir = Path('preview_pages')
     output_dir.mkdir(exist_ok=True)
+    derivatives = ImageDerivatives()
 
     # קריאת תבנית HTML
     template = Path('view.html').read_text(encoding='utf-8')
 
-    # עיבוד כל דף עבודה
-    for md_file in sorted(worksheets_dir.glob('*.md')):
-        print(f"Processing: {md_file.name}")
-
-        # קריאת תוכן Markdown
-        content = md_file.read_text(encoding='utf-8')
-
-        # הסרת front matter
-        if content.startswith('---'):
-            parts = content.split('---', 2)
-            if len(parts) >= 3:
-                content = parts[2].strip()
-
-        # המרת Markdown ל-HTML
-        html_body = markdown.markdown(content, extensions=['fenced_code', 'tables', 'nl2br'])
-
-        # עיבוד LaTeX math
-        html_body = html_body.replace('$$', '$$$$')  # Escape for template
-
-        # תיקון נתיב תמונות עבור GitHub Pages - מ-preview_pages צריך לעלות 2 תיקיות
-        html_body = html_body.replace('src="assets/', 'src="../../assets/')
-
-        # יצירת HTML מלא
-        html_output = template.replace(
-            '<div class="page" id="content">\n        <div class="loading">⏳ טוען...</div>\n    </div>',
-            f'<div class="page" id="content">{html_body}</div>'
-        ).replace(
-            'const params = new URLSearchParams(window.location.search);\n        const file = params.get(\'file\') || \'worksheets/grade-8/kavba_a1_graph_reading.md\';',
-            f'// Static page for {md_file.name}'
-        ).replace(
-            'fetch(filePath)',
-            'Promise.resolve("")'  # Skip fetch for static page
-        )
-
-        # שמירה
-        output_file = output_dir / f"{md_file.stem}.html"
-        output_file.write_text(html_output, encoding='utf-8')
-        print(f"  Created: {output_file}")
+    # דפי העבודה מהקטלוג (ברירת מחדל: כולם)
+    if worksheets is None:
+        worksheets = WorksheetCatalog().select()
+    md_files = [Path(ws['path']) for ws in worksheets]
 
-    print(f"\n✅ All preview pages created in {output_dir}/")
+    # תוצרי הביניים של דפי העבודה - רק דפים שהשתנו מפוענחים
+    sheets = pipeline.parse_many(md_files, jobs=jobs)
 
+    # עיבוד כל דף עבודה
+    built = 0
+    for md_file, sheet in zip(md_files, sheets):
+        output_file = output_dir / f"{md_file.stem}.html"
+        stamp = pipeline.stamp('preview', [sheet], template)
+
+        def build():
+            # עיבוד LaTeX math
+            html_body = sheet['html'].replace('$$', '$$$$')  # Escape for template
+
+            # תיקון נתיב תמונות עבור GitHub Pages - מ-preview_pages צריך לעלות 2 תיקיות
+            html_body = derivatives.rewrite_img_sources(html_body, 'web', prefix='../../')
+
+            # יצירת HTML מלא
+            html_output = template.replace(
+                '<div class="page" id="content">\n        <div class="loading">⏳ טוען...</div>\n    </div>',
+                f'<div class="page" id="content">{html_body}</div>'
+            ).replace(
+                'const params = new URLSearchParams(window.location.search);\n        const file = params.get(\'file\') || \'worksheets/grade-8/kavba_a1_graph_reading.md\';',
+                f'// Static page for {md_file.name}'
+            ).replace(
+                'fetch(filePath)',
+                'Promise.resolve("")'  # Skip fetch for static page
+            )
+
+            # שמירה
+            output_file.write_text(html_output, encoding='utf-8')
+
+        if pipeline.build_target(output_file, stamp, build):
+            print(f"  Created: {output_file}")
+            built += 1
+        else:
+            print(f"  Up to date: {output_file}")
+
+    print(f"\n✅ All preview pages created in {output_dir}/ ({built} rebuilt)")
+    return built
 
 if __name__ == '__main__':
-    build_preview_pages()
+    parser = argparse.ArgumentParser(description='בניית דפי תצוגה סטטיים מדפי העבודה')
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+                        help='מספר תהליכים לפענוח דפי עבודה (ברירת מחדל: מספר הליבות)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='פענוח ובנייה מחדש של הכול, בלי מטמון הבנייה')
+    parser.add_argument('--grade', default=None, help="רק דפים של כיתה: 8, ח או 'כיתה ח'")
+    parser.add_argument('--topic', default=None, help='רק דפים שהנושא או הכותרת שלהם מכילים את הטקסט')
+    args = parser.parse_args()
+
+    try:
+        worksheets = WorksheetCatalog().select(grade=args.grade, topic=args.topic)
+    except ValueError as e:
+        parser.error(str(e))
+    build_preview_pages(BuildPipeline(use_cache=not args.no_cache), jobs=args.jobs, worksheets=worksheets)
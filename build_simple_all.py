@@ -5,19 +5,24 @@
 """
 
 import sys
+import argparse
 from pathlib import Path
-import markdown
+from typing import Optional, Dict, List
+from core.image_derivatives import ImageDerivatives
+from core.build_pipeline import BuildPipeline
+from core.catalog import WorksheetCatalog
 
 sys.stdout.reconfigure(encoding='utf-8')
 
-def build_simple_all():
-    worksheets = [
-        ('worksheets/grade-8/kavba_a1_graph_reading.md', 'קריאת גרף תנועה - מרחק וזמן'),
-        ('worksheets/grade-8/kavba_a1_slope_table.md', 'משמעות השיפוע באמצעות טבלת ערכים'),
-        ('worksheets/grade-8/kavba_a1_50_questions_coefficients.md', '50 שאלות על מקדמים בפונקציה קווית')
-    ]
+def build_simple_all(pipeline: Optional[BuildPipeline] = None, jobs: Optional[int] = None,
+                     worksheets: Optional[List[Dict]] = None) -> bool:
+    pipeline = pipeline or BuildPipeline()
+    derivatives = ImageDerivatives()
+    # דפי העבודה מהקטלוג (ברירת מחדל: כולם, לפי כיתה וסדר)
+    if worksheets is None:
+        worksheets = WorksheetCatalog().select()
 
-    html = '''<!DOCTYPE html>
+    html_start = '''<!DOCTYPE html>
 <html dir="rtl" lang="he">
 <head>
     <meta charset="UTF-8">
@@ -48,27 +53,48 @@ def build_simple_all():
     <button class="print-btn" onclick="window.print()">🖨️ הדפס את כל הדפים</button>
 '''
 
-    for md_file, title in worksheets:
-        content = Path(md_file).read_text(encoding='utf-8')
-        if content.startswith('---'):
-            content = content.split('---', 2)[2].strip()
+    sheets = pipeline.parse_many([ws['path'] for ws in worksheets], jobs=jobs)
 
-        html_body = markdown.markdown(content, extensions=['fenced_code', 'tables', 'nl2br'])
-        html_body = html_body.replace('src="assets/', 'src="../assets/')
+    output_file = Path('all_worksheets.html')
+    stamp = pipeline.stamp('simple-bundle', sheets, html_start, *(ws['title'] for ws in worksheets))
 
-        # הסרת כותרת כפולה - אם יש <h1> בתחילת html_body, נסיר אותו
-        if html_body.strip().startswith('<h1>'):
-            # מוצאים את סוף ה-h1 הראשון
-            h1_end = html_body.find('</h1>')
-            if h1_end != -1:
-                html_body = html_body[h1_end + 5:].strip()
+    def build():
+        html = html_start
+        for ws, sheet in zip(worksheets, sheets):
+            title = ws['title']
+            html_body = derivatives.rewrite_img_sources(sheet['html'], 'web', prefix='../')
 
-        html += f'<div class="a4-page"><h1 style="text-align: center; font-size: 20pt; margin-bottom: 1em;">{title}</h1>{html_body}</div>\n'
+            # הסרת כותרת כפולה - אם יש <h1> בתחילת html_body, נסיר אותו
+            if html_body.strip().startswith('<h1>'):
+                # מוצאים את סוף ה-h1 הראשון
+                h1_end = html_body.find('</h1>')
+                if h1_end != -1:
+                    html_body = html_body[h1_end + 5:].strip()
 
-    html += '</body></html>'
+            html += f'<div class="a4-page"><h1 style="text-align: center; font-size: 20pt; margin-bottom: 1em;">{title}</h1>{html_body}</div>\n'
 
-    Path('all_worksheets.html').write_text(html, encoding='utf-8')
+        html += '</body></html>'
+        output_file.write_text(html, encoding='utf-8')
+
+    if not pipeline.build_target(output_file, stamp, build):
+        print('♻️ all_worksheets.html up to date')
+        return False
     print('✅ Created all_worksheets.html')
+    return True
+
 
 if __name__ == '__main__':
-    build_simple_all()
+    parser = argparse.ArgumentParser(description='בניית דף HTML פשוט עם כל דפי העבודה')
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+                        help='מספר תהליכים לפענוח דפי עבודה (ברירת מחדל: מספר הליבות)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='פענוח ובנייה מחדש של הכול, בלי מטמון הבנייה')
+    parser.add_argument('--grade', default=None, help="רק דפים של כיתה: 8, ח או 'כיתה ח'")
+    parser.add_argument('--topic', default=None, help='רק דפים שהנושא או הכותרת שלהם מכילים את הטקסט')
+    args = parser.parse_args()
+
+    try:
+        worksheets = WorksheetCatalog().select(grade=args.grade, topic=args.topic)
+    except ValueError as e:
+        parser.error(str(e))
+    build_simple_all(BuildPipeline(use_cache=not args.no_cache), jobs=args.jobs, worksheets=worksheets)
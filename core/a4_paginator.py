@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+חלוקה לדפי A4 לפי מדידה - גובה כל בלוק נמדד (ונשמר במטמון) ושאלות שלמות נארזות בדפים
+A4 Paginator - measurement-based page packing with a per-block height cache
+"""
+
+import os
+import re
+import json
+import time
+import tempfile
+import html as html_module
+import hashlib
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
+from PIL import Image
+from core.asset_fetcher import OfflineAssetFetcher
+
+try:
+    import weasyprint
+    from weasyprint import HTML
+    WEASYPRINT_AVAILABLE = True
+except (ImportError, OSError):
+    WEASYPRINT_AVAILABLE = False
+
+PX_TO_MM = 25.4 / 96
+
+# תגיות שאין להן תגית סגירה
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'wbr'}
+TAG_RE = re.compile(r'<(/?)([a-zA-Z][a-zA-Z0-9]*)\b[^>]*?(/?)>')
+IMG_SRC_RE = re.compile(r'<img\b[^>]*?\bsrc="([^"]+)"')
+
+
+def split_blocks(html: str) -> List[str]:
+    """פירוק HTML לבלוקים ברמה העליונה (כותרת, פסקה, טבלה, רשימה...)"""
+    blocks = []
+    depth = 0
+    start = 0
+    position = 0
+    for match in TAG_RE.finditer(html):
+        closing, tag, self_closing = match.group(1), match.group(2).lower(), match.group(3)
+        if depth == 0:
+            # טקסט חופשי בין בלוקים
+            if html[position:match.start()].strip():
+                blocks.append(html[position:match.start()].strip())
+            start = match.start()
+
+        if closing:
+            depth = max(depth - 1, 0)
+        elif tag not in VOID_TAGS and not self_closing:
+            depth += 1
+
+        if depth == 0:
+            blocks.append(html[start:match.end()])
+        position = match.end()
+
+    if html[position:].strip():
+        blocks.append(html[position:].strip())
+    return blocks
+
+
+class A4Paginator:
+    """חלוקת תוכן HTML לדפי A4 לפי הגובה הנמדד של כל בלוק"""
+
+    PAGE_HEIGHT_MM = 297
+    PAGE_PADDING_MM = (25, 20)  # למעלה/למטה, צדדים - כמו .a4-page
+    SAFETY_MM = 6  # מרווח ביטחון לשגיאת מדידה ולקריסת שוליים
+    DEFAULT_CACHE_DIR = '.cache/pagination'
+    # מספר הגבהים המקסימלי במטמון - מעבר לו נמחקים אלה שלא נעשה בהם שימוש הכי הרבה זמן
+    DEFAULT_MAX_ENTRIES = 20000
+    MODEL_VERSION = '1'
+
+    # מודל הגובה כשאין WeasyPrint - לפי ה-CSS של הדפים (גדלים בפיקסלים)
+    BASE_FONT_PX = 16
+    AVG_CHAR_WIDTH_EM = 0.5
+    BLOCK_STYLES = {
+        # תגית: (גודל פונט, גובה שורה, שוליים + ריפוד + מסגרת אנכיים ב-em של הבלוק)
+        'h1': (26.67, 1.25, 1.5 + 0.15),
+        'h2': (21.33, 1.25, 2.3),
+        'h3': (20.0, 1.25, 2.2 + 0.5),
+        'p': (16.0, 1.8, 1.6),
+        'li': (16.0, 1.25, 0.6),
+        'pre': (14.0, 1.25, 4.0),
+        'hr': (16.0, 0.0, 3.0),
+        'tr': (16.0, 1.25, 1.0),
+    }
+
+    def __init__(self, css: str = '', base_dir: Optional[Path] = None,
+                 cache_dir: Optional[str] = None, use_weasyprint: bool = True,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        אתחול
+
+        Args:
+            css: ה-CSS של הדפים - נכנס למדידה ולמפתח המטמון
+            base_dir: התיקייה שנתיבי התמונות ב-HTML יחסיים אליה
+            cache_dir: תיקיית מטמון הגבהים (ברירת מחדל: .cache/pagination)
+            use_weasyprint: מדידה בפריסה של WeasyPrint אם הוא מותקן (אחרת - מודל הגובה)
+            max_entries: מספר הגבהים המקסימלי במטמון (פינוי LRU)
+        """
+        self.css = css
+        self.base_dir = Path(base_dir) if base_dir else Path('.')
+        self.cache_path = Path(cache_dir or self.DEFAULT_CACHE_DIR) / 'heights.json'
+        self.use_weasyprint = use_weasyprint and WEASYPRINT_AVAILABLE
+        self.max_entries = max_entries
+
+        vertical_padding, side_padding = self.PAGE_PADDING_MM
+        self.content_width_mm = 210 - 2 * side_padding
+        self.content_height_mm = self.PAGE_HEIGHT_MM - 2 * vertical_padding - self.SAFETY_MM
+
+        self._fetcher = OfflineAssetFetcher() if self.use_weasyprint else None
+        # מפתח בלוק -> [גובה במ"מ, זמן השימוש האחרון]
+        self._heights: Optional[Dict[str, List[float]]] = None
+        self._dirty = False
+        self._run_stamp = int(time.time())
+        self.measured = 0
+        self.cache_hits = 0
+
+    def signature(self) -> str:
+        """מזהה שיטת המדידה - חלק ממפתח המטמון"""
+        if self.use_weasyprint:
+            return f"weasyprint {weasyprint.__version__}"
+        return f"model {self.MODEL_VERSION}"
+
+    def paginate(self, html: str, title: str) -> List[str]:
+        """
+        חלוקת תוכן לדפי A4 - שאלה (כותרת וכל מה שאחריה עד הכותרת הבאה) לא נחתכת
+        בין דפים אלא אם היא גבוהה מדף שלם
+
+        Args:
+            html: תוכן דף העבודה
+            title: כותרת דף העבודה - מופיעה בראש כל דף
+
+        Returns:
+            רשימת דפים, כל אחד <div class="worksheet-content"> עם כותרת
+        """
+        blocks = split_blocks(html)
+        first_title = self._title_html(title, 1)
+        continuation_title = self._title_html(title, 2)
+        heights = self.measure([first_title, continuation_title] + blocks)
+        first_title_height, continuation_title_height = heights[:2]
+        block_heights = heights[2:]
+
+        pages: List[List[str]] = [[first_title]]
+        used = first_title_height
+
+        def new_page():
+            nonlocal used
+            pages.append([self._title_html(title, len(pages) + 1)])
+            used = continuation_title_height
+
+        # התוכן יושב במכל flex (.worksheet-content), שבו שוליים אינם קורסים -
+        # ולכן גובה דף הוא פשוט סכום הגבהים של הבלוקים, כל אחד עם השוליים שלו
+        for unit in self._units(list(zip(blocks, block_heights))):
+            unit_height = sum(height for _, height in unit)
+            if used + unit_height <= self.content_height_mm:
+                pages[-1].extend(block for block, _ in unit)
+                used += unit_height
+                continue
+
+            if len(pages[-1]) > 1 and continuation_title_height + unit_height <= self.content_height_mm:
+                new_page()
+                pages[-1].extend(block for block, _ in unit)
+                used += unit_height
+                continue
+
+            # שאלה גבוהה מדף - חלוקה בין בלוקים, בלי להשאיר כותרת לבד בתחתית דף
+            for index, (block, height) in enumerate(unit):
+                needed = height
+                if self._is_heading(block) and index + 1 < len(unit):
+                    needed += unit[index + 1][1]
+                if used + needed > self.content_height_mm and len(pages[-1]) > 1:
+                    new_page()
+                pages[-1].append(block)
+                used += height
+
+        self.save()
+        return [f'<div class="worksheet-content">{"".join(page)}</div>' for page in pages]
+
+    @staticmethod
+    def _title_html(title: str, page_number: int) -> str:
+        if page_number == 1:
+            return f'<h1 class="worksheet-title">{title}</h1>'
+        return f'<h1 class="worksheet-title">{title} (המשך - דף {page_number})</h1>'
+
+    @staticmethod
+    def _is_heading(block: str) -> bool:
+        return re.match(r'<h[1-6]\b', block) is not None
+
+    def _units(self, blocks: List[Tuple[str, float]]) -> List[List[Tuple[str, float]]]:
+        """קיבוץ בלוקים ליחידות שלא נחתכות: כל h2/h3 פותח יחידה חדשה"""
+        units: List[List[Tuple[str, float]]] = []
+        for block, height in blocks:
+            if not units or re.match(r'<h[23]\b', block):
+                units.append([])
+            units[-1].append((block, height))
+        return units
+
+    def measure(self, blocks: List[str]) -> List[float]:
+        """גובה כל בלוק במ"מ - מהמטמון, ובלוקים חדשים נמדדים יחד"""
+        heights = self._load()
+        keys = [self._block_key(block) for block in blocks]
+
+        missing = list(dict.fromkeys(
+            (key, block) for key, block in zip(keys, blocks) if key not in heights))
+        self.cache_hits += len(blocks) - len(missing)
+        # עדכון זמן שימוש אחרון לצורך LRU
+        for key in keys:
+            if key in heights and heights[key][1] != self._run_stamp:
+                heights[key][1] = self._run_stamp
+                self._dirty = True
+        if missing:
+            missing_blocks = [block for _, block in missing]
+            measured = None
+            if self.use_weasyprint:
+                try:
+                    measured = self._measure_with_weasyprint(missing_blocks)
+                except Exception:
+                    measured = None
+                if measured is None:
+                    # פריסה שנכשלה או עץ פריסה שאינו מוכר - מודל הגובה עדיף על שום מדידה.
+                    # המעבר נעשה לכל שאר הריצה, כך שהגבהים נשמרים תחת החתימה של המודל
+                    # ולא תחת החתימה של WeasyPrint
+                    self.use_weasyprint = False
+                    return self.measure(blocks)
+            if measured is None:
+                measured = [self._estimate_height(block) for block in missing_blocks]
+            for (key, _), height in zip(missing, measured):
+                heights[key] = [height, self._run_stamp]
+            self.measured += len(missing)
+            self._dirty = True
+
+        return [heights[key][0] for key in keys]
+
+    def _block_key(self, block: str) -> str:
+        """מפתח בלוק: התוכן, ה-CSS, שיטת המדידה ומצב התמונות שהבלוק מפנה אליהן"""
+        digest = hashlib.sha256()
+        for part in (self.signature(), self.css, str(self.content_width_mm), block):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        for src in IMG_SRC_RE.findall(block):
+            path = self._image_path(src)
+            if path is not None:
+                stat = path.stat()
+                digest.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode('ascii'))
+        return digest.hexdigest()
+
+    def _image_path(self, src: str) -> Optional[Path]:
+        if re.match(r'^[a-z][a-z0-9+.-]*:', src, re.IGNORECASE):
+            return None
+        path = self.base_dir / html_module.unescape(src)
+        return path if path.is_file() else None
+
+    def _measure_with_weasyprint(self, blocks: List[str]) -> Optional[List[float]]:
+        """
+        מדידת כל הבלוקים בפריסה אחת של WeasyPrint ברוחב התוכן של הדף
+
+        לעץ הפריסה אין API ציבורי - הוא נקרא דרך page._page_box. אם המבנה שלו
+        השתנה בגרסה אחרת של WeasyPrint, או שלא כל הבלוקים נמצאו בו, מוחזר None.
+        """
+        wrapped = ''.join(f'<div class="measure-block" data-index="{i}">{block}</div>'
+                          for i, block in enumerate(blocks))
+        measure_css = (
+            f'@page {{ size: {self.content_width_mm}mm 10000mm; margin: 0; }}'
+            'html, body { background: none; margin: 0; padding: 0; }'
+            # flow-root מונע קריסת שוליים בין בלוקים - כל בלוק נמדד עם השוליים שלו
+            '.measure-block { display: flow-root; }'
+        )
+        document = HTML(
+            string=f'<html dir="rtl" lang="he"><head><style>{self.css}\n{measure_css}</style></head>'
+                   f'<body>{wrapped}</body></html>',
+            base_url=self.base_dir.resolve().as_uri() + '/',
+            url_fetcher=self._fetcher
+        ).render()
+
+        heights = [0.0] * len(blocks)
+        found = set()
+        for page in document.pages:
+            page_box = getattr(page, '_page_box', None)
+            if page_box is None or not hasattr(page_box, 'descendants'):
+                return None
+            for box in page_box.descendants():
+                element = getattr(box, 'element', None)
+                if (element is None or getattr(box, 'element_tag', None) != 'div'
+                        or 'measure-block' not in element.get('class', '')
+                        or not hasattr(box, 'margin_height')):
+                    continue
+                index = int(element.get('data-index'))
+                heights[index] += box.margin_height() * PX_TO_MM
+                found.add(index)
+        return heights if len(found) == len(blocks) else None
+
+    def _estimate_height(self, block: str) -> float:
+        """הערכת גובה בלוק לפי מודל ה-CSS - כשאין פריסה אמיתית"""
+        tag_match = re.match(r'<([a-zA-Z0-9]+)', block)
+        tag = tag_match.group(1).lower() if tag_match else 'p'
+        width_px = self.content_width_mm / PX_TO_MM
+
+        if tag in ('ul', 'ol'):
+            items = re.findall(r'<li\b.*?</li>', block, re.DOTALL) or [block]
+            height = sum(self._text_height(item, 'li', width_px - 2 * self.BASE_FONT_PX) for item in items)
+            return (height + 1.6 * self.BASE_FONT_PX) * PX_TO_MM
+        if tag == 'table':
+            rows = re.findall(r'<tr\b.*?</tr>', block, re.DOTALL)
+            cells = max((len(re.findall(r'<t[hd]\b', row)) for row in rows), default=1)
+            height = sum(self._text_height(row, 'tr', width_px / max(cells, 1)) for row in rows)
+            return (height + 2 * self.BASE_FONT_PX) * PX_TO_MM
+        if tag == 'hr':
+            return (3 * self.BASE_FONT_PX + 1) * PX_TO_MM
+
+        height = self._text_height(block, tag if tag in self.BLOCK_STYLES else 'p', width_px)
+        height += sum(self._image_height(src, width_px) for src in IMG_SRC_RE.findall(block))
+        return height * PX_TO_MM
+
+    def _text_height(self, block: str, tag: str, width_px: float) -> float:
+        """גובה טקסט בפיקסלים: שורות (לפי רוחב ממוצע של תו ושבירות <br>) ושוליים"""
+        font_px, line_height, spacing_em = self.BLOCK_STYLES[tag]
+        if tag == 'hr':
+            return spacing_em * font_px
+
+        chars_per_line = max(int(width_px / (font_px * self.AVG_CHAR_WIDTH_EM)), 1)
+        lines = 0
+        for segment in re.split(r'<br\s*/?>', block):
+            text = html_module.unescape(re.sub(r'<[^>]+>', '', segment)).strip()
+            if text:
+                lines += -(-len(text) // chars_per_line)
+        return lines * font_px * line_height + spacing_em * font_px
+
+    def _image_height(self, src: str, width_px: float) -> float:
+        """גובה תמונה מוצגת: max-width 100%, שוליים 1em ומסגרת 3px"""
+        path = self._image_path(src)
+        if path is None:
+            return 0.0
+        try:
+            with Image.open(path) as img:
+                natural_width, natural_height = img.size
+        except Exception:
+            return 0.0
+        displayed_width = min(natural_width, width_px)
+        return displayed_width * natural_height / natural_width + 2 * self.BASE_FONT_PX + 6
+
+    def _load(self) -> Dict[str, List[float]]:
+        if self._heights is None:
+            try:
+                heights = json.loads(self.cache_path.read_text(encoding='utf-8'))
+            except (OSError, ValueError):
+                heights = {}
+            # רשומות בפורמט אחר (למשל גובה בלי זמן שימוש) - נמדדות מחדש
+            self._heights = {key: entry for key, entry in heights.items()
+                             if isinstance(entry, list) and len(entry) == 2}
+        return self._heights
+
+    def save(self):
+        """שמירת הגבהים שנמדדו (כתיבה אטומית) ופינוי לפי הצורך"""
+        if not self._dirty:
+            return
+        if len(self._heights) > self.max_entries:
+            recent = sorted(self._heights.items(), key=lambda item: item[1][1], reverse=True)
+            self._heights = dict(recent[:self.max_entries])
+
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=self.cache_path.parent, suffix='.tmp')
+        os.close(fd)
+        try:
+            Path(tmp_name).write_text(json.dumps(self._heights), encoding='utf-8')
+            os.replace(tmp_name, self.cache_path)
+        finally:
+            if os.path.exists(tmp_name):
+                os.remove(tmp_name)
+        self._dirty = False
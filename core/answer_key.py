@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+מפתח למורה - פתרונות מ-SOLUTION_KEY.md משובצים בדף העבודה עצמו
+Teacher Key - solutions from SOLUTION_KEY.md merged into the parsed worksheet
+
+פרק N במפתח (## N. ...) פותר את דף העבודה שה-order שלו ב-front matter הוא N,
+מהכיתה שבכותרת המפתח (**כיתה:** ח'). כל שאלה בדף העבודה מזוהה לפי הכותרת
+שלה - '(א) ...' או 'שאלה N' - ומותאמת לתת-הפרק עם אותה כותרת בפרק של הדף
+במפתח התשובות. הפתרון (בלי השאלה שחוזרת במפתח) משובץ בסוף השאלה, כך שמפתח
+המורה נבנה מאותו HTML של דף התלמיד.
+"""
+
+import re
+from pathlib import Path
+from typing import Optional, List, Dict, Tuple, Callable
+from core.a4_paginator import split_blocks
+from core.catalog import WorksheetCatalog
+
+# תווית שאלה מכותרת: '(א) קריאה ישירה' -> 'א', 'שאלה 8 (דוגמה)' -> '8', 'שאלת בונוס 2' -> 'בונוס 2'
+LABEL_RE = re.compile(r'^\s*(?:\(([א-ת])\)|שאלה\s+(\d+)|שאלת\s+בונוס\s+(\d+))')
+KEY_HEADING_RE = re.compile(r'^(#{2,6})\s+(.+?)\s*$', re.MULTILINE)
+HTML_HEADING_RE = re.compile(r'^<h([1-6])\b[^>]*>(.*?)</h\1>', re.IGNORECASE | re.DOTALL)
+HR_RE = re.compile(r'^<hr\b', re.IGNORECASE)
+
+
+def split_key(content: str) -> Dict[int, Tuple[str, str]]:
+    """פרקי המפתח: מספר -> (כותרת, טקסט)"""
+    sections = {}
+    matches = list(re.finditer(r'^## (\d+)\.\s*(.+)$', content, re.MULTILINE))
+    for match, following in zip(matches, matches[1:] + [None]):
+        end = following.start() if following else len(content)
+        sections[int(match.group(1))] = (match.group(2).strip(), content[match.end():end])
+    return sections
+
+
+def key_sections(key_content: str, catalog: Optional[WorksheetCatalog] = None) -> Dict[int, str]:
+    """
+    פרקי מפתח התשובות -> דפי העבודה שהם פותרים, מהקטלוג
+
+    פרק N הוא הדף עם order: N בכיתה שמופיעה בכותרת המפתח (**כיתה:** ...);
+    מפתח בלי כיתה מתאים לדפים מכל הכיתות, והדף הראשון לפי סדר הקטלוג קובע.
+    """
+    grade = re.search(r'^\*\*כיתה:\*\*\s*(.+?)\s*$', key_content, re.MULTILINE)
+    entries = (catalog or WorksheetCatalog()).select(grade=grade.group(1) if grade else None)
+    sections = {}
+    for entry in entries:
+        if entry['order'] is not None:
+            sections.setdefault(entry['order'], entry['path'])
+    return sections
+
+
+def question_label(heading: str) -> Optional[str]:
+    """תווית השאלה מטקסט הכותרת, או None לכותרת שאינה שאלה"""
+    match = LABEL_RE.match(heading.replace('*', ''))
+    if not match:
+        return None
+    if match.group(3):
+        return f"בונוס {match.group(3)}"
+    return match.group(1) or match.group(2)
+
+
+def extract_solutions(section_text: str) -> Dict[str, str]:
+    """
+    הפתרונות שבפרק של דף אחד במפתח: תווית -> Markdown
+
+    השאלה שחוזרת במפתח ('**שאלה:** ...' או הסיפור המודגש) מושמטת, וכך גם הקו
+    המפריד שבסוף תת-הפרק.
+    """
+    solutions = {}
+    headings = list(KEY_HEADING_RE.finditer(section_text))
+    for heading, following in zip(headings, headings[1:] + [None]):
+        label = question_label(heading.group(2))
+        if label is None:
+            continue
+        end = following.start() if following else len(section_text)
+        paragraphs = re.split(r'\n\s*\n', section_text[heading.end():end].strip())
+        kept = [paragraph for paragraph in paragraphs
+                if not paragraph.startswith('**שאלה:**')
+                and not re.fullmatch(r'\*\*[^*].*\*\*', paragraph.strip(), re.DOTALL)
+                and paragraph.strip() != '---']
+        if kept:
+            solutions[label] = '\n\n'.join(kept)
+    return solutions
+
+
+def insert_answers(body_html: str, answers_html: Dict[str, str]) -> Tuple[str, List[str]]:
+    """
+    שיבוץ הפתרונות בגוף ה-HTML של דף העבודה, בסוף כל שאלה שיש לה פתרון
+
+    Args:
+        body_html: גוף ה-HTML של דף התלמיד
+        answers_html: תווית -> HTML של הפתרון
+
+    Returns:
+        (גוף ה-HTML של המפתח, תוויות השאלות שבדף ואין להן פתרון)
+    """
+    blocks = split_blocks(body_html)
+    result = []
+    unanswered = []
+    pending = None  # פתרון שממתין לסוף השאלה הנוכחית
+
+    def flush():
+        # הפתרון נכנס לפני הקווים המפרידים שבסוף השאלה
+        position = len(result)
+        while position > 0 and HR_RE.match(result[position - 1]):
+            position -= 1
+        result.insert(position, f'<div class="teacher-answer">\n{pending}\n</div>')
+
+    for block in blocks:
+        heading = HTML_HEADING_RE.match(block)
+        if heading:
+            if pending is not None:
+                flush()
+                pending = None
+            label = question_label(re.sub(r'<[^>]+>', '', heading.group(2)))
+            if label is not None:
+                if label in answers_html:
+                    pending = answers_html[label]
+                else:
+                    unanswered.append(label)
+        result.append(block)
+
+    if pending is not None:
+        flush()
+    return '\n'.join(result), unanswered
+
+
+class AnswerKey:
+    """פתרונות מפתח התשובות לפי דף עבודה"""
+
+    DEFAULT_KEY_FILE = 'SOLUTION_KEY.md'
+
+    def __init__(self, key_file: Optional[str] = None, sections: Optional[Dict[int, str]] = None):
+        """
+        Args:
+            key_file: קובץ מפתח התשובות (ברירת מחדל: SOLUTION_KEY.md)
+            sections: מיפוי מספר פרק במפתח לדף העבודה (ברירת מחדל: מהקטלוג, ראו key_sections)
+        """
+        self.key_file = Path(key_file or self.DEFAULT_KEY_FILE)
+        self.sections = sections
+        self._key_sections: Optional[Dict[int, Tuple[str, str]]] = None
+
+    def solutions_for(self, worksheet: str) -> Dict[str, str]:
+        """הפתרונות (תווית -> Markdown) של דף עבודה; דף שאין לו פרק במפתח - מילון ריק"""
+        if self._key_sections is None:
+            content = self.key_file.read_text(encoding='utf-8')
+            self._key_sections = split_key(content)
+            if self.sections is None:
+                self.sections = key_sections(content)
+
+        wanted = Path(worksheet).resolve()
+        for number, path in self.sections.items():
+            if Path(path).resolve() == wanted and number in self._key_sections:
+                return extract_solutions(self._key_sections[number][1])
+        return {}
+
+    def teacher_body(self, worksheet: str, body_html: str,
+                     to_html: Callable[[str], str]) -> Tuple[str, List[str]]:
+        """
+        גוף ה-HTML של מפתח המורה מגוף ה-HTML של דף התלמיד
+
+        Args:
+            worksheet: נתיב דף העבודה (לאיתור הפרק במפתח)
+            body_html: גוף ה-HTML של דף התלמיד
+            to_html: המרת Markdown של פתרון ל-HTML - באותו אופן שהומר הדף
+
+        Returns:
+            (גוף ה-HTML של המפתח, תוויות השאלות בלי פתרון במפתח)
+        """
+        answers = {label: to_html(solution) for label, solution in self.solutions_for(worksheet).items()}
+        return insert_answers(body_html, answers)
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+אימות מפתח התשובות - בדיקה סמלית ומספרית של SOLUTION_KEY.md מול דפי העבודה
+Answer Verifier - symbolic and numeric checks of SOLUTION_KEY.md against the worksheets
+"""
+
+import re
+import sys
+import json
+import functools
+from pathlib import Path
+from typing import List, Dict, Tuple, Optional
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from core.graph_blocks import extract_graph_specs
+from core.answer_key import key_sections, split_key
+
+try:
+    import sympy
+    from sympy.parsing.sympy_parser import (
+        parse_expr, standard_transformations, implicit_multiplication_application
+    )
+    SYMPY_AVAILABLE = True
+except ImportError:
+    SYMPY_AVAILABLE = False
+
+# Ensure UTF-8 encoding
+if sys.stdout.encoding != 'utf-8':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+NUMBER = r'-?\d+(?:\.\d+)?'
+# שרשרת חשבון בטקסט רגיל, למשל "4 - 0 = 4" או "6 - 8 = -2"
+PLAIN_ARITHMETIC_RE = re.compile(
+    rf'(?<![\w.$]){NUMBER}(?:\s*[-+×*/]\s*{NUMBER})+(?:\s*=\s*{NUMBER})+(?![\w.])')
+MATH_SPAN_RE = re.compile(r'\$([^$]+)\$')
+# אזכור נקודה בגרף: "D(3, 8)", "נקודה A: (0, 0)"
+POINT_MENTION_RE = re.compile(rf'(?<![A-Za-z])([A-Z])\s*:?\s*\(\s*({NUMBER})\s*,\s*({NUMBER})\s*\)')
+TABLE_ROW_RE = re.compile(r'^\|\s*(?:\*\*)?([^|*]*?)(?:\*\*)?\s*\|\s*(?:\*\*)?([^|*]*?)(?:\*\*)?\s*\|\s*$')
+
+
+def normalize_latex(text: str) -> str:
+    """
+    פעולות LaTeX לכתיב חשבוני: \\cdot ו-\\times ל-*, \\div ל-/, \\frac{a}{b} ל-((a)/(b));
+    פקודות מרווח ו-\\left/\\right מוסרות, כך שנשארות אותיות רק במשתנים ובפקודות אחרות
+    """
+    text = (text.replace('\\cdot', '*').replace('\\times', '*').replace('×', '*')
+            .replace('\\div', '/').replace('÷', '/').replace('−', '-')
+            .replace('\\left', '').replace('\\right', ''))
+    text = re.sub(r'\\[,;:! ]', ' ', text)
+    # שברים מקוננים - מהפנימי החוצה
+    previous = None
+    while previous != text:
+        previous = text
+        text = re.sub(r'\\[dt]?frac\s*\{([^{}]*)\}\s*\{([^{}]*)\}', r'((\1)/(\2))', text)
+    return text
+
+
+@functools.lru_cache(maxsize=None)
+def parse_math(text: str):
+    """
+    פענוח ביטוי (בכתיב LaTeX פשוט או טקסט) לביטוי SymPy - עם זיכרון,
+    כך שביטוי שחוזר במפתח ובדפי עבודה שונים מפוענח פעם אחת
+
+    Raises:
+        ValueError: ביטוי שאינו ניתן לפענוח
+    """
+    normalized = normalize_latex(text).replace('{', '(').replace('}', ')').strip()
+    try:
+        return parse_expr(normalized, transformations=standard_transformations +
+                          (implicit_multiplication_application,), evaluate=True)
+    except Exception as e:
+        raise ValueError(f"לא ניתן לפענח את הביטוי '{text}': {e}")
+
+
+class AnswerVerifier:
+    """בדיקת מפתח התשובות מול נתוני דפי העבודה: חשבון, נקודות גרף, טבלאות ומשוואות"""
+
+    DEFAULT_KEY_FILE = 'SOLUTION_KEY.md'
+    TOLERANCE = 1e-9
+
+    def __init__(self, key_file: Optional[str] = None, sections: Optional[Dict[int, str]] = None):
+        """
+        אתחול
+
+        Args:
+            key_file: קובץ מפתח התשובות (ברירת מחדל: SOLUTION_KEY.md)
+            sections: מיפוי מספר פרק במפתח לדף העבודה (ברירת מחדל: מהקטלוג, לפי order)
+        """
+        if not SYMPY_AVAILABLE:
+            raise RuntimeError("SymPy לא מותקן - pip install sympy")
+        self.key_file = Path(key_file or self.DEFAULT_KEY_FILE)
+        self.sections = sections
+        self.findings: List[Dict] = []
+        # שרשראות שאין בהן שני צדדים מספריים (למשל y = 5 + 3x) - לא נבדקו: (פרק, שרשרת)
+        self.skipped: List[Tuple[str, str]] = []
+        # טענות מספריות (מקום, טענה, ערך שחושב) - נבדקות יחד בסוף
+        self._claims: List[Tuple[str, str, str, float, float]] = []
+
+    def verify(self) -> List[Dict]:
+        """
+        הרצת כל הבדיקות
+
+        Returns:
+            רשימת ממצאים, כל אחד מילון עם 'section', 'question', 'check',
+            'status' ('ok', 'error' או 'missing') ו-'message'
+        """
+        self.findings = []
+        self.skipped = []
+        self._claims = []
+
+        content = self.key_file.read_text(encoding='utf-8')
+        key_sections_text = split_key(content)
+        sections = self.sections or key_sections(content)
+        for number, worksheet in sections.items():
+            if number not in key_sections_text:
+                self._add(str(number), '', 'section', 'missing', f"פרק {number} חסר במפתח התשובות")
+                continue
+            title, key_text = key_sections_text[number]
+            worksheet_text = Path(worksheet).read_text(encoding='utf-8')
+
+            self._check_arithmetic(title, key_text)
+            if extract_graph_specs(worksheet_text):
+                self._check_graph_points(title, key_text, worksheet_text)
+            if self._parse_tables(worksheet_text):
+                self._check_value_table(title, key_text, worksheet_text)
+            if re.search(r'^### שאלה \d+', worksheet_text, re.MULTILINE):
+                self._check_coefficient_stories(title, key_text, worksheet_text)
+
+        self._evaluate_claims()
+
+        # סדר הפרקים כמו במפתח - טענות מספריות נבדקות יחד בסוף ומוחזרות למקומן
+        section_order = {title: number for number, (title, _) in key_sections_text.items()}
+        self.findings.sort(key=lambda finding: section_order.get(finding['section'], 0))
+        return self.findings
+
+    def _add(self, section: str, question: str, check: str, status: str, message: str):
+        self.findings.append({'section': section, 'question': question, 'check': check,
+                              'status': status, 'message': message})
+
+    def _claim(self, section: str, question: str, check: str, claimed: float, actual: float):
+        """רישום טענה מספרית לבדיקה באצווה"""
+        self._claims.append((section, question, check, float(claimed), float(actual)))
+
+    def _evaluate_claims(self):
+        """השוואת כל הטענות המספריות בפעולה וקטורית אחת"""
+        if not self._claims:
+            return
+        claimed = np.array([claim[3] for claim in self._claims])
+        actual = np.array([claim[4] for claim in self._claims])
+        matches = np.isclose(claimed, actual, rtol=0, atol=self.TOLERANCE)
+
+        for (section, question, check, claim_value, actual_value), ok in zip(self._claims, matches):
+            if ok:
+                self._add(section, question, check, 'ok', f"{claim_value:g}")
+            else:
+                self._add(section, question, check, 'error',
+                          f"במפתח {claim_value:g}, בפועל {actual_value:g}")
+
+    def _check_arithmetic(self, title: str, key_text: str):
+        """כל שרשרת חישוב מספרית במפתח (בתוך $...$ ובטקסט רגיל) נכונה"""
+        chains = [span for span in MATH_SPAN_RE.findall(key_text) if '=' in span]
+        plain_text = MATH_SPAN_RE.sub(' ', key_text)
+        chains.extend(match.group() for match in PLAIN_ARITHMETIC_RE.finditer(plain_text))
+
+        for chain in chains:
+            # רק חלקים ללא משתנים - "y = 6 + 3 = 9" בודק את 6 + 3 = 9;
+            # פעולות LaTeX (\cdot, \frac...) מנורמלות קודם, כדי שלא ייחשבו למשתנים
+            parts = [normalize_latex(part).strip() for part in chain.split('=')]
+            numeric = [part for part in parts if part and not re.search(r'[A-Za-z\\]', part)]
+            if len(numeric) < 2:
+                self.skipped.append((title, chain))
+                continue
+            try:
+                values = [float(parse_math(part)) for part in numeric]
+            except (ValueError, TypeError):
+                self._add(title, '', 'arithmetic', 'error', f"לא ניתן לחשב: {chain}")
+                continue
+            for value in values[1:]:
+                self._claim(title, chain, 'arithmetic', value, values[0])
+
+    def _check_graph_points(self, title: str, key_text: str, worksheet_text: str):
+        """כל נקודה שהמפתח מזכיר, למשל D(3, 8), היא נקודה של הגרף בדף העבודה"""
+        spec = next((spec for spec in extract_graph_specs(worksheet_text)
+                     if 'points' in spec and 'labels' in spec), None)
+        if spec is None:
+            return
+        graph_points = dict(zip(spec['labels'], spec['points']))
+
+        # כל אזכור שונה נבדק פעם אחת
+        for label, x, y in dict.fromkeys(POINT_MENTION_RE.findall(key_text)):
+            if label not in graph_points:
+                self._add(title, label, 'graph_point', 'error', f"נקודה {label} אינה בגרף")
+                continue
+            graph_x, graph_y = graph_points[label]
+            self._claim(title, f"{label}(x)", 'graph_point', float(x), graph_x)
+            self._claim(title, f"{label}(y)", 'graph_point', float(y), graph_y)
+
+    @staticmethod
+    def _parse_tables(text: str) -> List[List[Tuple[float, Optional[float]]]]:
+        """טבלאות x/y בטקסט: רשימת שורות (x, y), כש-y הוא None בתא ריק (__)"""
+        tables = []
+        current = None
+        for line in text.split('\n'):
+            match = TABLE_ROW_RE.match(line.strip())
+            if not match:
+                current = None
+                continue
+            first, second = match.group(1).strip(), match.group(2).strip()
+            if first == '$x$':
+                current = []
+                tables.append(current)
+            elif current is not None and re.fullmatch(NUMBER, first):
+                current.append((float(first), float(second) if re.fullmatch(NUMBER, second) else None))
+        return [table for table in tables if table]
+
+    def _check_value_table(self, title: str, key_text: str, worksheet_text: str):
+        """הטבלה במפתח תואמת לנתוני דף העבודה, הטבלה המלאה ליניארית והשינוי הקבוע נכון"""
+        worksheet_table = self._parse_tables(worksheet_text)[0]
+        key_tables = self._parse_tables(key_text)
+        if not key_tables:
+            self._add(title, '', 'table', 'missing', "אין טבלת ערכים במפתח")
+            return
+
+        given = {x: y for x, y in worksheet_table if y is not None}
+        for x, y in key_tables[0]:
+            if x in given:
+                self._claim(title, f"y({x:g})", 'table_data', y, given[x])
+
+        completed = next((table for table in reversed(key_tables)
+                          if all(y is not None for _, y in table)), None)
+        if completed is None:
+            self._add(title, '', 'table', 'missing', "אין טבלה מלאה במפתח")
+            return
+
+        xs = np.array([x for x, _ in completed])
+        ys = np.array([y for _, y in completed])
+        slopes = np.diff(ys) / np.diff(xs)
+        for x, y in completed:
+            if x in given:
+                self._claim(title, f"y({x:g})", 'table_completed', y, given[x])
+        for x, slope in zip(xs[1:], slopes):
+            self._claim(title, f"שינוי עד x={x:g}", 'table_linear', slope, slopes[0])
+
+        stated = re.search(rf'השינוי הקבוע הוא \*\*({NUMBER})\*\*', key_text)
+        if stated:
+            self._claim(title, 'השינוי הקבוע', 'table_slope', float(stated.group(1)), slopes[0])
+
+    @staticmethod
+    def _worksheet_questions(worksheet_text: str) -> Dict[int, str]:
+        """שאלות דף העבודה: מספר -> טקסט הסיפור (הפסקה שאחרי ### שאלה N)"""
+        questions = {}
+        for match in re.finditer(r'^### שאלה (\d+)\s*\n+(.+?)\n\s*\n', worksheet_text, re.MULTILINE | re.DOTALL):
+            questions[int(match.group(1))] = ' '.join(match.group(2).split())
+        return questions
+
+    def _check_coefficient_stories(self, title: str, key_text: str, worksheet_text: str):
+        """
+        לכל שאלה שיש לה פתרון במפתח: הסיפור במפתח זהה לדף העבודה, המשוואה
+        ליניארית במספרים שבסיפור, והמקדם שבתשובה הוא המקדם של המשוואה
+        """
+        worksheet_questions = self._worksheet_questions(worksheet_text)
+        x = sympy.Symbol('x')
+
+        solved = set()
+        blocks = list(re.finditer(r'^#### שאלה (\d+)[^\n]*\n(.*?)(?=^#### |^---|\Z)', key_text,
+                                  re.MULTILINE | re.DOTALL))
+        for block in blocks:
+            number = int(block.group(1))
+            body = block.group(2)
+            question = f"שאלה {number}"
+            solved.add(number)
+
+            story_match = re.search(r'^\*\*(.+?)\*\*\s*$', body, re.MULTILINE)
+            story = ' '.join(story_match.group(1).split()) if story_match else ''
+            worksheet_story = worksheet_questions.get(number)
+            if worksheet_story is None:
+                self._add(title, question, 'story', 'error', "השאלה אינה בדף העבודה")
+                continue
+            if story != worksheet_story:
+                self._add(title, question, 'story', 'error', "נוסח השאלה במפתח שונה מדף העבודה")
+            else:
+                self._add(title, question, 'story', 'ok', "נוסח השאלה זהה לדף העבודה")
+
+            equation = next((span for span in MATH_SPAN_RE.findall(body)
+                             if re.match(r'\s*y\s*=', span)), None)
+            if equation is None:
+                self._add(title, question, 'equation', 'missing', "אין משוואה בפתרון")
+                continue
+            try:
+                polynomial = sympy.Poly(parse_math(equation.split('=', 1)[1]), x)
+            except (ValueError, sympy.PolynomialError) as e:
+                self._add(title, question, 'equation', 'error', f"{equation}: {e}")
+                continue
+            if polynomial.degree() > 1:
+                self._add(title, question, 'equation', 'error', f"{equation}: המשוואה אינה ליניארית")
+                continue
+            slope = float(polynomial.coeff_monomial(x))
+            intercept = float(polynomial.coeff_monomial(1))
+
+            story_numbers = {float(n) for n in re.findall(r'\d+(?:\.\d+)?', worksheet_story)}
+            for name, value in (('המקדם', slope), ('המספר החופשי', intercept)):
+                if value != 0 and abs(value) not in story_numbers:
+                    self._add(title, question, 'equation', 'error',
+                              f"{equation}: {name} {value:g} אינו מופיע בסיפור שבדף העבודה")
+
+            answer = re.search(r'\*\*תשובה:\*\*(.*)', body)
+            stated = re.search(rf'המקדם של \$x\$ הוא \*\*({NUMBER})\*\*', answer.group(1)) if answer else None
+            if stated:
+                self._claim(title, question, 'coefficient', float(stated.group(1)), slope)
+
+        unsolved = sorted(set(worksheet_questions) - solved)
+        if unsolved:
+            self._add(title, '', 'coverage', 'missing',
+                      f"{len(unsolved)} שאלות ללא פתרון במפתח: {', '.join(map(str, unsolved))}")
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='אימות מפתח התשובות מול דפי העבודה')
+    parser.add_argument('--key', default=AnswerVerifier.DEFAULT_KEY_FILE,
+                        help='קובץ מפתח התשובות (ברירת מחדל: SOLUTION_KEY.md)')
+    parser.add_argument('--json', action='store_true', help='הדפסת הממצאים כ-JSON')
+    parser.add_argument('--verbose', '-v', action='store_true', help='הצגת גם הבדיקות שעברו')
+    args = parser.parse_args()
+
+    verifier = AnswerVerifier(args.key)
+    findings = verifier.verify()
+    counts = {status: sum(1 for f in findings if f['status'] == status) for status in ('ok', 'error', 'missing')}
+    counts['skipped'] = len(verifier.skipped)
+
+    if args.json:
+        skipped = [{'section': section, 'chain': chain} for section, chain in verifier.skipped]
+        sys.stdout.buffer.write(json.dumps({'counts': counts, 'findings': findings, 'skipped': skipped},
+                                           ensure_ascii=False, indent=2).encode('utf-8') + b'\n')
+    else:
+        icons = {'ok': '✅', 'error': '❌', 'missing': '⚠️'}
+        for finding in findings:
+            if finding['status'] == 'ok' and not args.verbose:
+                continue
+            location = ' / '.join(part for part in (finding['section'], finding['question']) if part)
+            sys.stdout.buffer.write(
+                f"{icons[finding['status']]} {location} [{finding['check']}]: {finding['message']}\n".encode('utf-8'))
+        if args.verbose:
+            for section, chain in verifier.skipped:
+                sys.stdout.buffer.write(f"⏭️ {section} [arithmetic]: לא נבדק (משתנים): {chain}\n".encode('utf-8'))
+        sys.stdout.buffer.write(
+            f"\n📊 {counts['ok']} בדיקות עברו, {counts['error']} שגיאות, {counts['missing']} חסרים במפתח, "
+            f"{counts['skipped']} שרשראות עם משתנים לא נבדקו\n".encode('utf-8'))
+
+    sys.exit(1 if counts['error'] else 0)
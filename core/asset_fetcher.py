@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+טוען נכסים לא מקוון ל-WeasyPrint - פונטים, תמונות וגיליונות סגנון ממטמון מקומי בזיכרון
+Offline Asset Fetcher - WeasyPrint url_fetcher backed by an in-memory local asset cache
+"""
+
+import io
+import mimetypes
+from pathlib import Path
+from typing import Optional, Dict, List, Tuple, Union
+from urllib.parse import urlparse, unquote
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+class OfflineAssetFetcher:
+    """
+    url_fetcher ל-WeasyPrint שאינו ניגש לרשת
+
+    קבצים מקומיים נקראים מהדיסק פעם אחת ונשמרים בזיכרון לכל הרינדורים הבאים.
+    כתובות מרוחקות נחסמות, אלא אם מופו במפורש לקובץ מקומי ב-url_map.
+    נכסים שנוצרו בזיכרון (למשל גרף מ-GraphEngine.render_to_buffer) נרשמים
+    ב-register תחת כתובת memory: ומוגשים בלי לעבור דרך מערכת הקבצים.
+    """
+
+    MEMORY_SCHEME = 'memory:'
+
+    def __init__(self, roots: Optional[List[Path]] = None, url_map: Optional[Dict[str, Path]] = None):
+        """
+        אתחול הטוען
+
+        Args:
+            roots: תיקיות שמותר לקרוא מהן קבצים (ברירת מחדל: תיקיית הפרויקט)
+            url_map: מיפוי כתובות מרוחקות לקבצים מקומיים (למשל גיליון פונטים שהורד מראש)
+        """
+        self.roots = [Path(root).resolve() for root in (roots or [PROJECT_ROOT])]
+        self.url_map = {url: Path(path) for url, path in (url_map or {}).items()}
+        self._cache: Dict[Path, Tuple[bytes, str]] = {}
+        self._memory: Dict[str, Tuple[bytes, str]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.refused = 0
+
+    def stats(self) -> Dict[str, int]:
+        """מוני המטמון: hits - הוגשו מהזיכרון, misses - נקראו מהדיסק, refused - נחסמו"""
+        return {'hits': self.hits, 'misses': self.misses, 'refused': self.refused}
+
+    def register(self, name: str, data: Union[bytes, io.BytesIO], mime_type: Optional[str] = None) -> str:
+        """
+        רישום נכס בזיכרון
+
+        Args:
+            name: שם הנכס (למשל graph.png) - קובע גם את סוג ה-MIME אם לא צוין
+            data: תוכן הנכס, בתים או BytesIO
+            mime_type: סוג MIME (אופציונלי)
+
+        Returns:
+            הכתובת שבה הנכס מוגש (memory:<name>)
+        """
+        if isinstance(data, io.BytesIO):
+            data = data.getvalue()
+        mime_type = mime_type or mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        url = f"{self.MEMORY_SCHEME}{name}"
+        self._memory[url] = (bytes(data), mime_type)
+        return url
+
+    def get_memory(self, url: str) -> Optional[Tuple[bytes, str]]:
+        """תוכן וסוג MIME של נכס רשום בזיכרון, או None"""
+        return self._memory.get(url)
+
+    def __call__(self, url: str, *args, **kwargs) -> Dict:
+        """הגשת כתובת לפי הפרוטוקול של url_fetcher ב-WeasyPrint"""
+        if url in self._memory:
+            self.hits += 1
+            data, mime_type = self._memory[url]
+            return {'string': data, 'mime_type': mime_type, 'redirected_url': url}
+
+        if url.startswith('data:'):
+            # נתונים מוטמעים אינם דורשים גישה לשום מקום
+            from weasyprint import default_url_fetcher
+            return default_url_fetcher(url)
+
+        if url in self.url_map:
+            path = self.url_map[url].resolve()
+        else:
+            parsed = urlparse(url)
+            if parsed.scheme not in ('', 'file'):
+                self.refused += 1
+                raise ValueError(f"גישה לרשת חסומה ברינדור לא מקוון: {url}")
+            path = Path(unquote(parsed.path)).resolve()
+
+        data, mime_type = self._load(path, url)
+        return {
+            'string': data,
+            'mime_type': mime_type,
+            'redirected_url': path.as_uri(),
+            'filename': path.name,
+        }
+
+    def _load(self, path: Path, url: str) -> Tuple[bytes, str]:
+        """קריאת קובץ מקומי דרך המטמון בזיכרון"""
+        cached = self._cache.get(path)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        if not any(root == path or root in path.parents for root in self.roots):
+            self.refused += 1
+            raise ValueError(f"קובץ מחוץ לתיקיות המותרות: {url}")
+
+        self.misses += 1
+        mime_type = mimetypes.guess_type(path.name)[0] or 'application/octet-stream'
+        entry = (path.read_bytes(), mime_type)
+        self._cache[path] = entry
+        return entry
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+מטמון בנייה מבוסס תוכן - שמירת תוצרים לפי גיבוב של כל הקלטים שלהם
+Build Cache - content-addressed on-disk cache for build artifacts
+"""
+
+import os
+import shutil
+import hashlib
+import tempfile
+from pathlib import Path
+from typing import Optional, Union
+from core.asset_fetcher import PROJECT_ROOT
+
+
+class BuildCache:
+    """מטמון קבצים על הדיסק עם מפתח גיבוב ופינוי LRU לפי גודל"""
+
+    DEFAULT_CACHE_DIR = '.cache/pdf'
+    DEFAULT_MAX_BYTES = 500 * 1024 * 1024  # 500MB
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES,
+                 suffix: str = '.pdf'):
+        """
+        אתחול מטמון
+
+        Args:
+            cache_dir: תיקיית המטמון (ברירת מחדל: .cache/pdf בשורש הפרויקט, מכל תיקייה נוכחית)
+            max_bytes: גודל מקסימלי כולל - מעבר לו נמחקים התוצרים הישנים ביותר
+            suffix: סיומת קבצי התוצרים
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else PROJECT_ROOT / self.DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+
+    @staticmethod
+    def make_key(*parts: Union[str, bytes]) -> str:
+        """חישוב מפתח מטמון מרשימת חלקים (מחרוזות או בתים)"""
+        digest = hashlib.sha256()
+        for part in parts:
+            if isinstance(part, str):
+                part = part.encode('utf-8')
+            # אורך החלק נכנס לגיבוב כדי שחלוקה שונה של אותם בתים תיתן מפתח שונה
+            digest.update(len(part).to_bytes(8, 'big'))
+            digest.update(part)
+        return digest.hexdigest()
+
+    def _path_for(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}{self.suffix}"
+
+    def fetch(self, key: str, destination: Path) -> bool:
+        """
+        העתקת תוצר שמור ליעד
+
+        Returns:
+            True אם התוצר נמצא והועתק
+        """
+        cached = self._path_for(key)
+        if not cached.exists():
+            return False
+
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(cached, destination)
+        # עדכון זמן שימוש אחרון לצורך LRU
+        os.utime(cached)
+        return True
+
+    def store(self, key: str, source: Path):
+        """שמירת תוצר במטמון (כתיבה אטומית) ופינוי לפי הצורך"""
+        cached = self._path_for(key)
+        cached.parent.mkdir(parents=True, exist_ok=True)
+
+        fd, tmp_name = tempfile.mkstemp(dir=cached.parent, suffix='.tmp')
+        os.close(fd)
+        try:
+            shutil.copyfile(source, tmp_name)
+            os.replace(tmp_name, cached)
+        finally:
+            if os.path.exists(tmp_name):
+                os.remove(tmp_name)
+
+        self._evict()
+
+    def _evict(self):
+        """מחיקת התוצרים שנעשה בהם שימוש לפני הכי הרבה זמן עד לחזרה למגבלת הגודל"""
+        entries = []
+        total = 0
+        for path in self.cache_dir.glob(f'*/*{self.suffix}'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        for _, size, path in sorted(entries):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self):
+        """ריקון המטמון"""
+        if self.cache_dir.exists():
+            shutil.rmtree(self.cache_dir)
@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+צינור בנייה אחיד - כל דף עבודה מפוענח פעם אחת לתוצר ביניים שכל הפלטים נגזרים ממנו
+Build Pipeline - parse each worksheet once into a cached intermediate and rebuild only stale outputs
+
+תוצר הביניים של דף עבודה הוא מילון:
+    'source'        - נתיב קובץ ה-Markdown
+    'key'           - גיבוב המקור, גרסת Markdown וגרסת הצינור
+    'front_matter'  - שדות ה-front matter (מחרוזות)
+    'title'         - הכותרת הראשית (h1) של דף העבודה
+    'html'          - קטע ה-HTML, עם נתיבי תמונות יחסיים לשורש הפרויקט
+    'assets'        - הקבצים המקומיים שה-HTML מפנה אליהם
+
+הפלטים (דפי תצוגה, קובץ ה-A4 המאוחד, קבצי PDF) הם יעדים בגרף תלויות: לכל יעד
+חותמת - גיבוב של תוצרי הביניים שהוא נבנה מהם, של הנכסים שלהם ושל התבנית -
+ויעד נבנה מחדש רק אם החותמת שלו השתנתה או שקובץ הפלט חסר.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import tempfile
+import html as html_module
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional, List, Dict, Iterable, Callable
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from core.build_cache import BuildCache
+from core.graph_blocks import render_graph_blocks, expand_graph_blocks
+from core.catalog import split_front_matter
+from core.answer_key import AnswerKey
+
+try:
+    import markdown
+    MARKDOWN_AVAILABLE = True
+except ImportError:
+    MARKDOWN_AVAILABLE = False
+
+MARKDOWN_EXTENSIONS = ['fenced_code', 'tables', 'nl2br']
+
+
+class BuildPipeline:
+    """פענוח דפי עבודה לתוצרי ביניים שמורים ומעקב אחרי היעדים שנבנו מהם"""
+
+    DEFAULT_CACHE_DIR = '.cache/build'
+    # גרסת הצינור - יש להעלות בכל שינוי בעיבוד שאינו נלכד במפתח תוצר הביניים
+    PIPELINE_VERSION = '1'
+
+    def __init__(self, cache_dir: Optional[str] = None, use_cache: bool = True):
+        """
+        אתחול הצינור
+
+        Args:
+            cache_dir: תיקיית המטמון (ברירת מחדל: .cache/build)
+            use_cache: האם להשתמש בתוצרי ביניים שמורים ובחותמות היעדים
+        """
+        self.cache_dir = Path(cache_dir or self.DEFAULT_CACHE_DIR)
+        self.use_cache = use_cache
+        self.manifest_path = self.cache_dir / 'manifest.json'
+        self._manifest: Optional[Dict[str, str]] = None
+        # תוצרי ביניים שכבר נטענו בריצה הזו - כמה יעדים מאותו דף לא קוראים את המטמון שוב
+        self._loaded: Dict[str, Dict] = {}
+        self.parsed = 0
+        self.cache_hits = 0
+
+    # ---------- שלב 1: תוצרי ביניים ----------
+
+    def intermediate_key(self, content: str) -> str:
+        """מפתח תוצר הביניים: המקור, גרסת Markdown והרחבותיו וגרסת הצינור"""
+        return BuildCache.make_key(
+            self.PIPELINE_VERSION,
+            markdown.__version__ if MARKDOWN_AVAILABLE else 'no-markdown',
+            ','.join(MARKDOWN_EXTENSIONS),
+            content
+        )
+
+    def parse(self, path: Path) -> Dict:
+        """תוצר הביניים של דף עבודה אחד"""
+        return self.parse_many([path], jobs=1)[0]
+
+    def parse_many(self, paths: Iterable[Path], jobs: Optional[int] = None) -> List[Dict]:
+        """
+        תוצרי הביניים של קבוצת דפי עבודה - מהמטמון, ודפים שהשתנו מפוענחים במקביל
+
+        Args:
+            paths: קבצי Markdown
+            jobs: מספר תהליכים לפענוח (ברירת מחדל: מספר הליבות)
+
+        Returns:
+            תוצרי ביניים לפי סדר הקלט
+        """
+        paths = [Path(path) for path in paths]
+        results: List[Optional[Dict]] = [None] * len(paths)
+        tasks = []
+
+        for index, path in enumerate(paths):
+            content = path.read_text(encoding='utf-8')
+            key = self.intermediate_key(content)
+            cached = self._loaded.get(key)
+            if cached is None and self.use_cache:
+                cached = self._load_intermediate(key)
+            if cached is not None and all(Path(asset).is_file() for asset in cached['assets']):
+                cached = dict(cached, source=path.as_posix())
+                self._loaded[key] = cached
+                results[index] = cached
+                self.cache_hits += 1
+            else:
+                tasks.append((index, path.as_posix(), content, key))
+
+        if tasks:
+            jobs = min(jobs or os.cpu_count() or 1, len(tasks))
+            # גרפים מבלוקי graph של הדפים שמפוענחים - פעם אחת, במקביל ועם מטמון הגרפים
+            rendered = render_graph_blocks((content for _, _, content, _ in tasks), jobs=jobs)
+            parse_tasks = [(source, content, key, rendered) for _, source, content, key in tasks]
+
+            # תהליך יחיד - אין טעם לשלם על הקמת מאגר תהליכים
+            if jobs == 1:
+                parsed = [_parse_task(task) for task in parse_tasks]
+            else:
+                with ProcessPoolExecutor(max_workers=jobs) as executor:
+                    parsed = list(executor.map(_parse_task, parse_tasks, chunksize=1))
+
+            for (index, _, _, _), intermediate in zip(tasks, parsed):
+                results[index] = intermediate
+                self._loaded[intermediate['key']] = intermediate
+                if self.use_cache:
+                    self._store_intermediate(intermediate)
+            self.parsed += len(tasks)
+
+        return results
+
+    def _intermediate_path(self, key: str) -> Path:
+        return self.cache_dir / 'intermediate' / key[:2] / f"{key}.json"
+
+    def _load_intermediate(self, key: str) -> Optional[Dict]:
+        try:
+            return json.loads(self._intermediate_path(key).read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+
+    def _store_intermediate(self, intermediate: Dict):
+        """שמירת תוצר ביניים (כתיבה אטומית)"""
+        path = self._intermediate_path(intermediate['key'])
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _write_text_atomic(path, json.dumps(intermediate, ensure_ascii=False))
+
+    # ---------- שלב 2: יעדים ----------
+
+    @staticmethod
+    def asset_fingerprint(intermediates: Iterable[Dict]) -> str:
+        """טביעת הנכסים של תוצרי ביניים - גודל וזמן שינוי של כל קובץ"""
+        parts = []
+        for intermediate in intermediates:
+            for asset in intermediate['assets']:
+                try:
+                    stat = Path(asset).stat()
+                    parts.append(f"{asset}:{stat.st_size}:{stat.st_mtime_ns}")
+                except OSError:
+                    parts.append(f"{asset}:missing")
+        return '\n'.join(parts)
+
+    def stamp(self, target: str, intermediates: Iterable[Dict], *parts: str) -> str:
+        """
+        חותמת יעד: סוג היעד, מפתחות תוצרי הביניים, הנכסים שלהם ושאר הקלטים
+        (תבנית, CSS, כותרות...)
+        """
+        intermediates = list(intermediates)
+        return BuildCache.make_key(
+            self.PIPELINE_VERSION,
+            target,
+            *(intermediate['key'] for intermediate in intermediates),
+            self.asset_fingerprint(intermediates),
+            *parts
+        )
+
+    def is_fresh(self, output: Path, stamp: str) -> bool:
+        """האם היעד קיים ונבנה מאותם קלטים"""
+        if not self.use_cache or not Path(output).exists():
+            return False
+        return self._load_manifest().get(Path(output).as_posix()) == stamp
+
+    def mark_built(self, output: Path, stamp: str):
+        """רישום יעד שנבנה - נשמר בקובץ בסיום (save)"""
+        self._load_manifest()[Path(output).as_posix()] = stamp
+
+    def build_target(self, output: Path, stamp: str, build: Callable[[], None]) -> bool:
+        """
+        בניית יעד אם אינו עדכני
+
+        Returns:
+            True אם היעד נבנה, False אם היה עדכני
+        """
+        if self.is_fresh(output, stamp):
+            return False
+        build()
+        self.mark_built(output, stamp)
+        self.save()
+        return True
+
+    def build_pdfs(self, intermediates: List[Dict], output_dir: Optional[str] = None,
+                   jobs: Optional[int] = None, cache_dir: Optional[str] = None,
+                   key_file: Optional[str] = None) -> List[Dict]:
+        """
+        יעדי PDF - לכל דף עבודה שהשתנה, מקטע ה-HTML של תוצר הביניים, במאגר תהליכים
+
+        Args:
+            intermediates: תוצרי ביניים
+            output_dir: תיקיית פלט (ברירת מחדל: ליד כל קובץ מקור)
+            jobs: מספר תהליכים (ברירת מחדל: מספר הליבות)
+            cache_dir: תיקיית מטמון ה-PDF של PDFEngine
+            key_file: מפתח תשובות (SOLUTION_KEY.md) - לכל דף שיש לו פתרונות במפתח
+                      נבנה גם מפתח למורה (<שם הדף>_key.pdf) מאותו תוצר ביניים,
+                      באותה משימה ובאותו מנוע כמו דף התלמיד
+
+        Returns:
+            תוצאה לכל דף: 'input', 'output', 'key_output' (None בלי מפתח),
+            'error', 'seconds', 'skipped'
+        """
+        from core.pdf_engine import PDFEngine
+
+        answer_key = AnswerKey(key_file) if key_file else None
+        results = []
+        tasks = []
+        for intermediate in intermediates:
+            source = Path(intermediate['source'])
+            output = (Path(output_dir) / source.with_suffix('.pdf').name) if output_dir else source.with_suffix('.pdf')
+            title = intermediate['front_matter'].get('title')
+            task = (intermediate['html'], str(output), title)
+
+            key_output = None
+            if answer_key is not None:
+                key_html, _ = answer_key.teacher_body(str(source), intermediate['html'], markdown_to_html)
+                if 'class="teacher-answer"' in key_html:
+                    key_output = output.with_name(f"{output.stem}_key.pdf")
+                    task += (key_html, str(key_output), f"{title or intermediate['title']} - מפתח למורה")
+
+            stamp = self.stamp('pdf', [intermediate], PDFEngine.ENGINE_VERSION, *task[3:])
+            if self.is_fresh(output, stamp) and (key_output is None or key_output.exists()):
+                results.append({'input': source, 'output': output, 'key_output': key_output,
+                                'error': None, 'seconds': 0.0, 'skipped': True})
+            else:
+                results.append(None)
+                tasks.append((len(results) - 1, task, stamp))
+
+        if output_dir:
+            Path(output_dir).mkdir(parents=True, exist_ok=True)
+
+        if tasks:
+            jobs = min(jobs or os.cpu_count() or 1, len(tasks))
+            render_tasks = [task for _, task, _ in tasks]
+            if jobs == 1:
+                engine = PDFEngine(cache_dir=cache_dir, use_cache=self.use_cache)
+                rendered = [_pdf_batch_task(engine, task) for task in render_tasks]
+            else:
+                with ProcessPoolExecutor(max_workers=jobs, initializer=_init_pdf_worker,
+                                         initargs=(cache_dir, self.use_cache)) as executor:
+                    rendered = list(executor.map(_pdf_worker_task, render_tasks, chunksize=1))
+
+            for (index, _, stamp), result in zip(tasks, rendered):
+                result['input'] = Path(intermediates[index]['source'])
+                results[index] = result
+                if result['error'] is None:
+                    self.mark_built(result['output'], stamp)
+            self.save()
+
+        return results
+
+    def _load_manifest(self) -> Dict[str, str]:
+        if self._manifest is None:
+            try:
+                self._manifest = json.loads(self.manifest_path.read_text(encoding='utf-8'))
+            except (OSError, ValueError):
+                self._manifest = {}
+        return self._manifest
+
+    def save(self):
+        """שמירת חותמות היעדים (כתיבה אטומית)"""
+        if self._manifest is None or not self.use_cache:
+            return
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        _write_text_atomic(self.manifest_path, json.dumps(self._manifest, ensure_ascii=False, indent=1))
+
+
+def _write_text_atomic(path: Path, text: str):
+    """כתיבה אטומית דרך קובץ זמני ייחודי - כמה בניות עשויות לכתוב לאותו קובץ בו-זמנית"""
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    os.close(fd)
+    try:
+        Path(tmp_name).write_text(text, encoding='utf-8')
+        os.replace(tmp_name, path)
+    finally:
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
+
+
+def markdown_to_html(text: str) -> str:
+    """המרת Markdown לקטע HTML - כמו בתוצרי הביניים (הנוסחאות נשארות כ-$...$)"""
+    if MARKDOWN_AVAILABLE:
+        return markdown.markdown(text, extensions=MARKDOWN_EXTENSIONS)
+    return text.replace('\n', '<br>\n')
+
+
+def parse_worksheet(source: str, content: str, key: str,
+                    rendered_graphs: Optional[Dict[str, Path]] = None) -> Dict:
+    """פענוח דף עבודה לתוצר ביניים: front matter, HTML ורשימת נכסים"""
+    front_matter, body = split_front_matter(content)
+
+    # בלוקי graph - הפניה לתמונת הגרף
+    body = expand_graph_blocks(body, rendered_graphs)
+
+    html = markdown_to_html(body)
+
+    title_match = re.search(r'<h1[^>]*>(.*?)</h1>', html, re.DOTALL)
+    title = html_module.unescape(re.sub(r'<[^>]+>', '', title_match.group(1))).strip() if title_match else ''
+
+    assets = []
+    for src in re.findall(r'<img\b[^>]*?\bsrc="([^"]+)"', html):
+        src = html_module.unescape(src)
+        if not re.match(r'^[a-z][a-z0-9+.-]*:', src, re.IGNORECASE) and Path(src).is_file():
+            assets.append(src)
+
+    return {
+        'source': source,
+        'key': key,
+        'front_matter': front_matter,
+        'title': title or front_matter.get('title', Path(source).stem),
+        'html': html,
+        'assets': list(dict.fromkeys(assets)),
+    }
+
+
+def _parse_task(task) -> Dict:
+    """משימת פענוח (בתהליך עובד או בתהליך הראשי)"""
+    return parse_worksheet(*task)
+
+
+# מנוע PDF של תהליך עובד במאגר - נוצר פעם אחת לכל תהליך
+_batch_pdf_engine = None
+
+
+def _init_pdf_worker(cache_dir: Optional[str], use_cache: bool):
+    """אתחול תהליך עובד: יצירת מנוע PDF שישמש את כל המשימות של התהליך"""
+    global _batch_pdf_engine
+    from core.pdf_engine import PDFEngine
+    _batch_pdf_engine = PDFEngine(cache_dir=cache_dir, use_cache=use_cache)
+
+
+def _pdf_worker_task(task) -> Dict:
+    """רינדור PDF בתהליך עובד עם המנוע החם של התהליך"""
+    return _pdf_batch_task(_batch_pdf_engine, task)
+
+
+def _pdf_batch_task(engine, task) -> Dict:
+    """
+    רינדור PDF אחד מתוצר ביניים - שגיאות מוחזרות כתוצאה ולא נזרקות
+
+    משימה עם מפתח למורה (שלושה שדות נוספים) מרנדרת את שני הקבצים ברינדור משותף
+    אחד (generate_from_html_batch) - אותו גיליון סגנונות, פונטים ומטמון תמונות
+    """
+    html_body, output_file, title = task[:3]
+    start = time.perf_counter()
+    key_path = None
+    try:
+        if len(task) > 3:
+            output_path, key_path = engine.generate_from_html_batch([task[:3], task[3:]])
+        else:
+            output_path = engine.generate_from_html(html_body, output_file, title=title)
+        error = None
+    except Exception as e:
+        output_path = Path(output_file)
+        error = str(e)
+    return {
+        'output': output_path,
+        'key_output': key_path,
+        'error': error,
+        'seconds': time.perf_counter() - start,
+        'skipped': False,
+    }
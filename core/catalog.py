@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+קטלוג דפי עבודה - אינדקס מטא-נתונים מה-front matter של כל דפי העבודה והמטלות
+Worksheet Catalog - persistent front matter index of worksheets/** and assignments/**
+
+האינדקס נשמר ב-.cache/catalog/index.json. בכל רענון נבדקים רק גודל וזמן השינוי
+של כל קובץ; קובץ שהשתנו אצלו נקרא מחדש, ואם הגיבוב שלו לא השתנה (למשל checkout
+שנגע רק בזמן השינוי) הרשומה הקיימת נשמרת. בחירת דפים לפי כיתה ונושא נעשית
+מהאינדקס בלבד, בלי לפתוח את הקבצים.
+"""
+
+import os
+import re
+import sys
+import json
+import hashlib
+import tempfile
+from pathlib import Path
+from typing import Optional, List, Dict, Tuple, Iterable
+
+# אותיות הכיתות - 'כיתה ח' היא כיתה 8
+GRADE_LETTERS = {'ז': 7, 'ח': 8, 'ט': 9}
+
+
+def split_front_matter(content: str) -> Tuple[Dict[str, str], str]:
+    """הפרדת front matter (שורות 'מפתח: ערך' בין שני ---) מגוף דף העבודה"""
+    if not content.startswith('---'):
+        return {}, content
+
+    parts = content.split('---', 2)
+    if len(parts) < 3:
+        return {}, content
+
+    front_matter = {}
+    for line in parts[1].splitlines():
+        if ':' in line:
+            key, value = line.split(':', 1)
+            front_matter[key.strip()] = value.strip().strip('"\'')
+    return front_matter, parts[2].strip()
+
+
+def normalize_grade(value) -> Optional[int]:
+    """מספר הכיתה מערך כמו 8, '8', 'ח', 'כיתה ח' או 'grade-8'"""
+    if value is None:
+        return None
+    text = str(value).strip()
+    digits = re.search(r'\d+', text)
+    if digits:
+        return int(digits.group())
+    letters = re.sub(r'^כיתה\s*', '', text).strip('\'" ׳')
+    return GRADE_LETTERS.get(letters)
+
+
+class WorksheetCatalog:
+    """אינדקס מטא-נתונים של דפי העבודה, מתעדכן לפי זמן שינוי וגיבוב"""
+
+    ROOTS = ('worksheets', 'assignments')
+    DEFAULT_INDEX = '.cache/catalog/index.json'
+    # גרסת האינדקס - יש להעלות בכל שינוי במבנה הרשומות
+    INDEX_VERSION = '1'
+
+    def __init__(self, roots: Optional[Iterable[str]] = None, index_path: Optional[str] = None):
+        """
+        אתחול הקטלוג
+
+        Args:
+            roots: תיקיות לסריקה (ברירת מחדל: worksheets ו-assignments)
+            index_path: קובץ האינדקס (ברירת מחדל: .cache/catalog/index.json)
+        """
+        self.roots = [Path(root) for root in (roots or self.ROOTS)]
+        self.index_path = Path(index_path or self.DEFAULT_INDEX)
+        self._entries: Optional[Dict[str, Dict]] = None
+        self.read = 0
+
+    def refresh(self) -> List[Dict]:
+        """
+        סריקת התיקיות ועדכון האינדקס - רק קבצים שהשתנו נקראים
+
+        Returns:
+            כל הרשומות, ממוינות לפי כיתה, סדר ונתיב
+        """
+        indexed = self._load()
+        entries = {}
+        changed = False
+
+        for root in self.roots:
+            for path in self._scan(root):
+                key = path.as_posix()
+                stat = path.stat()
+                entry = indexed.get(key)
+                if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+                    entries[key] = entry
+                    continue
+
+                content = path.read_bytes()
+                digest = hashlib.sha256(content).hexdigest()
+                if entry is None or entry['sha256'] != digest:
+                    entry = self._make_entry(path, content.decode('utf-8'))
+                    entry['sha256'] = digest
+                    self.read += 1
+                entry['size'], entry['mtime_ns'] = stat.st_size, stat.st_mtime_ns
+                entries[key] = entry
+                changed = True
+
+        if changed or entries.keys() != indexed.keys():
+            self._entries = entries
+            self._save()
+        return self._sorted(entries.values())
+
+    def select(self, grade=None, topic: Optional[str] = None, subject: Optional[str] = None,
+               difficulty: Optional[str] = None) -> List[Dict]:
+        """
+        בחירת דפי עבודה מהאינדקס
+
+        Args:
+            grade: מספר כיתה או שם כיתה ('8', 'ח', 'כיתה ח')
+            topic: חלק מהנושא (topic) או מהכותרת
+            subject: מקצוע (subject), התאמה מדויקת
+            difficulty: רמת קושי (difficulty), התאמה מדויקת
+
+        Returns:
+            הרשומות המתאימות, ממוינות לפי כיתה, סדר ונתיב
+        """
+        wanted_grade = normalize_grade(grade)
+        if grade is not None and wanted_grade is None:
+            raise ValueError(f"כיתה לא מוכרת: {grade}")
+
+        selected = []
+        for entry in self.refresh():
+            if wanted_grade is not None and entry['grade'] != wanted_grade:
+                continue
+            if topic and topic not in entry['front_matter'].get('topic', '') and topic not in entry['title']:
+                continue
+            if subject and entry['front_matter'].get('subject') != subject:
+                continue
+            if difficulty and entry['front_matter'].get('difficulty') != difficulty:
+                continue
+            selected.append(entry)
+        return selected
+
+    @staticmethod
+    def _scan(root: Path) -> List[Path]:
+        """כל קבצי ה-Markdown בתיקייה (רקורסיבית), בלי קבצים ותיקיות נסתרים"""
+        found = []
+        for directory, subdirs, files in os.walk(root):
+            subdirs[:] = sorted(d for d in subdirs if not d.startswith('.'))
+            found.extend(Path(directory) / name for name in sorted(files)
+                         if name.endswith('.md') and not name.startswith('.'))
+        return found
+
+    @staticmethod
+    def _make_entry(path: Path, content: str) -> Dict:
+        """רשומת אינדקס: front matter, כותרת ראשית, כיתה וסדר"""
+        front_matter, body = split_front_matter(content)
+        title_match = re.search(r'^#\s+(.+?)\s*$', body, re.MULTILINE)
+        title = title_match.group(1) if title_match else front_matter.get('title', path.stem)
+
+        # כיתה מה-front matter, ואם אין - משם התיקייה (grade-8)
+        grade = normalize_grade(front_matter.get('grade'))
+        if grade is None:
+            folder = next((part for part in path.parts if part.startswith('grade-')), None)
+            grade = normalize_grade(folder)
+
+        try:
+            order = int(front_matter.get('order', ''))
+        except ValueError:
+            order = None
+
+        return {
+            'path': path.as_posix(),
+            'title': title,
+            'grade': grade,
+            'order': order,
+            'front_matter': front_matter,
+        }
+
+    @staticmethod
+    def _sorted(entries: Iterable[Dict]) -> List[Dict]:
+        """מיון: כיתה, סדר מה-front matter (דפים בלי סדר - בסוף), נתיב"""
+        return sorted(entries, key=lambda e: (e['grade'] or 0, e['order'] is None, e['order'] or 0, e['path']))
+
+    def _load(self) -> Dict[str, Dict]:
+        if self._entries is None:
+            try:
+                data = json.loads(self.index_path.read_text(encoding='utf-8'))
+                self._entries = data['entries'] if data.get('version') == self.INDEX_VERSION else {}
+            except (OSError, ValueError, KeyError):
+                self._entries = {}
+        return self._entries
+
+    def _save(self):
+        """שמירת האינדקס (כתיבה אטומית)"""
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=self.index_path.parent, suffix='.tmp')
+        os.close(fd)
+        try:
+            Path(tmp_name).write_text(json.dumps({'version': self.INDEX_VERSION, 'entries': self._entries},
+                                                 ensure_ascii=False), encoding='utf-8')
+            os.replace(tmp_name, self.index_path)
+        finally:
+            if os.path.exists(tmp_name):
+                os.remove(tmp_name)
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(
+        description='קטלוג דפי העבודה - רשימה לפי כיתה ונושא',
+        epilog='דוגמאות:\n'
+               '  python core/catalog.py\n'
+               '  python core/catalog.py --grade 8 --topic שיפוע --json',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--grade', default=None, help="כיתה: 8, ח או 'כיתה ח'")
+    parser.add_argument('--topic', default=None, help='חלק מהנושא או מהכותרת')
+    parser.add_argument('--json', action='store_true', help='פלט JSON')
+    args = parser.parse_args()
+
+    catalog = WorksheetCatalog()
+    try:
+        entries = catalog.select(grade=args.grade, topic=args.topic)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.json:
+        sys.stdout.buffer.write(json.dumps(entries, ensure_ascii=False, indent=2).encode('utf-8') + b'\n')
+    else:
+        for entry in entries:
+            topic = entry['front_matter'].get('topic', '')
+            sys.stdout.buffer.write(
+                f"{entry['grade'] or '?'}  {entry['path']}  {entry['title']}"
+                f"{f'  [{topic}]' if topic else ''}\n".encode('utf-8'))
+        sys.stdout.buffer.write(f"\n📚 {len(entries)} דפי עבודה\n".encode('utf-8'))
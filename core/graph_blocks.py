@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+בלוקי גרף בדפי עבודה - מפרט גרף הצהרתי בתוך ה-Markdown שנוצר בזמן הבנייה
+Graph Blocks - declarative graph specs embedded in worksheet Markdown, rendered at build time
+
+דוגמה:
+
+    ```graph
+    kind: motion
+    filename: jerusalem_motion_graph.png
+    alt: גרף תנועה
+    title: גרף תנועה
+    x_label: זמן (שעות)
+    y_label: מרחק (ק"מ)
+    points: [(0, 0), (1, 4), (2, 4)]
+    labels: ['A', 'B', 'C']
+    x_range: (0, 6)
+    y_range: (0, 12)
+    ```
+
+    ```
+    ![גרף תנועה](../../assets/graphs/jerusalem_motion_graph.png)
+
+כל שורה היא `מפתח: ערך`. ערך שהוא ליטרל של Python (מספר, רשימה, tuple,
+מחרוזת במירכאות) מפוענח ככזה; כל ערך אחר נשמר כמחרוזת, כך שטקסט עברי
+אינו דורש מירכאות. 'alt' הוא טקסט חלופי לתמונה; שאר המפתחות הם מפרט
+GraphEngine.render_spec, ובלוק שחסרים בו שדות חובה של סוג הגרף (לגרף תנועה:
+title, x_label, y_label, x_range, y_range, points, labels) נדחה כבר בפענוח.
+
+הגרפים נוצרים ב-.cache/graphs (לא במעקב git), כך שבנייה אינה משנה קבצים במאגר.
+שם הקובץ שם הוא filename עם גיבוב המפרט, כך שבלוקים שונים עם אותו filename
+בדפים שונים אינם דורסים זה את זה.
+שורת תמונה רגילה מיד אחרי הבלוק (אופציונלית) היא תמונה חלופית לתצוגת ה-Markdown
+הגולמי (למשל ב-GitHub); בבנייה היא מוחלפת יחד עם הבלוק בגרף שנוצר.
+"""
+
+import re
+import ast
+import json
+import hashlib
+from pathlib import Path
+from typing import Dict, List, Iterable, Optional
+
+GRAPH_BLOCK_RE = re.compile(r'^```graph[ \t]*\n(.*?)\n```[ \t]*(?:\n[ \t]*!\[[^\]\n]*\]\([^)\n]+\)[ \t]*)?$',
+                            re.MULTILINE | re.DOTALL)
+# תיקיית הגרפים של הבלוקים - מטמון בנייה, לא נכס במעקב
+GRAPH_BLOCK_OUTPUT_DIR = '.cache/graphs'
+
+
+def parse_graph_block(block: str) -> Dict:
+    """פענוח גוף של בלוק graph למפרט גרף"""
+    spec = {}
+    for line_number, line in enumerate(block.splitlines(), 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        if ':' not in line:
+            raise ValueError(f"שורה {line_number} בבלוק graph אינה בצורת 'מפתח: ערך': {line}")
+
+        key, value = (part.strip() for part in line.split(':', 1))
+        try:
+            spec[key] = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            spec[key] = value
+
+    if 'filename' not in spec:
+        raise ValueError("בלוק graph חייב לכלול filename")
+
+    from core.graph_engine import GraphEngine
+    kind = spec.get('kind', 'motion')
+    if kind not in GraphEngine.GRAPH_KINDS:
+        raise ValueError(f"בלוק graph {spec['filename']}: סוג גרף לא מוכר: {kind} "
+                         f"(מוכרים: {', '.join(GraphEngine.GRAPH_KINDS)})")
+    missing = GraphEngine.missing_params(kind, spec)
+    if missing:
+        raise ValueError(f"בלוק graph {spec['filename']} מסוג {kind} חסרים השדות: {', '.join(missing)}")
+    return spec
+
+
+def extract_graph_specs(markdown_content: str) -> List[Dict]:
+    """כל מפרטי הגרפים בדף עבודה, לפי סדר הופעתם"""
+    return [parse_graph_block(match.group(1)) for match in GRAPH_BLOCK_RE.finditer(markdown_content)]
+
+
+def _spec_key(spec: Dict) -> str:
+    """מפתח קנוני למפרט - בלוקים זהים בדפים שונים נוצרים פעם אחת"""
+    return json.dumps(spec, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def _output_filename(render_spec: Dict) -> str:
+    """
+    שם קובץ הגרף: filename מהבלוק עם גיבוב המפרט, למשל g-1a2b3c4d5e6f.png -
+    שני בלוקים עם אותו filename ונקודות שונות נכתבים לקבצים נפרדים
+    """
+    filename = Path(render_spec['filename'])
+    digest = hashlib.sha256(_spec_key(render_spec).encode('utf-8')).hexdigest()[:12]
+    return f"{filename.stem}-{digest}{filename.suffix}"
+
+
+def render_graph_blocks(markdown_contents: Iterable[str], engine=None,
+                        jobs: Optional[int] = None) -> Dict[str, Path]:
+    """
+    יצירת כל הגרפים שדפי העבודה שנבנים מפנים אליהם - במקביל ועם מטמון הגרפים
+
+    Args:
+        markdown_contents: תוכן דפי העבודה שנבנים
+        engine: GraphEngine (ברירת מחדל: חדש, עם התיקייה GRAPH_BLOCK_OUTPUT_DIR בשורש הפרויקט)
+        jobs: מספר תהליכים (ראו GraphEngine.render_batch)
+
+    Returns:
+        מיפוי ממפתח מפרט לנתיב הגרף - לשימוש ב-expand_graph_blocks
+    """
+    unique_specs = {}
+    for content in markdown_contents:
+        for spec in extract_graph_specs(content):
+            unique_specs.setdefault(_spec_key(spec), spec)
+
+    if not unique_specs:
+        return {}
+
+    if engine is None:
+        from core.graph_engine import GraphEngine
+        from core.asset_fetcher import PROJECT_ROOT
+        engine = GraphEngine(output_dir=str(PROJECT_ROOT / GRAPH_BLOCK_OUTPUT_DIR))
+
+    render_specs = []
+    for spec in unique_specs.values():
+        render_spec = {k: v for k, v in spec.items() if k != 'alt'}
+        render_specs.append({**render_spec, 'filename': _output_filename(render_spec)})
+    results = engine.render_batch(render_specs, jobs=jobs)
+
+    rendered = {}
+    failures = []
+    for key, spec, result in zip(unique_specs, unique_specs.values(), results):
+        if result['errors']:
+            failures.append(f"{spec['filename']}: {', '.join(result['errors'])}")
+        else:
+            rendered[key] = result['path']
+
+    if failures:
+        raise RuntimeError("יצירת גרפים נכשלה:\n" + '\n'.join(failures))
+    return rendered
+
+
+def expand_graph_blocks(markdown_content: str, rendered: Optional[Dict[str, Path]] = None,
+                        engine=None) -> str:
+    """
+    החלפת כל בלוק graph בהפניה לתמונת הגרף
+
+    Args:
+        markdown_content: תוכן דף העבודה
+        rendered: תוצאה של render_graph_blocks; אם חסר בה גרף, הוא נוצר עכשיו
+        engine: GraphEngine ליצירת גרפים חסרים (אופציונלי)
+    """
+    if '```graph' not in markdown_content:
+        return markdown_content
+
+    rendered = dict(rendered or {})
+    missing = [spec for spec in extract_graph_specs(markdown_content) if _spec_key(spec) not in rendered]
+    if missing:
+        rendered.update(render_graph_blocks([markdown_content], engine=engine, jobs=1))
+
+    cwd = Path.cwd().resolve()
+
+    def replace_block(match):
+        spec = parse_graph_block(match.group(1))
+        alt = spec.get('alt') or spec.get('title', '')
+        path = Path(rendered[_spec_key(spec)])
+        # הגרפים בשורש הפרויקט - נתיב יחסי לתיקייה הנוכחית כשאפשר, כמו כל תמונה בדפי ה-HTML
+        try:
+            path = path.resolve().relative_to(cwd)
+        except ValueError:
+            pass
+        return f"![{alt}]({path.as_posix()})"
+
+    return GRAPH_BLOCK_RE.sub(replace_block, markdown_content)
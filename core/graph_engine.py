@@ -5,12 +5,27 @@
 Graph Engine - High-quality graph generation for professional printing
 """
 
+import io
+import os
+import re
 import sys
+import json
+import time
+import hashlib
+import inspect
+import tempfile
+import xml.etree.ElementTree as ET
+import threading
 import numpy as np
-import matplotlib.pyplot as plt
+import matplotlib
+from matplotlib import font_manager
+from matplotlib.figure import Figure
+from matplotlib.font_manager import FontProperties
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from matplotlib.patches import Circle
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Tuple, Optional
+from typing import List, Tuple, Optional, Dict, Iterable, Union, BinaryIO
 from PIL import Image
 
 # Ensure UTF-8 encoding for stdout
@@ -31,29 +46,58 @@ class GraphEngine:
     MIN_LINEWIDTH = 4  # עובי קו מינימלי
     POINT_RADIUS = 0.25  # רדיוס נקודה מינימלי
 
-    def __init__(self, output_dir: str = "assets/graphs"):
+    # פורמטי פלט: png (רסטר ב-DPI), svg/pdf (וקטורי - קטן, חד בכל גודל הדפסה)
+    SUPPORTED_FORMATS = ('png', 'svg', 'pdf')
+    POINTS_PER_INCH = 72
+    MIN_VECTOR_FILE_SIZE = 1000  # בתים - קובץ וקטורי קטן מזה חשוד כריק
+
+    # מטמון גרפים - יש להעלות את הגרסה בכל שינוי בקוד הציור שאינו נלכד במפרט
+    GRAPH_CACHE_VERSION = '2'
+    CACHE_DIRNAME = '.graph_cache'
+
+    # סוגי גרפים שאפשר לבקש במפרט: 'kind' -> שם מתודת הציור
+    GRAPH_KINDS = {
+        'motion': '_draw_motion_graph',
+        'family': '_draw_function_family',
+    }
+
+    # משפחת פונקציות - צפיפות הדגימה של ציר x וצבעי הקווים
+    FAMILY_SAMPLES = 200
+    FAMILY_COLORS = ('#0066CC', '#CC3300', '#00884A', '#AA00AA', '#FF8800', '#8B4513')
+
+    def __init__(self, output_dir: str = "assets/graphs", use_cache: bool = True):
         """
         אתחול מנוע הגרפים
 
         Args:
             output_dir: תיקיית היעד לשמירת גרפים
+            use_cache: האם לדלג על גרפים שהמפרט שלהם לא השתנה מאז הרינדור הקודם
         """
         self.output_dir = Path(output_dir)
-        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.use_cache = use_cache
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._stats_lock = threading.Lock()
         self._setup_hebrew_font()
 
     def _setup_hebrew_font(self):
-        """הגדרת פונט עברי עם גיבויים"""
-        # הגדרת גודלי פונט גלובליים - גדולים מאוד
-        plt.rcParams['font.size'] = 16
-        plt.rcParams['axes.titlesize'] = 30
-        plt.rcParams['axes.labelsize'] = 28
-        plt.rcParams['xtick.labelsize'] = 24
-        plt.rcParams['ytick.labelsize'] = 24
-        plt.rcParams['legend.fontsize'] = 18
-        plt.rcParams['figure.titlesize'] = 30
-
-        # רשימת פונטים עבריים לפי עדיפות
+        """
+        הגדרת סגנון הטקסט של המופע - פונט עברי עם גיבויים וגודלי פונט
+
+        הסגנון נשמר במופע ומועבר במפורש לכל רכיב בגרף, בלי לשנות את
+        matplotlib.rcParams הגלובלי - כך מספר גרפים יכולים להיווצר במקביל
+        בתהליכונים שונים בלי שהגדרות של גרף אחד ידלפו לאחר.
+        """
+        # גודלי פונט - גדולים מאוד
+        self.font_sizes = {
+            'base': 16,
+            'title': 30,
+            'axis_label': self.MIN_AXIS_LABEL_FONTSIZE,
+            'tick': self.MIN_TICK_FONTSIZE,
+            'coordinates': 22,
+        }
+
+        # רשימת פונטים עבריים לפי עדיפות - הראשון שמותקן נבחר
         hebrew_fonts = [
             'Arial Unicode MS',
             'Tahoma',
@@ -62,21 +106,32 @@ class GraphEngine:
             'DejaVu Sans'
         ]
 
-        font_found = False
+        self.font_family = 'sans-serif'
         for font_name in hebrew_fonts:
             try:
-                plt.rcParams['font.family'] = font_name
-                font_found = True
-                break
-            except:
+                font_manager.findfont(FontProperties(family=font_name), fallback_to_default=False)
+            except ValueError:
                 continue
+            self.font_family = font_name
+            break
 
-        if not font_found:
-            plt.rcParams['font.family'] = 'sans-serif'
+    def _new_figure(self, figsize: Optional[Tuple[float, float]] = None):
+        """
+        יצירת Figure עם canvas של Agg - ללא pyplot וללא מצב גלובלי
+
+        Returns:
+            (fig, ax)
+        """
+        fig = Figure(figsize=figsize or (self.FIGSIZE_WIDTH, self.FIGSIZE_HEIGHT))
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot()
+        return fig, ax
 
-        # Disable LaTeX for general text to avoid font issues
-        plt.rcParams['text.usetex'] = False
-        plt.rcParams['svg.fonttype'] = 'none'  # Embed fonts as text
+    def _style_tick_labels(self, ax):
+        """החלת פונט וגודל הסגנון של המופע על תוויות הסרגלים"""
+        ax.tick_params(axis='both', labelsize=self.font_sizes['tick'])
+        for tick_label in ax.get_xticklabels() + ax.get_yticklabels():
+            tick_label.set_fontfamily(self.font_family)
 
     def create_motion_graph(
         self,
@@ -89,7 +144,8 @@ class GraphEngine:
         y_range: Tuple[float, float],
         x_ticks: Optional[List[float]] = None,
         y_ticks: Optional[List[float]] = None,
-        filename: str = "motion_graph.png"
+        filename: str = "motion_graph.png",
+        format: str = 'png'
     ) -> Path:
         """
         יצירת גרף תנועה מקצועי עם נקודות מסומנות
@@ -104,13 +160,33 @@ class GraphEngine:
             y_range: טווח ציר Y (min, max)
             x_ticks: סרגלי ציר X (אופציונלי)
             y_ticks: סרגלי ציר Y (אופציונלי)
-            filename: שם קובץ הגרף
+            filename: שם קובץ הגרף (הסיומת מותאמת לפורמט)
+            format: פורמט הפלט - 'png', 'svg' או 'pdf'
 
         Returns:
             Path לקובץ הגרף שנוצר
         """
+        return self._render_to_file('motion', {
+            'points': points, 'labels': labels, 'x_label': x_label, 'y_label': y_label,
+            'title': title, 'x_range': x_range, 'y_range': y_range,
+            'x_ticks': x_ticks, 'y_ticks': y_ticks
+        }, filename, format)
+
+    def _draw_motion_graph(
+        self,
+        points: List[Tuple[float, float]],
+        labels: List[str],
+        x_label: str,
+        y_label: str,
+        title: str,
+        x_range: Tuple[float, float],
+        y_range: Tuple[float, float],
+        x_ticks: Optional[List[float]] = None,
+        y_ticks: Optional[List[float]] = None
+    ) -> Figure:
+        """ציור גרף תנועה (ראו create_motion_graph) - מחזיר Figure שעדיין לא נשמר"""
         # יצירת figure גדול מאוד
-        fig, ax = plt.subplots(figsize=(self.FIGSIZE_WIDTH, self.FIGSIZE_HEIGHT))
+        fig, ax = self._new_figure()
 
         # חילוץ קואורדינטות
         times = [p[0] for p in points]
@@ -134,6 +210,7 @@ class GraphEngine:
 
             # תווית אות - גדולה מאוד ובולטת לחלוטין
             ax.text(t, d + 1.2, label, fontsize=self.MIN_LABEL_FONTSIZE,
+                   fontfamily=self.font_family,
                    fontweight='bold', ha='center', va='bottom', color='black',
                    zorder=4, bbox=dict(boxstyle='round,pad=0.3', facecolor='white',
                                       edgecolor='black', linewidth=2))
@@ -141,7 +218,8 @@ class GraphEngine:
             # זוג מסודר - גדול וברור
             y_offset = -0.8 if i % 2 == 0 else -1.1
             ax.text(t, d + y_offset, f'({int(t)},{int(d)})',
-                   fontsize=22, fontweight='bold', ha='center', va='top',
+                   fontsize=self.font_sizes['coordinates'], fontfamily=self.font_family,
+                   fontweight='bold', ha='center', va='top',
                    color='black', zorder=4,
                    bbox=dict(boxstyle='round,pad=0.2', facecolor='yellow',
                             alpha=0.7, edgecolor='black', linewidth=1))
@@ -151,22 +229,23 @@ class GraphEngine:
         ax.set_ylim(y_range[0] - 1, y_range[1] + 1)
 
         # תוויות צירים - גדולות וברורות
-        ax.set_xlabel(x_label, fontsize=self.MIN_AXIS_LABEL_FONTSIZE,
+        ax.set_xlabel(x_label, fontsize=self.MIN_AXIS_LABEL_FONTSIZE, fontfamily=self.font_family,
                      fontweight='bold', labelpad=15, color='#000000')
-        ax.set_ylabel(y_label, fontsize=self.MIN_AXIS_LABEL_FONTSIZE,
+        ax.set_ylabel(y_label, fontsize=self.MIN_AXIS_LABEL_FONTSIZE, fontfamily=self.font_family,
                      fontweight='bold', labelpad=20, color='#000000')
 
         # סרגלים - ברורים וגדולים
+        self._style_tick_labels(ax)
         if x_ticks:
             ax.set_xticks(x_ticks)
-            ax.set_xticklabels([str(int(t)) for t in x_ticks],
+            ax.set_xticklabels([str(int(t)) for t in x_ticks], fontfamily=self.font_family,
                               fontsize=self.MIN_TICK_FONTSIZE, fontweight='bold')
             ax.tick_params(axis='x', which='major', length=10, width=3,
                           labelsize=self.MIN_TICK_FONTSIZE)
 
         if y_ticks:
             ax.set_yticks(y_ticks)
-            ax.set_yticklabels([str(int(t)) for t in y_ticks],
+            ax.set_yticklabels([str(int(t)) for t in y_ticks], fontfamily=self.font_family,
                               fontsize=self.MIN_TICK_FONTSIZE, fontweight='bold')
             ax.tick_params(axis='y', which='major', length=10, width=3,
                           labelsize=self.MIN_TICK_FONTSIZE)
@@ -180,7 +259,8 @@ class GraphEngine:
         ax.axvline(x=0, color='black', linewidth=3)
 
         # כותרת - גדולה ובולטת
-        ax.set_title(title, fontsize=30, fontweight='bold', pad=25, color='#003366')
+        ax.set_title(title, fontsize=self.font_sizes['title'], fontfamily=self.font_family,
+                     fontweight='bold', pad=25, color='#003366')
 
         # הסרת קווי המסגרת העליונים והימניים
         ax.spines['top'].set_visible(False)
@@ -190,41 +270,464 @@ class GraphEngine:
         ax.spines['bottom'].set_color('black')
         ax.spines['bottom'].set_linewidth(3)
 
-        plt.tight_layout()
+        fig.tight_layout()
+        return fig
+
+    def create_function_family(
+        self,
+        functions: List[Tuple[float, ...]],
+        x_range: Tuple[float, float] = (-5, 5),
+        y_range: Optional[Tuple[float, float]] = None,
+        title: Optional[str] = None,
+        layout: str = 'grid',
+        columns: Optional[int] = None,
+        filename: str = "function_family.png",
+        format: str = 'png'
+    ) -> List[Path]:
+        """
+        יצירת גרפים של משפחת פונקציות פולינומיות (קוויות, ריבועיות) בבת אחת
+
+        כל הפונקציות מחושבות יחד על ציר x משותף, ו-figure אחד מוקם לכל המשפחה:
+        ב-'grid' כל פונקציה מצוירת בתת-גרף משלה בקובץ אחד (small multiples),
+        וב-'separate' אותו figure נשמר לקובץ לכל פונקציה, כשרק הקו והכותרת מתחלפים.
+
+        Args:
+            functions: מקדמי כל פונקציה מהחזקה הגבוהה לנמוכה - (m, b) ל-y = mx + b,
+                       (a, b, c) ל-y = ax² + bx + c; אפשר לערבב מעלות
+            x_range: טווח ציר X (min, max)
+            y_range: טווח ציר Y (ברירת מחדל: לפי ערכי כל המשפחה - משותף לכל הגרפים)
+            title: כותרת כללית (ב-'grid'); כותרת כל גרף היא הנוסחה שלו
+            layout: 'grid' - קובץ אחד עם תת-גרפים, 'separate' - קובץ לכל פונקציה
+            columns: מספר עמודות ב-'grid' (ברירת מחדל: לפי יחס הגובה-רוחב של הגרף)
+            filename: שם הקובץ; ב-'separate' אפשר {index} (ממוספר מ-1),
+                      ואחרת המספר מתווסף לסוף השם
+            format: פורמט הפלט - 'png', 'svg' או 'pdf'
+
+        Returns:
+            רשימת הקבצים שנוצרו - קובץ אחד ב-'grid', קובץ לכל פונקציה ב-'separate'
+        """
+        params = {'functions': functions, 'x_range': x_range, 'y_range': y_range}
+        if layout == 'grid':
+            return [self._render_to_file('family', {**params, 'title': title, 'columns': columns},
+                                         filename, format)]
+        if layout == 'separate':
+            return self._render_family_files(params, filename, format)
+        raise ValueError(f"פריסה לא מוכרת: {layout} (מוכרות: grid, separate)")
+
+    def _family_values(self, functions: List[Tuple[float, ...]], x_range: Tuple[float, float]):
+        """
+        חישוב כל הפונקציות במשפחה בפעולת NumPy אחת
 
-        # שמירה ברזולוציה גבוהה מאוד
-        filepath = self.output_dir / filename
-        fig.savefig(filepath, dpi=self.DPI, format='png', bbox_inches='tight',
-                   facecolor='white', edgecolor='none', pad_inches=0.2)
-        plt.close(fig)
+        Returns:
+            (x, Y) - ציר x משותף, ומטריצה שבה שורה לכל פונקציה
+        """
+        if not functions:
+            raise ValueError("משפחת פונקציות ריקה")
+
+        # מקדמים מרופדים באפסים משמאל - שורה לכל פונקציה, עמודה לכל חזקה
+        degree = max(len(coefficients) for coefficients in functions) - 1
+        coefficient_matrix = np.zeros((len(functions), degree + 1))
+        for row, coefficients in zip(coefficient_matrix, functions):
+            row[degree + 1 - len(coefficients):] = coefficients
+
+        x = np.linspace(x_range[0], x_range[1], self.FAMILY_SAMPLES)
+        powers = x[np.newaxis, :] ** np.arange(degree, -1, -1)[:, np.newaxis]
+        return x, coefficient_matrix @ powers
+
+    @staticmethod
+    def _family_y_range(values: np.ndarray, y_range: Optional[Tuple[float, float]]) -> Tuple[float, float]:
+        """טווח ציר Y משותף לכל המשפחה - כך שאפשר להשוות בין הגרפים"""
+        if y_range:
+            return y_range
+        low, high = float(values.min()), float(values.max())
+        margin = max(high - low, 1) * 0.05
+        return low - margin, high + margin
+
+    @staticmethod
+    def _format_function(coefficients: Tuple[float, ...]) -> str:
+        """נוסחת הפונקציה בכתיב mathtext, למשל $y = -2x + 3$"""
+        degree = len(coefficients) - 1
+        terms = []
+        for power, coefficient in zip(range(degree, -1, -1), coefficients):
+            if coefficient == 0:
+                continue
+            magnitude = f"{abs(coefficient):g}"
+            if magnitude == '1' and power > 0:
+                magnitude = ''
+            variable = '' if power == 0 else 'x' if power == 1 else f'x^{power}'
+            terms.append(('-' if coefficient < 0 else '+', magnitude + variable))
+
+        if not terms:
+            return '$y = 0$'
+        first_sign, first_term = terms[0]
+        text = ('-' if first_sign == '-' else '') + first_term
+        text += ''.join(f' {sign} {term}' for sign, term in terms[1:])
+        return f'$y = {text}$'
+
+    def _style_family_axes(self, ax, x_range: Tuple[float, float], y_range: Tuple[float, float],
+                           small: bool = False):
+        """צירים, רשת ומסגרת של גרף במשפחה - זהים לכל הגרפים במשפחה"""
+        ax.set_xlim(*x_range)
+        ax.set_ylim(*y_range)
+        ax.grid(True, alpha=0.4, linestyle='--', linewidth=1 if small else 1.5, color='gray')
+        ax.axhline(y=0, color='black', linewidth=1.5 if small else 3)
+        ax.axvline(x=0, color='black', linewidth=1.5 if small else 3)
+        ax.spines['top'].set_visible(False)
+        ax.spines['right'].set_visible(False)
+
+        if small:
+            ax.tick_params(axis='both', labelsize=self.font_sizes['base'])
+            for tick_label in ax.get_xticklabels() + ax.get_yticklabels():
+                tick_label.set_fontfamily(self.font_family)
+        else:
+            ax.set_xlabel('$x$', fontsize=self.MIN_AXIS_LABEL_FONTSIZE, fontfamily=self.font_family,
+                          fontweight='bold', labelpad=15, color='#000000')
+            ax.set_ylabel('$y$', fontsize=self.MIN_AXIS_LABEL_FONTSIZE, fontfamily=self.font_family,
+                          fontweight='bold', labelpad=20, color='#000000')
+            self._style_tick_labels(ax)
+            ax.spines['left'].set_linewidth(3)
+            ax.spines['bottom'].set_linewidth(3)
+
+    def _draw_function_family(
+        self,
+        functions: List[Tuple[float, ...]],
+        x_range: Tuple[float, float] = (-5, 5),
+        y_range: Optional[Tuple[float, float]] = None,
+        title: Optional[str] = None,
+        columns: Optional[int] = None
+    ) -> Figure:
+        """ציור משפחת פונקציות כתת-גרפים ב-figure אחד (ראו create_function_family)"""
+        x, values = self._family_values(functions, x_range)
+        y_range = self._family_y_range(values, y_range)
+
+        count = len(functions)
+        columns = columns or int(np.ceil(np.sqrt(count * self.FIGSIZE_WIDTH / self.FIGSIZE_HEIGHT)))
+        columns = min(columns, count)
+        rows = int(np.ceil(count / columns))
+
+        fig = Figure(figsize=(self.FIGSIZE_WIDTH, self.FIGSIZE_HEIGHT))
+        FigureCanvasAgg(fig)
+        axes = fig.subplots(rows, columns, sharex=True, sharey=True, squeeze=False).ravel()
+
+        for i, (ax, coefficients, y_values) in enumerate(zip(axes, functions, values)):
+            ax.plot(x, y_values, color=self.FAMILY_COLORS[i % len(self.FAMILY_COLORS)],
+                    linewidth=max(self.MIN_LINEWIDTH / 2, 4 - rows / 2), zorder=2)
+            self._style_family_axes(ax, x_range, y_range, small=True)
+            ax.set_title(self._format_function(coefficients), fontsize=self.font_sizes['base'],
+                         fontfamily=self.font_family, fontweight='bold', color='#000000')
+
+        # תאים ריקים בשורה האחרונה
+        for ax in axes[count:]:
+            ax.set_visible(False)
+
+        if title:
+            fig.suptitle(title, fontsize=self.font_sizes['title'], fontfamily=self.font_family,
+                         fontweight='bold', color='#003366')
+
+        fig.tight_layout()
+        return fig
+
+    def _render_family_files(self, params: Dict, filename: str, format: str) -> List[Path]:
+        """
+        שמירת כל פונקציה במשפחה לקובץ משלה מאותו figure - רק הקו והכותרת מתחלפים
+        בין הקבצים; קבצים שהמפרט שלהם לא השתנה אינם נוצרים מחדש
+        """
+        functions = params['functions']
+        x, values = self._family_values(functions, params['x_range'])
+        y_range = self._family_y_range(values, params['y_range'])
+
+        if '{index' not in filename:
+            stem, dot, suffix = filename.rpartition('.')
+            filename = f"{stem}_{{index:02d}}.{suffix}" if dot else f"{filename}_{{index:02d}}"
+
+        filepaths = []
+        pending = []
+        for index, coefficients in enumerate(functions, 1):
+            filepath = self._output_path(filename.format(index=index), format)
+            spec_hash = self._spec_hash('family', {
+                'function': coefficients, 'x_range': params['x_range'], 'y_range': y_range,
+                'format': format
+            })
+            filepaths.append(filepath)
+            if self._is_cached(filepath, spec_hash):
+                sys.stdout.buffer.write(f"♻️ גרף לא השתנה (מטמון): {filepath}\n".encode('utf-8'))
+            else:
+                pending.append((index - 1, filepath, spec_hash))
+
+        if not pending:
+            return filepaths
+
+        # figure אחד לכל הקבצים - הצירים, הרשת והסרגלים מצוירים פעם אחת
+        fig, ax = self._new_figure()
+        line, = ax.plot(x, values[0], color=self.FAMILY_COLORS[0], linewidth=self.MIN_LINEWIDTH, zorder=2)
+        self._style_family_axes(ax, params['x_range'], y_range)
+        title = ax.set_title('', fontsize=self.font_sizes['title'], fontfamily=self.font_family,
+                             fontweight='bold', pad=25, color='#003366')
+        fig.tight_layout()
+
+        for i, filepath, spec_hash in pending:
+            line.set_ydata(values[i])
+            title.set_text(self._format_function(functions[i]))
+            self._save_figure(fig, filepath, format)
+
+            errors = self._verify_graph(filepath)
+            if errors:
+                raise RuntimeError(f"Graph verification failed: {', '.join(errors)}")
+
+            self._record_cached(filepath, spec_hash)
+            sys.stdout.buffer.write(f"✅ גרף נוצר בהצלחה: {filepath}\n".encode('utf-8'))
+
+        return filepaths
+
+    def _save_figure(self, fig: Figure, target: Union[Path, BinaryIO], format: str):
+        """שמירה ברזולוציה גבוהה מאוד (או וקטורית) לקובץ או לחוצץ בזיכרון"""
+        fig.savefig(target, dpi=self.DPI, format=format, bbox_inches='tight',
+                    facecolor='white', edgecolor='none', pad_inches=0.2)
+
+    def _render_to_file(self, kind: str, params: Dict, filename: str, format: str) -> Path:
+        """ציור גרף, שמירתו לקובץ ובדיקתו - עם דילוג על גרף שהמפרט שלו לא השתנה"""
+        filepath = self._output_path(filename, format)
+
+        spec_hash = self._spec_hash(kind, {**params, 'format': format})
+        if self._is_cached(filepath, spec_hash):
+            sys.stdout.buffer.write(f"♻️ גרף לא השתנה (מטמון): {filepath}\n".encode('utf-8'))
+            return filepath
+
+        fig = getattr(self, self.GRAPH_KINDS[kind])(**params)
+        self._save_figure(fig, filepath, format)
 
         # בדיקת איכות מחמירה
         errors = self._verify_graph(filepath)
         if errors:
             raise RuntimeError(f"Graph verification failed: {', '.join(errors)}")
 
+        self._record_cached(filepath, spec_hash)
         sys.stdout.buffer.write(f"✅ גרף נוצר בהצלחה: {filepath}\n".encode('utf-8'))
         return filepath
 
-    def _verify_graph(self, graph_path: Path) -> List[str]:
+    def render_to_buffer(self, spec: Dict) -> io.BytesIO:
+        """
+        יצירת גרף ממפרט לחוצץ בזיכרון, ללא מגע בדיסק
+
+        Args:
+            spec: מפרט גרף (ראו render_spec); 'filename' מתעלמים ממנו
+
+        Returns:
+            BytesIO עם הגרף המקודד, ממוקם בתחילתו
+        """
+        params = dict(spec)
+        kind = self._pop_kind(params)
+        format = params.pop('format', 'png')
+        params.pop('filename', None)
+        if format not in self.SUPPORTED_FORMATS:
+            raise ValueError(f"פורמט גרף לא נתמך: {format} (נתמכים: {', '.join(self.SUPPORTED_FORMATS)})")
+        self._check_params(kind, params)
+
+        fig = getattr(self, self.GRAPH_KINDS[kind])(**params)
+        buffer = io.BytesIO()
+        self._save_figure(fig, buffer, format)
+
+        errors = self._verify_graph(buffer, format=format)
+        if errors:
+            raise RuntimeError(f"Graph verification failed: {', '.join(errors)}")
+
+        buffer.seek(0)
+        return buffer
+
+    def _pop_kind(self, params: Dict) -> str:
+        """שליפת סוג הגרף ממפרט ובדיקה שהוא מוכר"""
+        kind = params.pop('kind', 'motion')
+        if kind not in self.GRAPH_KINDS:
+            raise ValueError(f"סוג גרף לא מוכר: {kind} (מוכרים: {', '.join(self.GRAPH_KINDS)})")
+        return kind
+
+    @classmethod
+    def missing_params(cls, kind: str, params: Dict) -> List[str]:
+        """פרמטרי הציור של סוג הגרף שאין להם ברירת מחדל וחסרים במפרט"""
+        signature = inspect.signature(getattr(cls, cls.GRAPH_KINDS[kind]))
+        return [name for name, parameter in signature.parameters.items()
+                if name != 'self' and parameter.default is inspect.Parameter.empty and name not in params]
+
+    def _check_params(self, kind: str, params: Dict):
+        """שגיאה ברורה על מפרט חסר - במקום TypeError מתוך פונקציית הציור"""
+        missing = self.missing_params(kind, params)
+        if missing:
+            raise ValueError(f"במפרט גרף מסוג {kind} חסרים השדות: {', '.join(missing)}")
+
+    def render_spec(self, spec: Dict) -> Path:
+        """
+        יצירת גרף ממפרט - מילון עם 'kind' (ראו GRAPH_KINDS), 'filename', 'format'
+        ופרמטרי הציור של אותו סוג (למשל של create_motion_graph)
+
+        Returns:
+            Path לקובץ הגרף שנוצר
+        """
+        params = dict(spec)
+        kind = self._pop_kind(params)
+        filename = params.pop('filename', f"{kind}_graph.png")
+        format = params.pop('format', 'png')
+        self._check_params(kind, params)
+        return self._render_to_file(kind, params, filename, format)
+
+    def render_batch(self, specs: Iterable[Dict], jobs: Optional[int] = None) -> List[Dict]:
+        """
+        יצירת רשימת גרפים במקביל במאגר תהליכים
+
+        כל תהליך עובד טוען את matplotlib ואת הפונטים פעם אחת ויוצר GraphEngine
+        אחד לכל המפרטים שהוא מקבל. שגיאה בגרף אחד אינה עוצרת את השאר.
+
+        Args:
+            specs: מפרטי גרפים (ראו render_spec)
+            jobs: מספר תהליכים (ברירת מחדל: מספר הליבות)
+
+        Returns:
+            רשימת תוצאות לפי סדר הקלט, כל אחת מילון עם המפתחות
+            'path' (None בשגיאה), 'cached', 'seconds', 'errors' (ריקה אם הגרף תקין)
+        """
+        specs = list(specs)
+        if not specs:
+            return []
+
+        jobs = min(jobs or os.cpu_count() or 1, len(specs))
+        if jobs == 1:
+            return [_render_batch_spec(self, spec) for spec in specs]
+
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_graph_worker,
+                                 initargs=(str(self.output_dir), self.use_cache)) as executor:
+            return list(executor.map(_render_graph_worker_spec, specs, chunksize=1))
+
+    def _spec_hash(self, kind: str, spec: Dict) -> str:
+        """
+        גיבוב המפרט המלא של גרף: הפרמטרים, כל קבועי הסגנון של המחלקה,
+        הגדרות הפונט וגרסת matplotlib
+        """
+        constants = {name: getattr(self, name) for name in dir(type(self)) if name.isupper()}
+        full_spec = {
+            'kind': kind,
+            'spec': spec,
+            'constants': constants,
+            'font_family': self.font_family,
+            'font_sizes': self.font_sizes,
+            'matplotlib': matplotlib.__version__,
+        }
+        encoded = json.dumps(full_spec, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+    def _cache_entry_path(self, filepath: Path) -> Path:
+        return self.output_dir / self.CACHE_DIRNAME / f"{filepath.name}.json"
+
+    def _is_cached(self, filepath: Path, spec_hash: str) -> bool:
+        """האם הקובץ קיים ונוצר מאותו מפרט בדיוק"""
+        if not self.use_cache:
+            return False
+
+        try:
+            entry = json.loads(self._cache_entry_path(filepath).read_text(encoding='utf-8'))
+            hit = entry['spec'] == spec_hash and filepath.stat().st_size == entry['size']
+        except (OSError, ValueError, KeyError):
+            hit = False
+
+        with self._stats_lock:
+            if hit:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+        return hit
+
+    def _record_cached(self, filepath: Path, spec_hash: str):
+        """רישום המפרט שממנו נוצר הקובץ"""
+        entry_path = self._cache_entry_path(filepath)
+        entry_path.parent.mkdir(parents=True, exist_ok=True)
+        # שם זמני ייחודי גם בין תהליכים (מזהה התהליכון חוזר על עצמו בתהליכים שהתפצלו)
+        fd, tmp_name = tempfile.mkstemp(dir=entry_path.parent, suffix='.tmp')
+        os.close(fd)
+        try:
+            Path(tmp_name).write_text(json.dumps({'spec': spec_hash, 'size': filepath.stat().st_size}),
+                                      encoding='utf-8')
+            os.replace(tmp_name, entry_path)
+        finally:
+            if os.path.exists(tmp_name):
+                os.remove(tmp_name)
+
+    def cache_stats(self) -> Dict[str, int]:
+        """סטטיסטיקת מטמון: פגיעות ופספוסים במופע זה, ומספר הגרפים הרשומים במטמון"""
+        cache_dir = self.output_dir / self.CACHE_DIRNAME
+        entries = len(list(cache_dir.glob('*.json'))) if cache_dir.exists() else 0
+        return {'hits': self.cache_hits, 'misses': self.cache_misses, 'entries': entries}
+
+    def invalidate_cache(self, filename: Optional[str] = None) -> int:
+        """
+        ביטול רשומות מטמון כך שהגרפים ייווצרו מחדש בפעם הבאה
+
+        Args:
+            filename: שם קובץ גרף מסוים (ברירת מחדל: כל הגרפים)
+
+        Returns:
+            מספר הרשומות שבוטלו
+        """
+        cache_dir = self.output_dir / self.CACHE_DIRNAME
+        pattern = f"{filename}.json" if filename else '*.json'
+        removed = 0
+        for entry_path in cache_dir.glob(pattern):
+            entry_path.unlink()
+            removed += 1
+        return removed
+
+    def _output_path(self, filename: str, format: str) -> Path:
+        """נתיב קובץ הפלט - הסיומת נקבעת לפי הפורמט"""
+        if format not in self.SUPPORTED_FORMATS:
+            raise ValueError(f"פורמט גרף לא נתמך: {format} (נתמכים: {', '.join(self.SUPPORTED_FORMATS)})")
+        # שם קובץ בלבד - בלי תיקיות ('../../x'), כך שגרף אינו נכתב מחוץ ל-output_dir
+        if not filename or Path(filename).name != filename or filename in ('.', '..'):
+            raise ValueError(f"שם קובץ גרף לא חוקי: {filename} (נדרש שם קובץ בלי תיקיות)")
+        # התיקייה נוצרת רק כשכותבים לקובץ - render_to_buffer אינו נוגע בדיסק
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        return (self.output_dir / filename).with_suffix(f'.{format}')
+
+    def _verify_graph(self, graph: Union[Path, io.BytesIO], format: Optional[str] = None) -> List[str]:
         """
         בדיקת איכות מחמירה של הגרף
 
+        Args:
+            graph: נתיב לקובץ הגרף, או חוצץ בזיכרון (ראו render_to_buffer)
+            format: פורמט הגרף - נדרש לחוצץ; לקובץ נקבע לפי הסיומת
+
         Returns:
             רשימת שגיאות (ריקה אם הכל תקין)
         """
         errors = []
 
-        if not graph_path.exists():
-            errors.append(f"קובץ הגרף לא נמצא: {graph_path}")
-            return errors
+        if isinstance(graph, io.BytesIO):
+            graph_path = graph
+            graph.seek(0)
+            file_size = graph.getbuffer().nbytes
+            suffix = f".{format or 'png'}"
+        else:
+            graph_path = Path(graph)
+            if not graph_path.exists():
+                errors.append(f"קובץ הגרף לא נמצא: {graph_path}")
+                return errors
+            file_size = graph_path.stat().st_size
+            suffix = graph_path.suffix.lower()
 
         # בדיקת גודל קובץ
-        file_size = graph_path.stat().st_size
         if file_size == 0:
             errors.append(f"קובץ הגרף ריק: {graph_path}")
             return errors
 
+        if suffix in ('.svg', '.pdf'):
+            if file_size < self.MIN_VECTOR_FILE_SIZE:
+                errors.append(f"קובץ הגרף קטן מדי: {file_size} bytes")
+            try:
+                if suffix == '.svg':
+                    width, height = self._svg_size(graph_path)
+                else:
+                    width, height = self._pdf_size(graph_path)
+                errors.extend(self._check_vector_dimensions(width, height))
+            except Exception as e:
+                errors.append(f"שגיאה בעת בדיקת הגרף: {e}")
+            return errors
+
         if file_size < 10000:  # פחות מ-10KB זה חשוד
             errors.append(f"קובץ הגרף קטן מדי: {file_size} bytes")
 
@@ -257,19 +760,101 @@ class GraphEngine:
 
         return errors
 
+    def _check_vector_dimensions(self, width: float, height: float) -> List[str]:
+        """בדיקת מימדי גרף וקטורי (בנקודות) - גודל פיזי ויחס גובה-רוחב"""
+        errors = []
 
-def create_jerusalem_motion_graph() -> Path:
-    """
-    יצירת גרף תנועה ספציפי: מרחק מהבית בירושלים לאורך זמן
+        expected_min_width = self.FIGSIZE_WIDTH * self.POINTS_PER_INCH * 0.9
+        expected_min_height = self.FIGSIZE_HEIGHT * self.POINTS_PER_INCH * 0.9
 
-    Returns:
-        Path לקובץ הגרף שנוצר
-    """
-    engine = GraphEngine()
+        if width < expected_min_width:
+            errors.append(f"רוחב הגרף קטן מהצפוי: {width:.0f}pt < {expected_min_width:.0f}pt")
+
+        if height < expected_min_height:
+            errors.append(f"גובה הגרף קטן מהצפוי: {height:.0f}pt < {expected_min_height:.0f}pt")
+
+        expected_aspect = self.FIGSIZE_WIDTH / self.FIGSIZE_HEIGHT
+        actual_aspect = width / height
+        if abs(actual_aspect - expected_aspect) > 0.1:
+            errors.append(f"יחס גובה-רוחב חורג: {actual_aspect:.2f} != {expected_aspect:.2f}")
+
+        return errors
+
+    @staticmethod
+    def _svg_size(graph_path: Union[Path, io.BytesIO]) -> Tuple[float, float]:
+        """מימדי SVG בנקודות לפי ה-viewBox של אלמנט השורש"""
+        if isinstance(graph_path, io.BytesIO):
+            graph_path.seek(0)
+        _, root = next(ET.iterparse(graph_path, events=('start',)))
+        if not root.tag.endswith('svg'):
+            raise ValueError(f"אלמנט השורש אינו svg: {root.tag}")
+
+        view_box = root.get('viewBox')
+        if not view_box:
+            raise ValueError("ל-SVG אין viewBox")
+
+        _, _, width, height = (float(v) for v in re.split(r'[\s,]+', view_box.strip()))
+        if width <= 0 or height <= 0:
+            raise ValueError(f"viewBox לא תקין: {view_box}")
+        return width, height
+
+    @staticmethod
+    def _pdf_size(graph_path: Union[Path, io.BytesIO]) -> Tuple[float, float]:
+        """מימדי PDF בנקודות לפי ה-MediaBox של העמוד"""
+        data = graph_path.getvalue() if isinstance(graph_path, io.BytesIO) else graph_path.read_bytes()
+        if not data.startswith(b'%PDF'):
+            raise ValueError("הקובץ אינו PDF")
+
+        match = re.search(rb'/MediaBox\s*\[\s*([-\d.]+)\s+([-\d.]+)\s+([-\d.]+)\s+([-\d.]+)\s*\]', data)
+        if not match:
+            raise ValueError("לא נמצא MediaBox ב-PDF")
+
+        x0, y0, x1, y1 = (float(v) for v in match.groups())
+        return x1 - x0, y1 - y0
 
-    # הגדרת נקודות הגרף (זמן, מרחק)
-    # סיפור: יוצא מהבית, נוסע, עוצר, ממשיך, חוזר
-    points = [
+
+# מנוע הגרפים של תהליך עובד במאגר - נוצר פעם אחת לכל תהליך
+_batch_engine: Optional[GraphEngine] = None
+
+
+def _init_graph_worker(output_dir: str, use_cache: bool):
+    """אתחול תהליך עובד: יצירת מנוע גרפים שישמש את כל המפרטים של התהליך"""
+    global _batch_engine
+    _batch_engine = GraphEngine(output_dir, use_cache=use_cache)
+
+
+def _render_graph_worker_spec(spec: Dict) -> Dict:
+    """יצירת גרף בתהליך עובד עם המנוע החם של התהליך"""
+    return _render_batch_spec(_batch_engine, spec)
+
+
+def _render_batch_spec(engine: GraphEngine, spec: Dict) -> Dict:
+    """יצירת גרף אחד מתוך אצווה - שגיאות מוחזרות כתוצאה ולא נזרקות"""
+    start = time.perf_counter()
+    hits_before = engine.cache_hits
+    cached = False
+    try:
+        # render_spec בודק כל גרף חדש ונכשל אם הבדיקה נכשלה, וגרף מהמטמון נבדק כשנוצר
+        path = engine.render_spec(spec)
+        cached = engine.cache_hits > hits_before
+        errors = []
+    except Exception as e:
+        path = None
+        errors = [str(e)]
+
+    return {
+        'path': path,
+        'cached': cached,
+        'seconds': time.perf_counter() - start,
+        'errors': errors
+    }
+
+
+# גרף התנועה בירושלים - סיפור: יוצא מהבית, נוסע, עוצר, ממשיך, חוזר
+JERUSALEM_MOTION_GRAPH = {
+    'kind': 'motion',
+    # נקודות הגרף (זמן, מרחק)
+    'points': [
         (0, 0),   # A - התחלה בבית
         (1, 4),   # B - התרחק 4 ק"מ
         (2, 4),   # C - עצר (מרחק קבוע)
@@ -277,23 +862,68 @@ def create_jerusalem_motion_graph() -> Path:
         (4, 6),   # E - התקרב קצת ל-6 ק"מ
         (5, 6),   # F - עצר שוב
         (6, 0)    # G - חזר הביתה
-    ]
+    ],
+    'labels': ['A', 'B', 'C', 'D', 'E', 'F', 'G'],
+    'x_label': 'זמן (שעות)',
+    'y_label': 'מרחק מהבית בירושלים (ק"מ)',
+    'title': 'גרף תנועה: מרחק מהבית בירושלים לאורך זמן',
+    'x_range': (0, 6),
+    'y_range': (0, 12),
+    'x_ticks': list(range(0, 7)),
+    'y_ticks': list(range(0, 11, 2)),
+    'filename': 'jerusalem_motion_graph.png',
+}
+
+
+def create_jerusalem_motion_graph(format: str = 'png') -> Path:
+    """
+    יצירת גרף תנועה ספציפי: מרחק מהבית בירושלים לאורך זמן
 
-    labels = ['A', 'B', 'C', 'D', 'E', 'F', 'G']
+    Args:
+        format: פורמט הפלט - 'png', 'svg' או 'pdf'
 
-    return engine.create_motion_graph(
-        points=points,
-        labels=labels,
-        x_label='זמן (שעות)',
-        y_label='מרחק מהבית בירושלים (ק"מ)',
-        title='גרף תנועה: מרחק מהבית בירושלים לאורך זמן',
-        x_range=(0, 6),
-        y_range=(0, 12),
-        x_ticks=list(range(0, 7)),
-        y_ticks=list(range(0, 11, 2)),
-        filename='jerusalem_motion_graph.png'
-    )
+    Returns:
+        Path לקובץ הגרף שנוצר
+    """
+    engine = GraphEngine()
+    return engine.render_spec({**JERUSALEM_MOTION_GRAPH, 'format': format})
 
 
 if __name__ == '__main__':
-    create_jerusalem_motion_graph()
+    import argparse
+    parser = argparse.ArgumentParser(description='יצירת גרף התנועה בירושלים, או אצוות גרפים ממפרט JSON')
+    parser.add_argument('--format', choices=GraphEngine.SUPPORTED_FORMATS, default='png',
+                        help='פורמט הפלט (ברירת מחדל: png)')
+    parser.add_argument('--clear-cache', action='store_true',
+                        help='ביטול מטמון הגרפים - כל הגרפים ייווצרו מחדש')
+    parser.add_argument('--cache-stats', action='store_true',
+                        help='הצגת סטטיסטיקת מטמון הגרפים')
+    parser.add_argument('--batch', metavar='SPECS_JSON',
+                        help='קובץ JSON עם רשימת מפרטי גרפים ליצירה באצווה')
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+                        help='מספר תהליכים במקביל באצווה (ברירת מחדל: מספר הליבות)')
+    args = parser.parse_args()
+
+    if args.batch:
+        specs = json.loads(Path(args.batch).read_text(encoding='utf-8'))
+        results = GraphEngine().render_batch(specs, jobs=args.jobs)
+        failed = 0
+        for spec, result in zip(specs, results):
+            name = result['path'] or spec.get('filename', '?')
+            if result['errors']:
+                failed += 1
+                sys.stderr.buffer.write(f"❌ {name}: {', '.join(result['errors'])}\n".encode('utf-8'))
+            else:
+                status = 'מטמון' if result['cached'] else f"{result['seconds']:.2f}s"
+                sys.stdout.buffer.write(f"✅ {name} ({status})\n".encode('utf-8'))
+        sys.stdout.buffer.write(
+            f"\n📊 {len(results) - failed}/{len(results)} גרפים תקינים\n".encode('utf-8'))
+        sys.exit(1 if failed else 0)
+    elif args.clear_cache:
+        removed = GraphEngine().invalidate_cache()
+        sys.stdout.buffer.write(f"🗑️ בוטלו {removed} רשומות מטמון גרפים\n".encode('utf-8'))
+    elif args.cache_stats:
+        stats = GraphEngine().cache_stats()
+        sys.stdout.buffer.write(f"📊 גרפים במטמון: {stats['entries']}\n".encode('utf-8'))
+    else:
+        create_jerusalem_motion_graph(format=args.format)
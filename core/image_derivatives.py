@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+נגזרות תמונה - גרסאות מוקטנות ושמורות של גרפים להדפסה, לאתר ולתמונות ממוזערות
+Image Derivatives - cached print/web/thumbnail variants of graph images
+"""
+
+import os
+import re
+import hashlib
+import tempfile
+from pathlib import Path
+from typing import Optional, Dict, Tuple
+from PIL import Image
+from core.asset_fetcher import PROJECT_ROOT
+
+
+class ImageDerivatives:
+    """יצירת נגזרות של תמונות מקור ושמירתן לפי גיבוב המקור וגודל היעד"""
+
+    # רוחב יעד בפיקסלים לכל נגזרת
+    PRINT_DPI = 300
+    CONTENT_WIDTH_CM = 17.0  # רוחב התוכן בדף A4 עם שוליים של 2 ס"מ
+    VARIANTS = {
+        'print': round(CONTENT_WIDTH_CM / 2.54 * PRINT_DPI),  # 2008px - 300 DPI על 17 ס"מ
+        'web': 1280,  # כפול מרוחב התוכן בתצוגת מסך (~640px) למסכים צפופים
+        'thumb': 320,
+    }
+    RASTER_SUFFIXES = {'.png', '.jpg', '.jpeg'}
+    DERIVATIVES_VERSION = '1'
+    # נגזרות web ו-thumb הן חלק מהאתר, שמתפרסם מהמאגר כמו שהוא (netlify.toml, בלי שלב בנייה),
+    # ולכן נשמרות בתיקייה שבמעקב git; נגזרות print משמשות רק את בניית ה-PDF ונשמרות במטמון
+    DEFAULT_OUTPUT_DIR = 'assets/derived'
+    DEFAULT_PRINT_DIR = '.cache/derived'
+
+    def __init__(self, output_dir: Optional[str] = None, print_dir: Optional[str] = None):
+        """
+        אתחול
+
+        Args:
+            output_dir: תיקיית נגזרות האתר (ברירת מחדל: assets/derived בשורש הפרויקט)
+            print_dir: תיקיית נגזרות ההדפסה (ברירת מחדל: output_dir אם ניתנה, אחרת .cache/derived
+                       בשורש הפרויקט)
+        """
+        self.output_dir = Path(output_dir) if output_dir else PROJECT_ROOT / self.DEFAULT_OUTPUT_DIR
+        self.print_dir = Path(print_dir or output_dir) if (print_dir or output_dir) \
+            else PROJECT_ROOT / self.DEFAULT_PRINT_DIR
+        # גיבוב מקור לפי (נתיב, גודל, זמן שינוי) - כדי לא לקרוא שוב קובץ שלא השתנה
+        self._source_hashes: Dict[Tuple[str, int, int], str] = {}
+
+    def get(self, source: Path, variant: str) -> Path:
+        """
+        נתיב לנגזרת של תמונה - נוצרת רק אם אינה קיימת עדיין
+
+        Args:
+            source: תמונת המקור
+            variant: 'print', 'web' או 'thumb'
+
+        Returns:
+            נתיב הנגזרת, או המקור עצמו אם אינו תמונת רסטר או שהוא קטן מהיעד
+        """
+        target_width = self.VARIANTS[variant]
+        source = Path(source)
+        if source.suffix.lower() not in self.RASTER_SUFFIXES:
+            return source
+
+        source_hash = self._hash_source(source)
+        output_dir = self.print_dir if variant == 'print' else self.output_dir
+        derived = output_dir / f"{source.stem}-{variant}-{source_hash[:12]}{source.suffix.lower()}"
+        if derived.exists():
+            return derived
+
+        with Image.open(source) as img:
+            if img.width <= target_width:
+                return source
+
+            ratio = target_width / img.width
+            resized = img.resize((target_width, round(img.height * ratio)), Image.Resampling.LANCZOS)
+
+        # קובץ זמני ייחודי - כמה תהליכים עשויים ליצור את אותה נגזרת בו-זמנית
+        output_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=output_dir, suffix='.tmp')
+        os.close(fd)
+        try:
+            resized.save(tmp_name, format=Image.registered_extensions()[derived.suffix],
+                         optimize=True, dpi=(self.PRINT_DPI, self.PRINT_DPI))
+            os.replace(tmp_name, derived)
+        finally:
+            if os.path.exists(tmp_name):
+                os.remove(tmp_name)
+        return derived
+
+    def _hash_source(self, source: Path) -> str:
+        """גיבוב תוכן המקור יחד עם גרסת הנגזרות"""
+        stat = source.stat()
+        memo_key = (str(source.resolve()), stat.st_size, stat.st_mtime_ns)
+        cached = self._source_hashes.get(memo_key)
+        if cached is None:
+            digest = hashlib.sha256(self.DERIVATIVES_VERSION.encode('utf-8'))
+            digest.update(source.read_bytes())
+            cached = digest.hexdigest()
+            self._source_hashes[memo_key] = cached
+        return cached
+
+    def rewrite_img_sources(self, html: str, variant: str, prefix: str = '',
+                            root: Optional[Path] = None) -> str:
+        """
+        החלפת מקורות <img> מקומיים בנגזרת המתאימה והוספת קידומת נתיב
+
+        Args:
+            html: HTML עם תגיות <img ... src="...">
+            variant: הנגזרת הרצויה
+            prefix: קידומת לנתיבים יחסיים (למשל '../' עבור דפים בתת-תיקייה)
+            root: התיקייה שהנתיבים ב-HTML יחסיים אליה (ברירת מחדל: התיקייה הנוכחית)
+        """
+        root = Path(root) if root else Path('.')
+
+        def replace_src(match):
+            src = match.group(2)
+            if re.match(r'^[a-z][a-z0-9+.-]*:', src, re.IGNORECASE) or src.startswith('/'):
+                return match.group(0)
+
+            source = root / src
+            if source.is_file():
+                derived = self.get(source, variant)
+                # תיקיית הנגזרות מוחלטת (בשורש הפרויקט) - הנתיב ב-HTML נשאר יחסי ל-root
+                try:
+                    src = derived.resolve().relative_to(root.resolve()).as_posix()
+                except ValueError:
+                    src = derived.as_posix()
+            return f'{match.group(1)}{prefix}{src}"'
+
+        return re.sub(r'(<img\b[^>]*?\bsrc=")([^"]+)"', replace_src, html)
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+רינדור נוסחאות בצד השרת - המרת LaTeX ל-SVG עם matplotlib mathtext ומטמון קבוע
+Math Renderer - server-side TeX to SVG pre-rendering with a persistent memo cache
+"""
+
+import io
+import os
+import json
+import html
+import base64
+import hashlib
+import tempfile
+from pathlib import Path
+from typing import Optional, Dict
+from core.asset_fetcher import PROJECT_ROOT
+
+try:
+    import matplotlib
+    from matplotlib.figure import Figure
+    from matplotlib.font_manager import FontProperties
+    from matplotlib.mathtext import MathTextParser
+    from matplotlib.backends.backend_svg import FigureCanvasSVG
+    MATHTEXT_AVAILABLE = True
+except ImportError:
+    MATHTEXT_AVAILABLE = False
+
+
+class MathRenderer:
+    """המרת ביטויי TeX ל-SVG מוטמע, עם מטמון בזיכרון ועל הדיסק לפי מחרוזת ה-TeX"""
+
+    DEFAULT_CACHE_DIR = '.cache/math'
+    FONT_SIZE_PT = 12  # תואם ל-font-size של גוף הדף ב-PDF
+    DISPLAY_SCALE = 1.1  # תואם ל-.math-display
+    RENDERER_VERSION = '1'
+
+    # הגדרות matplotlib שקובעות את פלט ה-SVG - מלח קבוע כדי שהפלט יהיה דטרמיניסטי
+    RC_PARAMS = {
+        'mathtext.fontset': 'cm',
+        'svg.fonttype': 'path',
+        'svg.hashsalt': 'homerh-math',
+    }
+
+    def __init__(self, cache_dir: Optional[str] = None, persistent: bool = True):
+        """
+        אתחול מרנדר נוסחאות
+
+        Args:
+            cache_dir: תיקיית המטמון הקבוע (ברירת מחדל: .cache/math בשורש הפרויקט)
+            persistent: האם לשמור נוסחאות מרונדרות גם על הדיסק
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else PROJECT_ROOT / self.DEFAULT_CACHE_DIR
+        self.persistent = persistent
+        self._memo: Dict[str, Optional[str]] = {}
+        self._parser = MathTextParser('path') if MATHTEXT_AVAILABLE else None
+
+    @classmethod
+    def signature(cls) -> str:
+        """מזהה גרסת הפלט - משמש כחלק ממפתחות מטמון חיצוניים"""
+        mpl_version = matplotlib.__version__ if MATHTEXT_AVAILABLE else 'none'
+        return f"mathtext {cls.RENDERER_VERSION} matplotlib {mpl_version}"
+
+    def render(self, tex: str, display: bool = False) -> Optional[str]:
+        """
+        המרת ביטוי TeX לתגית HTML עם SVG מוטמע
+
+        Args:
+            tex: ביטוי TeX ללא תוחמי $
+            display: נוסחת תצוגה (בלוק) או נוסחה בתוך שורה
+
+        Returns:
+            תגית <img> עם SVG, או None אם mathtext לא תומך בביטוי
+        """
+        if not MATHTEXT_AVAILABLE:
+            return None
+
+        key = hashlib.sha256(f"{self.signature()}\0{display}\0{tex}".encode('utf-8')).hexdigest()
+        if key in self._memo:
+            return self._memo[key]
+
+        tag = self._load(key)
+        if tag is None:
+            tag = self._render_tag(tex, display)
+            if tag is not None:
+                self._save(key, tag)
+
+        self._memo[key] = tag
+        return tag
+
+    def _render_tag(self, tex: str, display: bool) -> Optional[str]:
+        """רינדור בפועל של ביטוי ל-SVG ובניית תגית ה-HTML"""
+        fontsize = self.FONT_SIZE_PT * (self.DISPLAY_SCALE if display else 1)
+        prop = FontProperties(size=fontsize)
+        expression = f"${tex}$"
+
+        try:
+            with matplotlib.rc_context(self.RC_PARAMS):
+                width, height, depth, _, _ = self._parser.parse(expression, dpi=72, prop=prop)
+                if width <= 0 or height <= 0:
+                    return None
+
+                fig = Figure(figsize=(width / 72.0, height / 72.0))
+                fig.text(0, depth / height, expression, fontproperties=prop)
+                buffer = io.BytesIO()
+                FigureCanvasSVG(fig).print_svg(buffer, metadata={'Date': None})
+        except ValueError:
+            # ביטוי שאינו נתמך ב-mathtext - יישאר ל-MathJax
+            return None
+
+        svg_base64 = base64.b64encode(buffer.getvalue()).decode('ascii')
+        css_class = 'math-svg math-svg-display' if display else 'math-svg'
+        return (
+            f'<img class="{css_class}" alt="{html.escape(tex)}" '
+            f'src="data:image/svg+xml;base64,{svg_base64}" '
+            f'style="width: {width:.2f}pt; height: {height:.2f}pt; vertical-align: -{depth:.2f}pt;">'
+        )
+
+    def _cache_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def _load(self, key: str) -> Optional[str]:
+        """טעינת נוסחה מרונדרת מהמטמון הקבוע"""
+        if not self.persistent:
+            return None
+        path = self._cache_path(key)
+        try:
+            return json.loads(path.read_text(encoding='utf-8'))['tag']
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _save(self, key: str, tag: str):
+        """שמירת נוסחה מרונדרת במטמון הקבוע"""
+        if not self.persistent:
+            return
+        # קובץ זמני ייחודי - תהליכים עובדים עשויים לשמור את אותה נוסחה בו-זמנית.
+        # כישלון בכתיבה למטמון אינו עוצר את הרינדור: הנוסחה כבר בזיכרון
+        path = self._cache_path(key)
+        tmp_name = None
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as tmp_file:
+                tmp_file.write(json.dumps({'tag': tag}))
+            os.replace(tmp_name, path)
+        except OSError:
+            pass
+        finally:
+            if tmp_name and os.path.exists(tmp_name):
+                os.remove(tmp_name)
@@ -5,12 +5,27 @@
 PDF Engine - Professional PDF generation for A4 printing with full Hebrew and RTL support
 """
 
+import io
+import os
 import sys
 import re
+import time
+import html as html_module
 import base64
+import mimetypes
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Optional, List
-from PIL import Image
+from typing import Optional, List, Dict, Iterable, Tuple, Union
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from core.build_cache import BuildCache
+from core.math_renderer import MathRenderer
+from core.asset_fetcher import OfflineAssetFetcher
+from core.image_derivatives import ImageDerivatives
+from core.graph_blocks import render_graph_blocks, expand_graph_blocks
+from core.catalog import split_front_matter
+from core.personalized import PersonalizedWorksheet
+from core.answer_key import AnswerKey
 
 # Ensure UTF-8 encoding
 if sys.stdout.encoding != 'utf-8':
@@ -53,8 +68,49 @@ class PDFEngine:
     MARGIN_SIDE_CM = 2.0  # 20mm
     CONTENT_WIDTH_CM = A4_WIDTH_CM - (2 * MARGIN_SIDE_CM)  # 17cm
 
-    def __init__(self):
-        """אתחול מנוע PDF"""
+    # גרסת צינור העיבוד - יש להעלות בכל שינוי שמשפיע על ה-PDF ואינו נלכד במפתח המטמון
+    ENGINE_VERSION = '4'
+
+    # חוברת: כל דף עבודה מתחיל בעמוד חדש, סימניה לכל דף (h1) ולכל חלק (h2), ומספרי עמודים
+    BOOKLET_CSS = """
+            .booklet-sheet {
+                break-before: page;
+            }
+
+            .booklet-sheet:first-child {
+                break-before: auto;
+            }
+
+            h1 { bookmark-level: 1; }
+            h2 { bookmark-level: 2; }
+            h3, h4, h5, h6 { bookmark-level: none; }
+
+            @page {
+                @bottom-center {
+                    content: counter(page) " / " counter(pages);
+                    font-size: 9pt;
+                    color: #555;
+                }
+            }
+        """
+
+    def __init__(self, cache_dir: Optional[str] = None, use_cache: bool = True):
+        """
+        אתחול מנוע PDF
+
+        Args:
+            cache_dir: תיקיית מטמון הבנייה (ברירת מחדל: .cache/pdf)
+            use_cache: האם להשתמש במטמון הבנייה
+        """
+        self.cache_dir = cache_dir
+        self.use_cache = use_cache
+        self.cache = BuildCache(cache_dir) if use_cache else None
+        self.math_renderer = MathRenderer(persistent=use_cache)
+        # טוען נכסים לא מקוון - המטמון שלו נשמר בין רינדורים של אותו מנוע
+        self.fetcher = OfflineAssetFetcher()
+        self.derivatives = ImageDerivatives()
+        # גרפים מבלוקי graph שכבר נוצרו (ראו core/graph_blocks.py)
+        self.rendered_graphs: Dict[str, Path] = {}
         self.hebrew_fonts = [
             'David Libre',
             'Frank Ruhl Libre',
@@ -64,6 +120,8 @@ class PDFEngine:
             'Noto Sans Hebrew',
             'Arial Hebrew'
         ]
+        # תצורת פונטים של WeasyPrint - נטענת פעם אחת ומשמשת את כל הרינדורים
+        self._font_config = None
 
     def generate(self, markdown_file: str, output_file: Optional[str] = None) -> Path:
         """
@@ -88,29 +146,396 @@ class PDFEngine:
         # קריאת תוכן Markdown
         content = input_path.read_text(encoding='utf-8')
 
+        return self._generate_content(content, input_path.parent, output_path)
+
+    def generate_from_string(
+        self,
+        markdown_content: str,
+        output_file: str,
+        base_dir: str = '.',
+        images: Optional[Dict[str, Union[bytes, io.BytesIO]]] = None
+    ) -> Path:
+        """
+        יצירת PDF מתוכן Markdown בזיכרון, עם תמונות בזיכרון - ללא קבצי ביניים
+
+        Args:
+            markdown_content: תוכן Markdown
+            output_file: נתיב לקובץ PDF פלט
+            base_dir: תיקייה לפתרון נתיבים יחסיים של נכסים אחרים
+            images: תמונות בזיכרון לפי שם, למשל {'graph.png': engine.render_to_buffer(spec)};
+                    דף העבודה מפנה אליהן בשמן: ![גרף](graph.png)
+
+        Returns:
+            Path לקובץ PDF שנוצר
+        """
+        return self._generate_content(markdown_content, Path(base_dir), Path(output_file), images)
+
+    def _generate_content(self, content: str, base_dir: Path, output_path: Path,
+                          images: Optional[Dict[str, Union[bytes, io.BytesIO]]] = None) -> Path:
+        """יצירת PDF מתוכן Markdown - משותף ל-generate ול-generate_from_string"""
+        images = {name: (data.getvalue() if isinstance(data, io.BytesIO) else data)
+                  for name, data in (images or {}).items()}
+
+        # בלוקי graph - יצירת הגרפים (עם מטמון הגרפים) והחלפתם בהפניות לתמונות,
+        # כך שהתמונות שנוצרו נכנסות למפתח המטמון כמו כל תמונה אחרת
+        content = expand_graph_blocks(content, self.rendered_graphs)
+
+        # מטמון בנייה - אם אף קלט לא השתנה, מעתיקים את ה-PDF השמור
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self._cache_key(content, base_dir, images)
+            if cache_key and self.cache.fetch(cache_key, output_path):
+                return output_path
+
         # עיבוד Markdown ל-HTML
-        html = self._markdown_to_html(content, input_path.parent)
+        html = self._markdown_to_html(content, base_dir, images)
+
+        return self._render(html, content, 'md', base_dir, output_path, cache_key)
+
+    def generate_from_html(self, html_body: str, output_file: str, base_dir: str = '.',
+                           title: Optional[str] = None) -> Path:
+        """
+        יצירת PDF מקטע HTML שכבר הומר מ-Markdown (למשל תוצר הביניים של BuildPipeline)
+
+        Args:
+            html_body: גוף ה-HTML של דף העבודה, עם נתיבי תמונות יחסיים ל-base_dir
+            output_file: נתיב לקובץ PDF פלט
+            base_dir: התיקייה שנתיבי התמונות יחסיים אליה
+            title: כותרת מסמך ה-PDF (למשל title מה-front matter)
+
+        Returns:
+            Path לקובץ PDF שנוצר
+        """
+        base_dir = Path(base_dir)
+        output_path = Path(output_file)
+
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self._cache_key(f"{title or ''}\0{html_body}", base_dir, source_format='html')
+            if cache_key and self.cache.fetch(cache_key, output_path):
+                return output_path
+
+        # נגזרת ברזולוציית הדפסה במקום המקור ב-400 DPI
+        body = self.derivatives.rewrite_img_sources(html_body, 'print', root=base_dir)
+        html = self._wrap_with_html(self._process_latex_math(body), title)
+
+        return self._render(html, html_body, 'html', base_dir, output_path, cache_key)
+
+    def generate_booklet(self, markdown_files: Iterable[str], output_file: str,
+                         title: Optional[str] = None) -> Path:
+        """
+        חוברת PDF אחת מכמה דפי עבודה - להדפסה של יחידה שלמה
+
+        כל הדפים מרונדרים כמסמך אחד, כך שכל פונט נכלל פעם אחת (תת-קבוצה משותפת)
+        וכל תמונה - גרף או נוסחה שחוזרים בכמה דפים - נשמרת פעם אחת. כל דף עבודה
+        מתחיל בעמוד חדש ומקבל סימניה (מה-h1 שלו, עם החלקים שלו מתחתיה), והעמודים
+        ממוספרים ברצף לאורך כל החוברת.
+
+        Args:
+            markdown_files: דפי העבודה, לפי סדר החוברת
+            output_file: נתיב לקובץ PDF פלט
+            title: כותרת מסמך ה-PDF (ברירת מחדל: הכותרת של הדף הראשון)
+
+        Returns:
+            Path לקובץ PDF שנוצר
+        """
+        paths = [Path(markdown_file) for markdown_file in markdown_files]
+        if not paths:
+            raise ValueError("אין דפי עבודה לחוברת")
+        missing = [str(path) for path in paths if not path.exists()]
+        if missing:
+            raise FileNotFoundError(f"קובץ לא נמצא: {', '.join(missing)}")
+
+        contents = [path.read_text(encoding='utf-8') for path in paths]
+        self.rendered_graphs.update(render_graph_blocks(contents))
+
+        sections = []
+        for number, (path, content) in enumerate(zip(paths, contents), 1):
+            # נתיבי התמונות בגוף הופכים למוחלטים, כך שכל דף שומר על תיקיית המקור שלו
+            body, front_matter = self._markdown_to_body(expand_graph_blocks(content, self.rendered_graphs),
+                                                        path.parent)
+            title = title or front_matter.get('title')
+            sections.append(f'<section class="booklet-sheet" id="sheet-{number}">\n{body}\n</section>')
+        body = '\n'.join(sections)
+
+        output_path = Path(output_file)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        base_dir = Path('.')
+
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self._cache_key(f"booklet\0{title or ''}\0{self.BOOKLET_CSS}\0{body}", base_dir,
+                                        source_format='html')
+            if cache_key and self.cache.fetch(cache_key, output_path):
+                return output_path
 
+        html = self._wrap_with_html(body, title, extra_css=self.BOOKLET_CSS)
+        return self._render(html, body, 'html', base_dir, output_path, cache_key)
+
+    def generate_with_key(self, markdown_file: str, output_file: Optional[str] = None,
+                          key_output_file: Optional[str] = None, key_file: Optional[str] = None) -> Dict:
+        """
+        דף התלמיד ומפתח המורה מפענוח אחד של דף העבודה
+
+        מפתח המורה הוא אותו HTML של דף התלמיד, עם הפתרון מ-SOLUTION_KEY.md משובץ
+        בסוף כל שאלה. ה-Markdown, הנוסחאות, הגרפים והתמונות מעובדים פעם אחת;
+        עם WeasyPrint שני הקבצים מרונדרים גם עם אותו גיליון סגנונות, פונטים ומטמון תמונות.
+
+        Args:
+            markdown_file: דף העבודה
+            output_file: PDF של דף התלמיד (ברירת מחדל: ליד דף העבודה)
+            key_output_file: PDF של מפתח המורה (ברירת מחדל: <שם הדף>_key.pdf ליד דף התלמיד)
+            key_file: קובץ מפתח התשובות (ברירת מחדל: SOLUTION_KEY.md)
+
+        Returns:
+            מילון עם 'worksheet' ו-'key' (נתיבי ה-PDF), 'answered' (מספר השאלות
+            עם פתרון) ו-'unanswered' (תוויות השאלות בלי פתרון במפתח)
+        """
+        input_path = Path(markdown_file)
+        if not input_path.exists():
+            raise FileNotFoundError(f"קובץ לא נמצא: {markdown_file}")
+        output_path = Path(output_file) if output_file else input_path.with_suffix('.pdf')
+        key_path = Path(key_output_file) if key_output_file else output_path.with_name(f"{output_path.stem}_key.pdf")
+
+        base_dir = input_path.parent
+        content = expand_graph_blocks(input_path.read_text(encoding='utf-8'), self.rendered_graphs)
+        body, front_matter = self._markdown_to_body(content, base_dir)
+        title = front_matter.get('title')
+        key_body, unanswered = AnswerKey(key_file).teacher_body(
+            str(input_path), body, lambda solution: self._markdown_to_body(solution, base_dir)[0])
+
+        self._render_copies([{'body': body, 'output': output_path, 'title': title},
+                             {'body': key_body, 'output': key_path,
+                              'title': f"{title or input_path.stem} - מפתח למורה"}], base_dir)
+        return {'worksheet': output_path, 'key': key_path,
+                'answered': key_body.count('class="teacher-answer"'), 'unanswered': unanswered}
+
+    def generate_personalized(
+        self,
+        markdown_file: str,
+        students: Iterable[str],
+        output_dir: Optional[str] = None,
+        merged_file: Optional[str] = None,
+        shuffle: bool = True,
+        seed: int = 0
+    ) -> List[Dict]:
+        """
+        עותק PDF אישי לכל תלמיד/ה: השם ממולא בשורת השם וסדר השאלות מעורבב
+
+        הדף מפוענח פעם אחת (Markdown, נוסחאות, גרפים ונגזרות תמונה), ורק שורת
+        השם וסדר השאלות משתנים בין העותקים. עם WeasyPrint גיליון הסגנונות
+        מפוענח פעם אחת, והפונטים והתמונות נטענים פעם אחת לכל האצווה.
+
+        Args:
+            markdown_file: דף העבודה
+            students: שמות התלמידים
+            output_dir: תיקייה ל-PDF נפרד לכל תלמיד/ה (<שם הדף>_<מספר>.pdf)
+            merged_file: קובץ PDF אחד עם כל העותקים ברצף, להדפסה
+            shuffle: ערבוב סדר השאלות הממוספרות (בתוך כל חלק של הדף)
+            seed: זרע הערבוב - אותו seed ואותו שם נותנים תמיד אותו סדר
+
+        Returns:
+            לכל תלמיד/ה: 'student', 'order' (מספרי השאלות המקוריים לפי הסדר בעותק),
+            'output' (None בשגיאה או כשאין output_dir), 'error', 'seconds';
+            ואם התבקש קובץ מאוחד - רשומה נוספת בסוף עם 'student' None
+        """
+        input_path = Path(markdown_file)
+        if not input_path.exists():
+            raise FileNotFoundError(f"קובץ לא נמצא: {markdown_file}")
+        if not output_dir and not merged_file:
+            raise ValueError("יש לבחור תיקיית פלט או קובץ מאוחד")
+
+        base_dir = input_path.parent
+        content = expand_graph_blocks(input_path.read_text(encoding='utf-8'), self.rendered_graphs)
+        body, front_matter = self._markdown_to_body(content, base_dir)
+        title = front_matter.get('title')
+        copies = PersonalizedWorksheet(body).copies(list(students), shuffle=shuffle, seed=seed)
+
+        results = []
+        for number, copy in enumerate(copies, 1):
+            results.append({'student': copy['student'], 'order': copy['order'], 'output': None,
+                            'error': None, 'seconds': 0.0})
+            if output_dir:
+                copy['output'] = Path(output_dir) / f"{input_path.stem}_{number:02d}.pdf"
+        if output_dir:
+            Path(output_dir).mkdir(parents=True, exist_ok=True)
+
+        if WEASYPRINT_AVAILABLE:
+            self._render_copies_with_weasyprint(copies, results, title, base_dir, merged_file)
+            return results
+
+        # מנועים אחרים - כל עותק מרונדר בנפרד, עם אותו פענוח ואותן נוסחאות
+        for copy, result in zip(copies, results):
+            if not output_dir:
+                break
+            start = time.perf_counter()
+            try:
+                result['output'] = self._render_copy(copy['body'], title, base_dir, copy['output'])
+            except Exception as e:
+                result['error'] = str(e)
+            result['seconds'] = time.perf_counter() - start
+        if merged_file:
+            results.append({'student': None, 'order': None, 'output': None, 'seconds': 0.0,
+                            'error': 'קובץ מאוחד דורש WeasyPrint: pip install weasyprint'})
+        return results
+
+    def generate_from_html_batch(self, documents: Iterable[Tuple[str, str, Optional[str]]],
+                                 base_dir: str = '.') -> List[Path]:
+        """
+        כמה קבצי PDF מקטעי HTML (כמו generate_from_html) ברינדור משותף - למשל דף
+        התלמיד ומפתח המורה של אותו תוצר ביניים
+
+        עם WeasyPrint כל המסמכים מרונדרים עם אותו גיליון סגנונות, פונטים ומטמון תמונות.
+
+        Args:
+            documents: (גוף HTML, קובץ פלט, כותרת) לכל מסמך
+            base_dir: התיקייה שנתיבי התמונות יחסיים אליה
+
+        Returns:
+            נתיבי קבצי ה-PDF, לפי סדר המסמכים
+        """
+        base_dir = Path(base_dir)
+        copies = []
+        for html_body, output_file, title in documents:
+            # נגזרת ברזולוציית הדפסה במקום המקור ב-400 DPI
+            body = self.derivatives.rewrite_img_sources(html_body, 'print', root=base_dir)
+            copies.append({'body': self._process_latex_math(body), 'output': Path(output_file), 'title': title})
+        return self._render_copies(copies, base_dir)
+
+    def _render_copies(self, copies: List[Dict], base_dir: Path) -> List[Path]:
+        """
+        רינדור גופי HTML מעובדים ('body', 'output', 'title') - עם WeasyPrint ברינדור
+        משותף, ובמנועים אחרים אחד אחרי השני; שגיאה ראשונה נזרקת
+        """
+        results = [{'output': None, 'error': None, 'seconds': 0.0} for _ in copies]
+        if WEASYPRINT_AVAILABLE:
+            self._render_copies_with_weasyprint(copies, results, None, base_dir, None)
+        else:
+            for copy, result in zip(copies, results):
+                try:
+                    result['output'] = self._render_copy(copy['body'], copy['title'], base_dir, copy['output'])
+                except Exception as e:
+                    result['error'] = str(e)
+
+        errors = [result['error'] for result in results if result['error']]
+        if errors:
+            raise RuntimeError(errors[0])
+        return [result['output'] for result in results]
+
+    def _render_copy(self, body: str, title: Optional[str], base_dir: Path, output_path: Path) -> Path:
+        """רינדור עותק אחד במנוע הזמין הראשון, עם מטמון הבנייה"""
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self._cache_key(f"{title or ''}\0{body}", base_dir, source_format='html')
+            if cache_key and self.cache.fetch(cache_key, output_path):
+                return output_path
+        return self._render(self._wrap_with_html(body, title), body, 'html', base_dir, output_path, cache_key)
+
+    def _render_copies_with_weasyprint(self, copies: List[Dict], results: List[Dict], title: Optional[str],
+                                       base_dir: Path, merged_file: Optional[str]):
+        """
+        רינדור כל העותקים עם גיליון סגנונות, פונטים ומטמון תמונות משותפים
+
+        עותק שכבר נמצא במטמון הבנייה מועתק משם ואינו עובר פריסה, אלא אם צריך
+        את הדפים שלו לקובץ המאוחד.
+        """
+        if self._font_config is None:
+            from weasyprint.text.fonts import FontConfiguration
+            self._font_config = FontConfiguration()
+
+        base_url = base_dir.resolve().as_uri() + '/'
+        stylesheet = None
+        image_cache = {}
+        pages = []
+
+        for copy, result in zip(copies, results):
+            start = time.perf_counter()
+            try:
+                cache_key = None
+                cached = False
+                if copy.get('output') and self.cache is not None:
+                    cache_key = self._cache_key(f"{copy.get('title', title) or ''}\0{copy['body']}", base_dir,
+                                                source_format='html')
+                    cached = bool(cache_key) and self.cache.fetch(cache_key, copy['output'])
+                    if cached:
+                        result['output'] = copy['output']
+                        if not merged_file:
+                            continue
+
+                if stylesheet is None:
+                    stylesheet = weasyprint.CSS(string=self._stylesheet(), base_url=base_url,
+                                                url_fetcher=self.fetcher, font_config=self._font_config)
+                document = weasyprint.HTML(
+                    string=self._wrap_with_html(copy['body'], copy.get('title', title), inline_css=False),
+                    base_url=base_url,
+                    url_fetcher=self.fetcher
+                ).render(stylesheets=[stylesheet], font_config=self._font_config,
+                         **self._image_cache_argument(image_cache))
+
+                if copy.get('output') and not cached:
+                    Path(copy['output']).parent.mkdir(parents=True, exist_ok=True)
+                    document.write_pdf(copy['output'])
+                    self._store_in_cache(cache_key, copy['output'])
+                    result['output'] = copy['output']
+                if merged_file:
+                    pages.append(document)
+            except Exception as e:
+                result['error'] = str(e)
+            finally:
+                result['seconds'] = time.perf_counter() - start
+
+        if merged_file:
+            start = time.perf_counter()
+            merged = {'student': None, 'order': None, 'output': None, 'error': None}
+            try:
+                if not pages:
+                    raise RuntimeError("אין עותקים לקובץ המאוחד")
+                all_pages = [page for document in pages for page in document.pages]
+                Path(merged_file).parent.mkdir(parents=True, exist_ok=True)
+                pages[0].copy(all_pages).write_pdf(merged_file)
+                merged['output'] = Path(merged_file)
+            except Exception as e:
+                merged['error'] = str(e)
+            merged['seconds'] = time.perf_counter() - start
+            results.append(merged)
+
+    @staticmethod
+    def _image_cache_argument(image_cache: Dict) -> Dict:
+        """מטמון התמונות המשותף לכמה רינדורים - שם הפרמטר השתנה בין גרסאות WeasyPrint"""
+        import inspect
+        parameters = inspect.signature(weasyprint.HTML.render).parameters
+        if 'cache' in parameters:
+            return {'cache': image_cache}
+        if 'image_cache' in parameters:
+            return {'image_cache': image_cache}
+        return {}
+
+    def _render(self, html: str, source: str, source_format: str, base_dir: Path,
+                output_path: Path, cache_key: Optional[str]) -> Path:
+        """רינדור HTML מלא ל-PDF במנוע הזמין הראשון ושמירה במטמון"""
         # יצירת PDF - נסה מנועים שונים לפי זמינות
         tried_engines = []
 
         if WEASYPRINT_AVAILABLE:
             try:
-                self._generate_with_weasyprint(html, output_path)
+                self._generate_with_weasyprint(html, output_path, base_dir)
+                self._store_in_cache(cache_key, output_path)
                 return output_path
             except Exception as e:
                 tried_engines.append(f"weasyprint (שגיאה: {e})")
 
         if PDFKIT_AVAILABLE:
             try:
-                self._generate_with_pdfkit(html, output_path, input_path.parent)
+                self._generate_with_pdfkit(html, output_path, base_dir)
+                self._store_in_cache(cache_key, output_path)
                 return output_path
             except Exception as e:
                 tried_engines.append(f"pdfkit (שגיאה: {e})")
 
         if PYPANDOC_AVAILABLE:
             try:
-                self._generate_with_pypandoc(content, output_path)
+                self._generate_with_pypandoc(source, output_path, source_format)
+                self._store_in_cache(cache_key, output_path)
                 return output_path
             except Exception as e:
                 tried_engines.append(f"pypandoc (שגיאה: {e})")
@@ -128,27 +553,171 @@ class PDFEngine:
 
         raise RuntimeError(error_msg)
 
-        sys.stdout.buffer.write(f"✅ PDF נוצר בהצלחה: {output_path}\n".encode('utf-8'))
-        return output_path
+    def _cache_key(self, markdown_content: str, base_dir: Path,
+                   images: Optional[Dict[str, bytes]] = None,
+                   source_format: str = 'md') -> Optional[str]:
+        """
+        מפתח מטמון לדף עבודה: גיבוב של המקור (Markdown או קטע HTML), כל תמונה מקומית
+        שהוא מפנה אליה, תבנית ה-HTML וה-CSS, מידות A4 והשוליים, ושם וגרסת מנוע ה-PDF
+
+        Returns:
+            מפתח, או None אם אין מנוע PDF זמין
+        """
+        engine = self._engine_signature()
+        if engine is None:
+            return None
+
+        parts = [
+            self.ENGINE_VERSION,
+            engine,
+            MathRenderer.signature(),
+            markdown.__version__ if MARKDOWN_AVAILABLE else 'no-markdown',
+            repr((self.A4_WIDTH_CM, self.A4_HEIGHT_CM, self.MARGIN_TOP_CM,
+                  self.MARGIN_BOTTOM_CM, self.MARGIN_SIDE_CM)),
+            self._wrap_with_html(''),
+            source_format,
+            markdown_content
+        ]
+
+        for image_ref in self._referenced_images(markdown_content):
+            image_path = self._resolve_local_path(image_ref, base_dir)
+            parts.append(image_ref)
+            parts.append(image_path.read_bytes() if image_path else 'missing')
+
+        for name in sorted(images or {}):
+            parts.extend([f"memory:{name}", images[name]])
+
+        return BuildCache.make_key(*parts)
+
+    @staticmethod
+    def _referenced_images(markdown_content: str) -> List[str]:
+        """רשימת נתיבי התמונות המקומיות שדף העבודה מפנה אליהן (Markdown ו-HTML)"""
+        refs = re.findall(r'!\[[^\]]*\]\(([^)\s]+)', markdown_content)
+        refs += re.findall(r'<img[^>]+src="([^"]+)"', markdown_content)
+        return [ref for ref in refs if not re.match(r'^[a-z][a-z0-9+.-]*:', ref, re.IGNORECASE)]
+
+    @staticmethod
+    def _resolve_local_path(ref: str, base_dir: Path) -> Optional[Path]:
+        """איתור קובץ מקומי לפי נתיב יחסי לתיקיית דף העבודה או לשורש הפרויקט"""
+        path = Path(ref)
+        candidates = [path] if path.is_absolute() else [base_dir / path, path]
+        for candidate in candidates:
+            if candidate.is_file():
+                return candidate
+        return None
+
+    @staticmethod
+    def _engine_signature() -> Optional[str]:
+        """שם וגרסת מנוע ה-PDF הראשון הזמין - אותו מנוע ש-generate ינסה קודם"""
+        if WEASYPRINT_AVAILABLE:
+            return f"weasyprint {weasyprint.__version__}"
+        if PDFKIT_AVAILABLE:
+            return f"pdfkit {getattr(pdfkit, '__version__', '?')}"
+        if PYPANDOC_AVAILABLE:
+            return f"pypandoc {getattr(pypandoc, '__version__', '?')}"
+        return None
+
+    def _store_in_cache(self, cache_key: Optional[str], output_path: Path):
+        """שמירת PDF שנוצר במטמון הבנייה"""
+        if self.cache is not None and cache_key:
+            self.cache.store(cache_key, output_path)
+
+    def generate_many(
+        self,
+        markdown_files: Iterable[str],
+        jobs: Optional[int] = None,
+        output_dir: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        יצירת PDF לקבוצת קבצי Markdown במקביל, במאגר תהליכים של מנועים "חמים"
+
+        כל תהליך עובד יוצר PDFEngine אחד בעת ההפעלה ומשתמש בו לכל הקבצים
+        שהוא מקבל, כך שעלות טעינת WeasyPrint והפונטים משולמת פעם אחת לכל תהליך.
+        שגיאה בקובץ אחד אינה עוצרת את שאר הקבצים.
+
+        Args:
+            markdown_files: נתיבים לקבצי Markdown
+            jobs: מספר תהליכים (ברירת מחדל: מספר הליבות)
+            output_dir: תיקיית פלט (אופציונלי, ברירת מחדל: ליד כל קובץ מקור)
 
-    def _markdown_to_html(self, markdown_content: str, base_dir: Path) -> str:
+        Returns:
+            רשימת תוצאות לפי סדר הקלט, כל אחת מילון עם המפתחות
+            'input', 'output' (None בשגיאה), 'error' (None בהצלחה), 'seconds',
+            'fetch_stats' (מוני מטמון הנכסים של הרינדור)
+        """
+        tasks = []
+        for markdown_file in markdown_files:
+            input_path = Path(markdown_file)
+            output_path = None
+            if output_dir:
+                output_path = str(Path(output_dir) / input_path.with_suffix('.pdf').name)
+            tasks.append((str(input_path), output_path))
+
+        if output_dir:
+            Path(output_dir).mkdir(parents=True, exist_ok=True)
+
+        if not tasks:
+            return []
+
+        jobs = jobs or os.cpu_count() or 1
+
+        # גרפים מבלוקי graph של כל דפי האצווה נוצרים מראש במקביל; התהליכים העובדים
+        # ימצאו אותם במטמון הגרפים
+        contents = []
+        for markdown_file, _ in tasks:
+            try:
+                contents.append(Path(markdown_file).read_text(encoding='utf-8'))
+            except OSError:
+                continue  # השגיאה תדווח בתוצאה של הקובץ עצמו
+        try:
+            self.rendered_graphs.update(render_graph_blocks(contents, jobs=jobs))
+        except (RuntimeError, ValueError) as e:
+            # דף עם גרף שגוי ייכשל בנפרד עם שגיאה מפורטת; שאר האצווה ממשיכה
+            sys.stderr.buffer.write(f"⚠️ {e}\n".encode('utf-8'))
+
+        jobs = min(jobs, len(tasks))
+
+        # תהליך יחיד - אין טעם לשלם על הקמת מאגר תהליכים
+        if jobs == 1:
+            return [_render_batch_task(self, task) for task in tasks]
+
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_batch_worker,
+                                 initargs=(self.cache_dir, self.use_cache)) as executor:
+            return list(executor.map(_render_batch_worker_task, tasks, chunksize=1))
+
+    def _markdown_to_html(self, markdown_content: str, base_dir: Path,
+                          images: Optional[Dict[str, bytes]] = None) -> str:
         """המרת Markdown ל-HTML עם עיבוד תמונות ו-LaTeX"""
-        # הפרדת front matter אם קיים
-        front_matter = {}
-        if markdown_content.startswith('---'):
-            parts = markdown_content.split('---', 2)
-            if len(parts) >= 3:
-                front_matter_text = parts[1].strip()
-                markdown_content = parts[2].strip()
-                # פשוט התעלם מה-front matter כרגע
+        html_body, front_matter = self._markdown_to_body(markdown_content, base_dir, images)
+
+        # יצירת HTML מלא עם CSS
+        return self._wrap_with_html(html_body, front_matter.get('title'))
+
+    def _markdown_to_body(self, markdown_content: str, base_dir: Path,
+                          images: Optional[Dict[str, bytes]] = None) -> Tuple[str, Dict[str, str]]:
+        """
+        המרת Markdown לגוף HTML (תמונות ונוסחאות מעובדות), ו-front matter
+
+        בלוקי graph כבר הוחלפו בהפניות לתמונות (expand_graph_blocks) אצל הקורא,
+        לפני חישוב מפתח המטמון - כאן הם אינם מורחבים שוב.
+        """
+        # תמונות בזיכרון - נרשמות בטוען הנכסים ומוגשות בכתובת memory:
+        memory_urls = {name: self.fetcher.register(name, data) for name, data in (images or {}).items()}
+
+        # הפרדת front matter - הכותרת שלו היא כותרת מסמך ה-PDF
+        front_matter, markdown_content = split_front_matter(markdown_content)
 
         # עיבוד תמונות - המרת נתיבים יחסיים לנתיבים מלאים
         def process_images(match):
-            img_path = match.group(1)
+            img_path = match.group(2)
+            if img_path in memory_urls:
+                return f'![{match.group(1) or ""}]({memory_urls[img_path]})'
             if not Path(img_path).is_absolute():
-                full_path = base_dir / img_path
-                if full_path.exists():
-                    return f'![{match.group(2) or ""}]({full_path})'
+                full_path = self._resolve_local_path(img_path, base_dir)
+                if full_path:
+                    # נגזרת ברזולוציית הדפסה במקום המקור ב-400 DPI
+                    full_path = self.derivatives.get(full_path, 'print')
+                    return f'![{match.group(1) or ""}]({full_path.resolve()})'
             return match.group(0)
 
         markdown_content = re.sub(r'!\[([^\]]*)\]\(([^)]+)\)', process_images, markdown_content)
@@ -164,37 +733,36 @@ class PDFEngine:
             html_body = markdown_content.replace('\n', '<br>\n')
 
         # עיבוד LaTeX math
-        html_body = self._process_latex_math(html_body)
-
-        # יצירת HTML מלא עם CSS
-        html = self._wrap_with_html(html_body)
-
-        return html
+        return self._process_latex_math(html_body), front_matter
 
     def _process_latex_math(self, html: str) -> str:
-        """עיבוד LaTeX math - המרה ל-HTML עם MathJax"""
-        # $$...$$ - block equations
-        def process_block(match):
-            math_content = match.group(1).strip()
-            return f'<div class="math-display">$${math_content}$$</div>'
+        """
+        עיבוד LaTeX math - רינדור מראש ל-SVG עם MathRenderer
 
-        html = re.sub(r'\$\$([^$]+)\$\$', process_block, html)
+        ביטוי ש-mathtext לא תומך בו נשאר עטוף ב-span לעיבוד MathJax בדפדפן
+        """
+        def process_math(match):
+            is_block = match.group(1) is not None
+            math_content = (match.group(1) if is_block else match.group(2)).strip()
 
-        # $...$ - inline equations
-        def process_inline(match):
-            math_content = match.group(1).strip()
-            return f'<span class="math-inline">${math_content}$</span>'
+            # תוכן שעבר המרת Markdown ל-HTML - מחזירים את תווי ה-TeX המקוריים
+            tex = html_module.unescape(math_content)
+            rendered = None
+            if '<' not in math_content:
+                rendered = self.math_renderer.render(tex, display=is_block)
 
-        html = re.sub(r'\$([^$]+)\$', process_inline, html)
+            if is_block:
+                return f'<div class="math-display">{rendered or f"$${math_content}$$"}</div>'
+            return rendered or f'<span class="math-inline">${math_content}$</span>'
 
-        return html
+        # $$...$$ - block equations, $...$ - inline equations (במעבר אחד)
+        return re.sub(r'\$\$([^$]+)\$\$|\$([^$]+)\$', process_math, html)
 
-    def _wrap_with_html(self, html_body: str) -> str:
-        """עטיפת HTML body ב-HTML מלא עם CSS"""
+    def _stylesheet(self) -> str:
+        """ה-CSS של דפי העבודה - מוטמע בכל מסמך, או מפוענח פעם אחת לאצוות רינדור"""
         fonts_css = ','.join([f"'{f}'" for f in self.hebrew_fonts])
 
-        css = f"""
-        <style>
+        return f"""
             @import url('https://fonts.googleapis.com/css2?family=David+Libre:wght@400;700&family=Assistant:wght@400;600;700&family=Heebo:wght@400;500;700&display=swap');
 
             @page {{
@@ -315,6 +883,18 @@ class PDFEngine:
                 font-size: 1em;
             }}
 
+            img.math-svg {{
+                display: inline;
+                max-width: none;
+                margin: 0 0.1em;
+                page-break-inside: auto;
+            }}
+
+            img.math-svg-display {{
+                display: block;
+                margin: 0 auto;
+            }}
+
             hr {{
                 border: none;
                 border-top: 1px solid #ddd;
@@ -328,19 +908,44 @@ class PDFEngine:
             em {{
                 font-style: italic;
             }}
-        </style>
+
+            .teacher-answer {{
+                border-right: 4px solid #2e7d32;
+                background-color: #f1f8f4;
+                padding: 0.3cm 0.5cm;
+                margin: 0.3cm 0;
+                page-break-inside: avoid;
+            }}
+        """
+
+    def _wrap_with_html(self, html_body: str, title: Optional[str] = None, inline_css: bool = True,
+                        extra_css: str = '') -> str:
         """
+        עטיפת HTML body ב-HTML מלא עם CSS
+
+        Args:
+            inline_css: False - בלי ה-CSS, למסמכים שמרונדרים עם גיליון סגנונות משותף
+            extra_css: CSS נוסף אחרי ה-CSS של דפי העבודה (למשל BOOKLET_CSS)
+        """
+        css = f"""
+        <style>{self._stylesheet()}{extra_css}</style>
+        """ if inline_css else ''
+
+        # MathJax נדרש רק לביטויים שלא רונדרו מראש ל-SVG
+        mathjax = ''
+        if re.search(r'class="math-(inline|display)">\$', html_body):
+            mathjax = """<script src="https://polyfill.io/v3/polyfill.min.js?features=es6"></script>
+    <script id="MathJax-script" async src="https://cdn.jsdelivr.net/npm/mathjax@3/es5/tex-mml-chtml.js"></script>
+    <script>
+        window.MathJax = {tex: {inlineMath: [['$', '$']], displayMath: [['$$', '$$']]}};
+    </script>"""
 
         html_full = f"""<!DOCTYPE html>
 <html dir="rtl" lang="he">
 <head>
     <meta charset="UTF-8">
-    <title>דף עבודה במתמטיקה</title>
-    <script src="https://polyfill.io/v3/polyfill.min.js?features=es6"></script>
-    <script id="MathJax-script" async src="https://cdn.jsdelivr.net/npm/mathjax@3/es5/tex-mml-chtml.js"></script>
-    <script>
-        window.MathJax = {{tex: {{inlineMath: [['$', '$']], displayMath: [['$$', '$$']]}}}};
-    </script>
+    <title>{html_module.escape(title or 'דף עבודה במתמטיקה')}</title>
+    {mathjax}
     {css}
 </head>
 <body>
@@ -350,10 +955,18 @@ class PDFEngine:
 
         return html_full
 
-    def _generate_with_weasyprint(self, html: str, output_path: Path):
-        """יצירת PDF עם WeasyPrint"""
-        html_doc = weasyprint.HTML(string=html)
-        html_doc.write_pdf(output_path)
+    def _generate_with_weasyprint(self, html: str, output_path: Path, base_dir: Path):
+        """יצירת PDF עם WeasyPrint - ללא גישה לרשת, נכסים מוגשים מהמטמון המקומי"""
+        if self._font_config is None:
+            from weasyprint.text.fonts import FontConfiguration
+            self._font_config = FontConfiguration()
+
+        html_doc = weasyprint.HTML(
+            string=html,
+            base_url=base_dir.resolve().as_uri() + '/',
+            url_fetcher=self.fetcher
+        )
+        html_doc.write_pdf(output_path, font_config=self._font_config)
 
     def _generate_with_pdfkit(self, html: str, output_path: Path, base_dir: Path):
         """יצירת PDF עם pdfkit"""
@@ -373,12 +986,12 @@ class PDFEngine:
 
         pdfkit.from_string(html, str(output_path), options=options)
 
-    def _generate_with_pypandoc(self, markdown_content: str, output_path: Path):
+    def _generate_with_pypandoc(self, markdown_content: str, output_path: Path, source_format: str = 'md'):
         """יצירת PDF עם pypandoc"""
         pypandoc.convert_text(
             markdown_content,
             'pdf',
-            format='md',
+            format=source_format,
             outputfile=str(output_path),
             extra_args=[
                 f'--pdf-engine=xelatex',
@@ -389,54 +1002,94 @@ class PDFEngine:
         )
 
     def _embed_images_base64(self, html: str, base_dir: Path) -> str:
-        """המרת תמונות ל-base64"""
+        """המרת תמונות ל-base64 - משתמש בנגזרת ההדפסה השמורה במקום להקטין את המקור בכל רינדור"""
         def embed_image(match):
-            img_path_str = match.group(1)
-            alt_text = match.group(2) or ""
-
-            img_path = Path(img_path_str)
+            tag = match.group(0)
+            src_match = re.search(r'src="([^"]+)"', tag)
+            if not src_match or src_match.group(1).startswith('data:'):
+                return tag
+            alt_match = re.search(r'alt="([^"]*)"', tag)
+            alt_text = alt_match.group(1) if alt_match else ""
+
+            memory_asset = self.fetcher.get_memory(src_match.group(1))
+            if memory_asset:
+                data, mime_type = memory_asset
+                img_base64 = base64.b64encode(data).decode()
+                return f'<img src="data:{mime_type};base64,{img_base64}" alt="{alt_text}" style="max-width: {self.CONTENT_WIDTH_CM}cm; height: auto;">'
+
+            img_path = Path(src_match.group(1))
             if not img_path.is_absolute():
                 img_path = base_dir / img_path
 
             if img_path.exists():
                 try:
-                    with Image.open(img_path) as img:
-                        # אופטימיזציה לתמונה - התאמה ל-A4
-                        max_width_px = int(self.CONTENT_WIDTH_CM * 37.8)  # 1cm ≈ 37.8px at 96 DPI
-                        if img.width > max_width_px:
-                            ratio = max_width_px / img.width
-                            new_size = (max_width_px, int(img.height * ratio))
-                            img = img.resize(new_size, Image.Resampling.LANCZOS)
-
-                        # המרה ל-base64
-                        import io
-                        buffer = io.BytesIO()
-                        img.save(buffer, format='PNG')
-                        img_base64 = base64.b64encode(buffer.getvalue()).decode()
-
-                        return f'<img src="data:image/png;base64,{img_base64}" alt="{alt_text}" style="max-width: {self.CONTENT_WIDTH_CM}cm; height: auto;">'
+                    derived = self.derivatives.get(img_path, 'print')
+                    mime_type = mimetypes.guess_type(derived.name)[0] or 'image/png'
+                    img_base64 = base64.b64encode(derived.read_bytes()).decode()
+
+                    return f'<img src="data:{mime_type};base64,{img_base64}" alt="{alt_text}" style="max-width: {self.CONTENT_WIDTH_CM}cm; height: auto;">'
                 except Exception as e:
                     sys.stderr.buffer.write(f"שגיאה בעיבוד תמונה {img_path}: {e}\n".encode('utf-8'))
-                    return match.group(0)
+                    return tag
 
-            return match.group(0)
+            return tag
 
-        html = re.sub(r'<img src="([^"]+)"[^>]*alt="([^"]*)"[^>]*>', embed_image, html)
+        html = re.sub(r'<img\b[^>]*>', embed_image, html)
         return html
 
 
-def generate_pdf(markdown_file: str, output_file: Optional[str] = None) -> Path:
+# מנוע PDF של תהליך עובד במאגר - נוצר פעם אחת לכל תהליך
+_batch_engine: Optional[PDFEngine] = None
+
+
+def _init_batch_worker(cache_dir: Optional[str], use_cache: bool):
+    """אתחול תהליך עובד: יצירת מנוע PDF שישמש את כל המשימות של התהליך"""
+    global _batch_engine
+    _batch_engine = PDFEngine(cache_dir=cache_dir, use_cache=use_cache)
+
+
+def _render_batch_worker_task(task):
+    """הרצת משימת רינדור בתהליך עובד עם המנוע החם של התהליך"""
+    return _render_batch_task(_batch_engine, task)
+
+
+def _render_batch_task(engine: PDFEngine, task) -> Dict:
+    """רינדור קובץ אחד מתוך אצווה - שגיאות מוחזרות כתוצאה ולא נזרקות"""
+    markdown_file, output_file = task
+    start = time.perf_counter()
+    fetch_before = engine.fetcher.stats()
+    try:
+        output_path = engine.generate(markdown_file, output_file)
+        error = None
+    except Exception as e:
+        output_path = None
+        error = str(e)
+
+    fetch_after = engine.fetcher.stats()
+    return {
+        'input': Path(markdown_file),
+        'output': output_path,
+        'error': error,
+        'seconds': time.perf_counter() - start,
+        'fetch_stats': {name: fetch_after[name] - fetch_before[name] for name in fetch_after}
+    }
+
+
+def generate_pdf(markdown_file: str, output_file: Optional[str] = None,
+                 cache_dir: Optional[str] = None, use_cache: bool = True) -> Path:
     """
     פונקציה נוחה ליצירת PDF
 
     Args:
         markdown_file: נתיב לקובץ Markdown
         output_file: נתיב לקובץ PDF פלט (אופציונלי)
+        cache_dir: תיקיית מטמון הבנייה (אופציונלי)
+        use_cache: האם להשתמש במטמון הבנייה
 
     Returns:
         Path לקובץ PDF שנוצר
     """
-    engine = PDFEngine()
+    engine = PDFEngine(cache_dir=cache_dir, use_cache=use_cache)
     return engine.generate(markdown_file, output_file)
 
 
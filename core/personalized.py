@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+עותקים אישיים של דף עבודה - שם התלמיד/ה ממולא מראש וסדר שאלות מעורבב לכל עותק
+Personalized copies - per-student name and shuffled question order over one parsed worksheet
+
+הדף מפוענח פעם אחת ל-HTML (כולל נוסחאות SVG, גרפים ונגזרות תמונה). כל עותק
+נבנה מאותם בלוקים: רק שורת השם וסדר השאלות משתנים, ולכן אין צורך לפענח
+את ה-Markdown או לרנדר נוסחאות מחדש לכל תלמיד.
+"""
+
+import re
+import random
+import html as html_module
+from typing import List, Dict, Optional
+from core.a4_paginator import split_blocks
+
+# שורת השם בדף העבודה: **שם התלמיד/ה**: ______
+NAME_BLANK_RE = re.compile(r'(<strong>\s*שם התלמיד/ה\s*</strong>\s*:?\s*)_{3,}')
+# כותרת של שאלה ממוספרת - רק שאלות כאלה מעורבבות (לא שאלות בונוס או סעיפים)
+QUESTION_HEADING_RE = re.compile(r'^<h3[^>]*>\s*שאלה\s+(\d+)')
+HEADING_RE = re.compile(r'^<h[1-6]\b', re.IGNORECASE)
+HR_RE = re.compile(r'^<hr\b', re.IGNORECASE)
+
+
+def fill_student_name(body_html: str, student: str) -> str:
+    """מילוי שם התלמיד/ה בשורת השם (אם יש כזו בדף)"""
+    name = f'<span class="student-name">{html_module.escape(student)}</span>'
+    return NAME_BLANK_RE.sub(lambda match: match.group(1) + name, body_html, count=1)
+
+
+class PersonalizedWorksheet:
+    """דף עבודה מפוענח שממנו נבנים עותקים אישיים"""
+
+    def __init__(self, body_html: str):
+        """
+        Args:
+            body_html: גוף ה-HTML של דף העבודה, אחרי רינדור הנוסחאות
+        """
+        self.blocks = split_blocks(body_html)
+        # יחידת שאלה: מכותרת 'שאלה N' ועד הכותרת הבאה, בלי הקווים המפרידים שבסופה
+        # (שורות תשובה של קווים תחתונים הופכות גם הן ל-<hr>, ולכן הן חלק מהיחידה).
+        # יחידות רצופות (עם קווים מפרידים בלבד ביניהן) שייכות לאותה קבוצה,
+        # וערבוב נעשה בתוך קבוצה - שאלות לא עוברות בין חלקים של הדף
+        self.units: List[tuple] = []
+        self.groups: List[List[int]] = []
+        previous_end = None
+        index = 0
+        while index < len(self.blocks):
+            if not QUESTION_HEADING_RE.match(self.blocks[index]):
+                index += 1
+                continue
+            end = index + 1
+            while end < len(self.blocks) and not HEADING_RE.match(self.blocks[end]):
+                end += 1
+            next_heading = end
+            while end > index + 1 and HR_RE.match(self.blocks[end - 1]):
+                end -= 1
+            between = self.blocks[previous_end:index] if previous_end is not None else None
+            if between is None or not all(HR_RE.match(block) for block in between):
+                self.groups.append([])
+            self.groups[-1].append(len(self.units))
+            self.units.append((index, end))
+            previous_end, index = end, next_heading
+
+    @property
+    def question_count(self) -> int:
+        return len(self.units)
+
+    def shuffled_order(self, key: str) -> List[int]:
+        """
+        סדר שאלות לעותק - ערבוב דטרמיניסטי בתוך כל קבוצה לפי המפתח (למשל seed ושם)
+
+        Returns:
+            לכל מקום בדף, מספר היחידה המקורית שמוצגת בו
+        """
+        rng = random.Random(key)
+        order = list(range(len(self.units)))
+        for group in self.groups:
+            shuffled = list(group)
+            rng.shuffle(shuffled)
+            for slot, unit in zip(group, shuffled):
+                order[slot] = unit
+        return order
+
+    def render(self, student: Optional[str] = None, order: Optional[List[int]] = None) -> str:
+        """
+        גוף HTML של עותק אישי
+
+        Args:
+            student: שם למילוי בשורת השם
+            order: סדר השאלות (מ-shuffled_order); ללא - הסדר המקורי
+
+        Returns:
+            גוף ה-HTML, עם מספור השאלות לפי הסדר החדש
+        """
+        blocks = list(self.blocks)
+        if order is not None:
+            # מקום בדף (תחילת היחידה המקורית) -> (סוף היחידה המקורית, היחידה שמוצגת בו)
+            slots = {start: (end, shown) for (start, end), shown in zip(self.units, order)}
+            blocks = []
+            index = 0
+            while index < len(self.blocks):
+                if index in slots:
+                    slot_end, shown = slots[index]
+                    start, end = self.units[shown]
+                    blocks.extend(self.blocks[start:end])
+                    index = slot_end
+                else:
+                    blocks.append(self.blocks[index])
+                    index += 1
+
+        # מספור מחדש של השאלות לפי מקומן בדף
+        number = 0
+        for position, block in enumerate(blocks):
+            match = QUESTION_HEADING_RE.match(block)
+            if match:
+                number += 1
+                blocks[position] = block[:match.start(1)] + str(number) + block[match.end(1):]
+
+        body = '\n'.join(blocks)
+        return fill_student_name(body, student) if student else body
+
+    def copies(self, students: List[str], shuffle: bool = True, seed: int = 0) -> List[Dict]:
+        """
+        כל העותקים האישיים
+
+        Returns:
+            לכל תלמיד/ה: 'student', 'order' (מספרי השאלות המקוריים, מ-1), 'body'
+        """
+        result = []
+        for student in students:
+            order = self.shuffled_order(f"{seed}:{student}") if shuffle else None
+            result.append({
+                'student': student,
+                'order': [unit + 1 for unit in (order or range(len(self.units)))],
+                'body': self.render(student, order),
+            })
+        return result
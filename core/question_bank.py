@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+מאגר שאלות - פירוק דפי העבודה לשאלות ושמירתן ב-SQLite עם חיפוש טקסט מלא (FTS5)
+Question Bank - extract worksheet questions into SQLite with a Hebrew-aware FTS5 index
+
+כל כותרת ### של שאלה ('שאלה 7', '(ב) השלמת הטבלה', 'שאלת בונוס 1: ...') פותחת
+רשומה, עד הכותרת הבאה. לכל שאלה נשמרים הטקסט, ביטויי המתמטיקה, הכיתה והנושא
+(מהקטלוג), קובץ המקור וגודל מקום התשובה (מספר שורות התשובה).
+
+SQLite אינו מאפשר לכתוב טוקנייזר FTS5 ב-Python, ולכן הנרמול העברי נעשה כאן לפני
+האינדוקס ובכל שאילתה, והטוקנייזר unicode61 רק מפצל למילים: הניקוד והטעמים
+מוסרים, ואותיות סופיות מנורמלות. הצורות של כל מילה בלי אותיות השימוש ו/ה/ב/ל/מ/ש
+בתחילתה ('והמקדם' נמצא בחיפוש 'מקדם') נשמרות בעמודה נפרדת, stems, במשקל נמוך:
+אותיות שימוש אינן ניתנות להבחנה מאותיות שורש ('שיפוע' נותן גם 'יפוע'), ולכן
+התאמה דרכן מדורגת מתחת להתאמה למילה עצמה.
+"""
+
+import re
+import sys
+import json
+import sqlite3
+from pathlib import Path
+from typing import Optional, List, Dict, Iterable
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from core.catalog import WorksheetCatalog, GRADE_LETTERS, split_front_matter, normalize_grade
+
+# ניקוד וטעמים (U+0591-U+05C7), בלי המקף העברי (U+05BE) והפסיק/נקודתיים העבריים
+NIQQUD_RE = re.compile('[\u0591-\u05BD\u05BF\u05C1\u05C2\u05C4\u05C5\u05C7]')
+FINAL_LETTERS = str.maketrans('ךםןףץ', 'כמנפצ')
+PREFIX_LETTERS = 'והבלמש'
+MAX_PREFIX = 2
+# אורך מינימלי של מילה אחרי הסרת אותיות שימוש - 'מקדם' אינו נותן 'קדם'
+MIN_STEM_LENGTH = 4
+WORD_RE = re.compile(r'[א-תA-Za-z0-9]+')
+
+QUESTION_HEADING_RE = re.compile(r'^(שאלה\s+\d+|שאלת בונוס\b.*|\([א-ת]\).*)$')
+HEADING_RE = re.compile(r'^(#{1,6})\s+(.*?)\s*#*\s*$')
+ANSWER_LINE_RE = re.compile(r'_{5,}')
+MATH_RE = re.compile(r'\$\$([^$]+)\$\$|\$([^$]+)\$')
+
+
+def normalize_hebrew(text: str) -> str:
+    """הסרת ניקוד וטעמים, המקף העברי לרווח ואותיות סופיות לרגילות"""
+    text = NIQQUD_RE.sub('', text).replace('\u05BE', ' ')
+    return text.translate(FINAL_LETTERS).lower()
+
+
+def prefix_variants(word: str) -> List[str]:
+    """
+    המילה וצורותיה בלי אותיות שימוש בתחילתה: 'והמקדם' -> המקדם, מקדם
+
+    אות שימוש שנייה מוסרת רק אחרי ו או ש ('ושהשיפוע', 'שהמקדם'), כמו בעברית;
+    כך 'במקדם' נותן 'מקדם' ולא גם 'קדם'. צורה שנשארים בה פחות מ-MIN_STEM_LENGTH
+    אותיות אינה נוספת ('מקדם' אינו נותן 'קדם')
+    """
+    variants = [word]
+    for _ in range(MAX_PREFIX):
+        if len(word) > MIN_STEM_LENGTH and word[0] in PREFIX_LETTERS:
+            stripped = word[0]
+            word = word[1:]
+            variants.append(word)
+            if stripped not in 'וש':
+                break
+        else:
+            break
+    return variants
+
+
+def index_terms(text: str) -> str:
+    """הטקסט שנכנס לאינדקס: המילים המנורמלות"""
+    return ' '.join(WORD_RE.findall(normalize_hebrew(text)))
+
+
+def stem_terms(text: str) -> str:
+    """הטקסט שנכנס לעמודת stems: צורות המילים בלי אותיות השימוש שבתחילתן"""
+    terms = []
+    for word in WORD_RE.findall(normalize_hebrew(text)):
+        terms.extend(prefix_variants(word)[1:])
+    return ' '.join(terms)
+
+
+def build_match_query(query: str) -> str:
+    """
+    שאילתת MATCH של FTS5 מטקסט חופשי - כל מילה חייבת להופיע, בצורתה המנורמלת או
+    בלי אותיות השימוש שבתחילתה ('במקדם' מוצא גם 'מקדם'); מילה שמסתיימת ב-* היא חיפוש תחילית
+    """
+    parts = []
+    for token in normalize_hebrew(query).split():
+        star = '*' if token.endswith('*') else ''
+        for word in WORD_RE.findall(token):
+            variants = [f'"{variant}"{star}' for variant in prefix_variants(word)]
+            parts.append(variants[0] if len(variants) == 1 else f"({' OR '.join(variants)})")
+    return ' AND '.join(parts)
+
+
+def extract_questions(content: str) -> List[Dict]:
+    """
+    פירוק דף עבודה לשאלות
+
+    Returns:
+        לכל שאלה: 'label' (הכותרת), 'section' (כותרת ה-## שמעליה), 'markdown',
+        'text' (טקסט נקי), 'math' (ביטויי LaTeX), 'answer_lines'
+    """
+    _, body = split_front_matter(content)
+    questions = []
+    current = None
+    section = ''
+    in_fence = False
+
+    def close():
+        if current is None:
+            return
+        lines = current.pop('lines')
+        while lines and lines[-1].strip() in ('', '---'):
+            lines.pop()
+        markdown_text = '\n'.join(lines).strip()
+        current.update(_describe(markdown_text))
+        questions.append(current)
+
+    for line in body.splitlines():
+        if line.startswith('```'):
+            in_fence = not in_fence
+        heading = None if in_fence else HEADING_RE.match(line)
+        if heading and len(heading.group(1)) <= 3:
+            close()
+            current = None
+            level, text = len(heading.group(1)), heading.group(2)
+            if level <= 2:
+                section = text
+            elif QUESTION_HEADING_RE.match(text):
+                current = {'label': text, 'section': section, 'lines': []}
+            continue
+        if current is not None:
+            current['lines'].append(line)
+
+    close()
+    return questions
+
+
+def _describe(markdown_text: str) -> Dict:
+    """טקסט נקי, ביטויי מתמטיקה וגודל מקום התשובה של שאלה"""
+    answer_lines = sum(1 for line in markdown_text.splitlines() if ANSWER_LINE_RE.search(line))
+    math = [(block or inline).strip() for block, inline in MATH_RE.findall(markdown_text)]
+
+    text = re.sub(r'```.*?```', ' ', markdown_text, flags=re.DOTALL)
+    text = re.sub(r'!\[[^\]]*\]\([^)]*\)', ' ', text)
+    text = ANSWER_LINE_RE.sub(' ', text)
+    text = re.sub(r'[*`>|#]+', ' ', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+
+    return {'markdown': markdown_text, 'text': text, 'math': math, 'answer_lines': answer_lines}
+
+
+class QuestionBank:
+    """מאגר השאלות של כל דפי העבודה בקטלוג, עם חיפוש FTS5"""
+
+    DEFAULT_DB = '.cache/question_bank.sqlite'
+    # גרסת הסכמה והנרמול - שינוי מוחק את המאגר ובונה אותו מחדש
+    SCHEMA_VERSION = 2
+    # משקלי bm25 לעמודות label, text, math, stems - התאמה דרך צורה בלי אותיות שימוש חלשה יותר
+    COLUMN_WEIGHTS = (1.0, 1.0, 1.0, 0.3)
+
+    def __init__(self, db_path: Optional[str] = None, catalog: Optional[WorksheetCatalog] = None):
+        """
+        אתחול המאגר
+
+        Args:
+            db_path: קובץ מסד הנתונים (ברירת מחדל: .cache/question_bank.sqlite)
+            catalog: קטלוג דפי העבודה (ברירת מחדל: worksheets ו-assignments)
+        """
+        self.db_path = Path(db_path or self.DEFAULT_DB)
+        self.catalog = catalog or WorksheetCatalog()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.row_factory = sqlite3.Row
+        self._create_schema()
+
+    def _create_schema(self):
+        if self.conn.execute('PRAGMA user_version').fetchone()[0] != self.SCHEMA_VERSION:
+            with self.conn:
+                for table in ('question_search', 'questions', 'sources'):
+                    self.conn.execute(f'DROP TABLE IF EXISTS {table}')
+                self.conn.execute(f'PRAGMA user_version = {self.SCHEMA_VERSION}')
+
+        with self.conn:
+            self.conn.executescript('''
+                CREATE TABLE IF NOT EXISTS sources (
+                    path TEXT PRIMARY KEY,
+                    sha256 TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS questions (
+                    id INTEGER PRIMARY KEY,
+                    source TEXT NOT NULL REFERENCES sources(path),
+                    position INTEGER NOT NULL,
+                    label TEXT NOT NULL,
+                    section TEXT NOT NULL,
+                    markdown TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    math TEXT NOT NULL,
+                    answer_lines INTEGER NOT NULL,
+                    grade INTEGER,
+                    topic TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS questions_source ON questions(source);
+                CREATE INDEX IF NOT EXISTS questions_grade ON questions(grade);
+                CREATE VIRTUAL TABLE IF NOT EXISTS question_search USING fts5(
+                    label, text, math, stems, tokenize = 'unicode61'
+                );
+            ''')
+
+    def update(self) -> Dict[str, int]:
+        """
+        סנכרון המאגר עם הקטלוג - רק דפים שהתוכן שלהם השתנה מפורקים מחדש
+
+        Returns:
+            מונים: 'updated' (דפים שפורקו), 'removed' (דפים שנמחקו), 'questions' (סך השאלות)
+        """
+        entries = self.catalog.refresh()
+        indexed = dict(self.conn.execute('SELECT path, sha256 FROM sources'))
+        stats = {'updated': 0, 'removed': 0}
+
+        with self.conn:
+            for entry in entries:
+                if indexed.get(entry['path']) == entry['sha256']:
+                    continue
+                content = Path(entry['path']).read_text(encoding='utf-8')
+                self._delete_source(entry['path'])
+                self._insert_source(entry, extract_questions(content))
+                stats['updated'] += 1
+
+            current = {entry['path'] for entry in entries}
+            for path in indexed.keys() - current:
+                self._delete_source(path)
+                stats['removed'] += 1
+
+        stats['questions'] = self.conn.execute('SELECT COUNT(*) FROM questions').fetchone()[0]
+        return stats
+
+    def _delete_source(self, path: str):
+        self.conn.execute(
+            'DELETE FROM question_search WHERE rowid IN (SELECT id FROM questions WHERE source = ?)', (path,))
+        self.conn.execute('DELETE FROM questions WHERE source = ?', (path,))
+        self.conn.execute('DELETE FROM sources WHERE path = ?', (path,))
+
+    def _insert_source(self, entry: Dict, questions: List[Dict]):
+        self.conn.execute('INSERT INTO sources (path, sha256) VALUES (?, ?)', (entry['path'], entry['sha256']))
+        topic = entry['front_matter'].get('topic', '')
+        for position, question in enumerate(questions, 1):
+            cursor = self.conn.execute(
+                'INSERT INTO questions (source, position, label, section, markdown, text, math, '
+                'answer_lines, grade, topic) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (entry['path'], position, question['label'], question['section'], question['markdown'],
+                 question['text'], json.dumps(question['math'], ensure_ascii=False),
+                 question['answer_lines'], entry['grade'], topic))
+            self.conn.execute(
+                'INSERT INTO question_search (rowid, label, text, math, stems) VALUES (?, ?, ?, ?, ?)',
+                (cursor.lastrowid, index_terms(question['label']), index_terms(question['text']),
+                 ' '.join(question['math']).lower(),
+                 stem_terms(f"{question['label']} {question['text']}")))
+
+    def search(self, query: str = '', grade=None, topic: Optional[str] = None,
+               limit: int = 20) -> List[Dict]:
+        """
+        חיפוש שאלות
+
+        Args:
+            query: טקסט חופשי - כל המילים חייבות להופיע (בלי ניקוד ואותיות שימוש);
+                   'math:3x' מחפש בביטויי המתמטיקה בלבד. ריק - כל השאלות
+            grade: כיתה (8, ח או 'כיתה ח')
+            topic: חלק מהנושא של דף המקור
+            limit: מספר תוצאות מקסימלי
+
+        Returns:
+            שאלות לפי רלוונטיות (bm25), או לפי מקור ומיקום כשאין שאילתה
+        """
+        conditions, params = [], []
+        math_terms = re.findall(r'math:(\S+)', query)
+        query = re.sub(r'math:\S+', ' ', query)
+
+        match_parts = [build_match_query(query)] if query.strip() else []
+        match_parts += ['math : "{}"'.format(term.lower().replace('"', '""')) for term in math_terms]
+        match = ' AND '.join(part for part in match_parts if part)
+
+        if grade is not None:
+            wanted_grade = normalize_grade(grade)
+            if wanted_grade is None:
+                raise ValueError(f"כיתה לא מוכרת: {grade}")
+            conditions.append('q.grade = ?')
+            params.append(wanted_grade)
+        if topic:
+            conditions.append('q.topic LIKE ?')
+            params.append(f'%{topic}%')
+
+        if match:
+            weights = ', '.join(str(weight) for weight in self.COLUMN_WEIGHTS)
+            sql = (f'SELECT q.*, bm25(question_search, {weights}) AS score FROM question_search '
+                   'JOIN questions q ON q.id = question_search.rowid WHERE question_search MATCH ?')
+            params.insert(0, match)
+            order = 'score'
+        else:
+            sql = 'SELECT q.*, 0.0 AS score FROM questions q WHERE 1'
+            order = 'q.source, q.position'
+        for condition in conditions:
+            sql += f' AND {condition}'
+        sql += f' ORDER BY {order} LIMIT ?'
+        params.append(limit)
+
+        return [self._row_to_dict(row) for row in self.conn.execute(sql, params)]
+
+    def get(self, ids: Iterable[int]) -> List[Dict]:
+        """שאלות לפי מזהה, בסדר המזהים שהתקבלו"""
+        ids = list(ids)
+        rows = self.conn.execute(
+            f'SELECT *, 0.0 AS score FROM questions WHERE id IN ({",".join("?" * len(ids))})', ids)
+        by_id = {row['id']: self._row_to_dict(row) for row in rows}
+        missing = [question_id for question_id in ids if question_id not in by_id]
+        if missing:
+            raise KeyError(f"שאלות לא נמצאו במאגר: {', '.join(map(str, missing))}")
+        return [by_id[question_id] for question_id in ids]
+
+    def assemble(self, ids: Iterable[int], title: str, grade: Optional[str] = None,
+                 topic: Optional[str] = None) -> str:
+        """
+        דף עבודה חדש (Markdown) מהשאלות שנבחרו - השאלות ממוספרות מחדש
+
+        Args:
+            ids: מזהי השאלות, לפי הסדר הרצוי
+            title: כותרת דף העבודה
+            grade: ערך grade ל-front matter (ברירת מחדל: הכיתה של השאלה הראשונה)
+            topic: ערך topic ל-front matter (אופציונלי)
+        """
+        questions = self.get(ids)
+        if grade is None and questions and questions[0]['grade']:
+            letters = {number: letter for letter, number in GRADE_LETTERS.items()}
+            grade = f"כיתה {letters.get(questions[0]['grade'], questions[0]['grade'])}"
+
+        front_matter = [f'title: "{title}"']
+        if grade:
+            front_matter.append(f'grade: "{grade}"')
+        if topic:
+            front_matter.append(f'topic: "{topic}"')
+
+        parts = ['---', *front_matter, '---', '', f'# {title}', '']
+        for number, question in enumerate(questions, 1):
+            # כותרת המשנה של שאלה מסומנת באות או שאלת בונוס נשמרת: '(ב) השלמת הטבלה' -> 'שאלה 2: השלמת הטבלה'
+            subtitle = re.sub(r'^(שאלה\s+\d+|\([א-ת]\)|שאלת בונוס(\s+\d+)?)\s*[:-]?\s*', '', question['label'])
+            heading = f'שאלה {number}: {subtitle}' if subtitle else f'שאלה {number}'
+            parts += ['---', '', f'### {heading}', '', question['markdown'], '']
+        return '\n'.join(parts)
+
+    @staticmethod
+    def _row_to_dict(row: sqlite3.Row) -> Dict:
+        question = dict(row)
+        question['math'] = json.loads(question['math'])
+        return question
+
+    def close(self):
+        self.conn.close()
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(
+        description='מאגר השאלות של דפי העבודה - עדכון, חיפוש והרכבת דף עבודה חדש',
+        epilog='דוגמאות:\n'
+               '  python core/question_bank.py search מקדם --grade 8\n'
+               "  python core/question_bank.py search 'math:3x'\n"
+               '  python core/question_bank.py assemble 12 40 41 --title "חזרה על מקדמים" -o review.md',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--db', default=None, help='קובץ המאגר (ברירת מחדל: .cache/question_bank.sqlite)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    commands.add_parser('update', help='סנכרון המאגר עם דפי העבודה')
+
+    search_parser = commands.add_parser('search', help='חיפוש שאלות')
+    search_parser.add_argument('query', nargs='*', help='מילות חיפוש')
+    search_parser.add_argument('--grade', default=None, help="כיתה: 8, ח או 'כיתה ח'")
+    search_parser.add_argument('--topic', default=None, help='חלק מהנושא של דף המקור')
+    search_parser.add_argument('--limit', type=int, default=20, help='מספר תוצאות מקסימלי')
+    search_parser.add_argument('--json', action='store_true', help='פלט JSON')
+
+    assemble_parser = commands.add_parser('assemble', help='הרכבת דף עבודה משאלות המאגר')
+    assemble_parser.add_argument('ids', nargs='+', type=int, help='מזהי שאלות לפי הסדר')
+    assemble_parser.add_argument('--title', required=True, help='כותרת דף העבודה')
+    assemble_parser.add_argument('--topic', default=None, help='נושא ל-front matter')
+    assemble_parser.add_argument('--output', '-o', default=None, help='קובץ פלט (ברירת מחדל: הדפסה)')
+    args = parser.parse_args()
+
+    bank = QuestionBank(db_path=args.db)
+    stats = bank.update()
+
+    if args.command == 'update':
+        sys.stdout.buffer.write(
+            f"✅ {stats['questions']} שאלות במאגר ({stats['updated']} דפים עודכנו, "
+            f"{stats['removed']} הוסרו)\n".encode('utf-8'))
+
+    elif args.command == 'search':
+        try:
+            results = bank.search(' '.join(args.query), grade=args.grade, topic=args.topic, limit=args.limit)
+        except (ValueError, sqlite3.OperationalError) as e:
+            parser.error(str(e))
+        if args.json:
+            sys.stdout.buffer.write(json.dumps(results, ensure_ascii=False, indent=2).encode('utf-8') + b'\n')
+        else:
+            for question in results:
+                snippet = question['text'][:90] + ('…' if len(question['text']) > 90 else '')
+                sys.stdout.buffer.write(
+                    f"#{question['id']:<5} {question['source']} | {question['label']}\n"
+                    f"       {snippet}\n".encode('utf-8'))
+            sys.stdout.buffer.write(f"\n🔎 {len(results)} שאלות\n".encode('utf-8'))
+
+    elif args.command == 'assemble':
+        try:
+            worksheet = bank.assemble(args.ids, args.title, topic=args.topic)
+        except KeyError as e:
+            parser.error(str(e.args[0]))
+        if args.output:
+            Path(args.output).write_text(worksheet, encoding='utf-8')
+            sys.stdout.buffer.write(f"✅ דף עבודה נוצר: {args.output}\n".encode('utf-8'))
+        else:
+            sys.stdout.buffer.write(worksheet.encode('utf-8'))
+
+    bank.close()
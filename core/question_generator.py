@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+מחולל שאלות פרמטרי - גרסאות שונות של דף שאלות המקדמים, עם מפתח תשובות לכל גרסה
+Parametric Question Generator - seeded worksheet variants with matching answer keys
+
+כל תבנית היא סיפור על פונקציה קווית y = ax + b: ערך התחלתי b וקצב שינוי קבוע
+לכל יחידה (a = כיוון × קצב). מכל תבנית נוצרות שאלות מכמה סוגים (המקדם, המספר
+החופשי, ערך y עבור x נתון, ערך x עבור y נתון). הדגימה של כל הפרמטרים וחישוב כל
+התשובות נעשים במערכי NumPy לכל הגרסאות והשאלות יחד, ואותו seed נותן תמיד אותן גרסאות.
+"""
+
+import sys
+import json
+from pathlib import Path
+from typing import Optional, List, Dict, Iterable
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# ---------- תבניות ----------
+# 'story' - הסיפור, עם {b} ו-{rate}; 'x', 'y' - מה מייצג כל משתנה
+# 'b', 'rate' - טווח דגימה (מינימום, מקסימום, צעד); 'direction' - 1 עולה, -1 יורד
+# 'x_max' - ערך x מקסימלי בשאלות חישוב (בתבנית יורדת - גם עד ש-y מגיע ל-0)
+TEMPLATES = {
+    'water_bottles': {
+        'story': 'תומר קונה חבילת מים ב-{b} שקלים ומוסיף {rate} שקלים לכל בקבוק נוסף שהוא קונה.',
+        'x': 'מספר הבקבוקים הנוספים', 'y': 'המחיר הכולל',
+        'b': (2, 20, 1), 'rate': (1, 9, 1), 'direction': 1, 'x_max': 10,
+    },
+    'pocket_money': {
+        'story': 'דוד מתחיל עם {b} שקלים בכיסו ומוציא {rate} שקלים כל יום.',
+        'x': 'מספר הימים', 'y': 'הכסף שנשאר',
+        'b': (40, 200, 10), 'rate': (2, 10, 1), 'direction': -1, 'x_max': 20,
+    },
+    'train_ticket': {
+        'story': 'שרה קונה כרטיס רכבת ב-{b} שקלים ועוד {rate} שקלים לכל תחנה נוספת.',
+        'x': 'מספר התחנות הנוספות', 'y': 'המחיר הכולל',
+        'b': (5, 30, 1), 'rate': (1, 5, 1), 'direction': 1, 'x_max': 12,
+    },
+    'runner': {
+        'story': 'מיכאל עומד במרחק {b} מטרים מקו הזינוק ומתחיל לרוץ במהירות של {rate} מטרים לשנייה.',
+        'x': 'מספר השניות', 'y': 'המרחק מקו הזינוק',
+        'b': (1, 10, 1), 'rate': (3, 9, 1), 'direction': 1, 'x_max': 15,
+    },
+    'phone_bill': {
+        'story': 'חשבון טלפון כולל תשלום קבוע של {b} שקלים ועוד {rate} שקלים לכל דקת שיחה.',
+        'x': 'מספר דקות השיחה', 'y': 'המחיר הכולל',
+        'b': (15, 60, 5), 'rate': (0.1, 0.9, 0.1), 'direction': 1, 'x_max': 100,
+    },
+    'water_tank': {
+        'story': 'מכל מים מכיל {b} ליטרים, וכל שעה שואבים ממנו {rate} ליטרים.',
+        'x': 'מספר השעות', 'y': 'כמות המים שנשארה',
+        'b': (60, 300, 10), 'rate': (3, 12, 1), 'direction': -1, 'x_max': 20,
+    },
+    'elevator': {
+        'story': 'מעלית מתחילה בקומה {b} ויורדת {rate} קומות כל דקה.',
+        'x': 'מספר הדקות', 'y': 'מספר הקומה',
+        'b': (10, 30, 1), 'rate': (1, 3, 1), 'direction': -1, 'x_max': 10,
+    },
+    'tree': {
+        'story': 'עץ מתחיל בגובה {b} מטרים וגדל {rate} מטרים כל חודש.',
+        'x': 'מספר החודשים', 'y': 'גובה העץ',
+        'b': (1, 5, 1), 'rate': (0.1, 0.5, 0.1), 'direction': 1, 'x_max': 12,
+    },
+    'temperature': {
+        'story': 'הטמפרטורה מתחילה ב-{b} מעלות ויורדת {rate} מעלות כל שעה.',
+        'x': 'מספר השעות', 'y': 'הטמפרטורה',
+        'b': (15, 35, 1), 'rate': (0.5, 3, 0.5), 'direction': -1, 'x_max': 10,
+    },
+    'savings': {
+        'story': 'חיסכון בבנק מתחיל ב-{b} שקלים וגדל ב-{rate} שקלים כל חודש.',
+        'x': 'מספר החודשים', 'y': 'סכום החיסכון',
+        'b': (100, 1000, 100), 'rate': (10, 100, 5), 'direction': 1, 'x_max': 24,
+    },
+    'battery': {
+        'story': 'מחשב מתחיל עם {b} אחוזים סוללה, וכל שעה יורדים {rate} אחוזים.',
+        'x': 'מספר השעות', 'y': 'אחוז הסוללה',
+        'b': (60, 100, 5), 'rate': (5, 20, 5), 'direction': -1, 'x_max': 10,
+    },
+    'classroom': {
+        'story': 'כיתה מתחילה עם {b} תלמידים ומגיעים {rate} תלמידים כל שבוע.',
+        'x': 'מספר השבועות', 'y': 'מספר התלמידים',
+        'b': (15, 30, 1), 'rate': (1, 3, 1), 'direction': 1, 'x_max': 8,
+    },
+}
+
+# סוגי השאלות - הניסוח אחרי הסיפור
+QUESTION_KINDS = {
+    'slope': 'מהו המקדם של $x$ במשוואה?',
+    'intercept': 'מהו המספר החופשי במשוואה, ומה הוא מייצג בסיפור?',
+    'value': 'מה יהיה {y} כאשר $x = {x0}$?',
+    'solve': 'עבור איזה ערך של $x$ יתקיים $y = {y1}$?',
+}
+
+ANSWER_LINE = '_' * 56
+
+
+def format_number(value: float) -> str:
+    """מספר לתצוגה: שלם בלי נקודה, עשרוני עד שתי ספרות"""
+    value = round(float(value), 2)
+    if value == int(value):
+        return str(int(value))
+    return f"{value:.2f}".rstrip('0')
+
+
+def format_linear(a: float, b: float) -> str:
+    """המשוואה y = ax + b בכתיב הרגיל: y = -x + 5, y = 3x, y = 0.5x - 2"""
+    if a == 1:
+        slope = 'x'
+    elif a == -1:
+        slope = '-x'
+    else:
+        slope = f"{format_number(a)}x"
+    if b == 0:
+        return f"y = {slope}"
+    sign = '+' if b > 0 else '-'
+    return f"y = {slope} {sign} {format_number(abs(b))}"
+
+
+class QuestionGenerator:
+    """יצירת גרסאות של דף שאלות מקדמים מתבניות, עם דגימה וחישוב וקטוריים"""
+
+    DEFAULT_TITLE = 'שאלות על מקדמים בפונקציה קווית'
+    DEFAULT_TOPIC = 'משמעות המקדמים בפונקציה קווית'
+
+    def __init__(self, templates: Optional[Dict[str, Dict]] = None,
+                 kinds: Optional[Iterable[str]] = None):
+        """
+        אתחול המחולל
+
+        Args:
+            templates: תבניות הסיפורים (ברירת מחדל: TEMPLATES)
+            kinds: סוגי השאלות לשימוש (ברירת מחדל: כל QUESTION_KINDS)
+        """
+        self.templates = dict(templates or TEMPLATES)
+        self.kinds = list(kinds or QUESTION_KINDS)
+        unknown = [kind for kind in self.kinds if kind not in QUESTION_KINDS]
+        if unknown:
+            raise ValueError(f"סוג שאלה לא מוכר: {', '.join(unknown)}")
+
+        self.template_names = list(self.templates)
+        specs = [self.templates[name] for name in self.template_names]
+        # טבלאות הפרמטרים של כל התבניות - לאינדוקס וקטורי לפי מספר תבנית
+        self._b_low, self._b_step, self._b_count = self._ranges([spec['b'] for spec in specs])
+        self._rate_low, self._rate_step, self._rate_count = self._ranges([spec['rate'] for spec in specs])
+        self._direction = np.array([spec['direction'] for spec in specs], dtype=float)
+        self._x_max = np.array([spec['x_max'] for spec in specs], dtype=float)
+
+    @staticmethod
+    def _ranges(ranges: List[tuple]):
+        low = np.array([r[0] for r in ranges], dtype=float)
+        step = np.array([r[2] for r in ranges], dtype=float)
+        high = np.array([r[1] for r in ranges], dtype=float)
+        count = np.floor((high - low) / step + 1e-9).astype(np.int64) + 1
+        return low, step, count
+
+    def sample(self, variants: int, questions: int, seed: int = 0) -> Dict[str, np.ndarray]:
+        """
+        דגימת כל הפרמטרים וחישוב כל התשובות, במערכים בגודל (גרסאות, שאלות)
+
+        בכל גרסה צירופי (תבנית, סוג שאלה) מעורבבים ונלקחים לפי הסדר, כך שצירוף
+        חוזר רק אחרי שכל הצירופים כבר הופיעו. התוצאה תלויה רק ב-seed ובמידות.
+        """
+        rng = np.random.default_rng(seed)
+        shape = (variants, questions)
+
+        combos = len(self.template_names) * len(self.kinds)
+        repeats = -(-questions // combos)
+        order = rng.permuted(np.tile(np.arange(combos), (variants, repeats)), axis=1)[:, :questions]
+        template = order // len(self.kinds)
+        kind = order % len(self.kinds)
+
+        b = np.round(self._b_low[template] + self._b_step[template] * rng.integers(0, self._b_count[template]), 2)
+        rate = np.round(self._rate_low[template]
+                        + self._rate_step[template] * rng.integers(0, self._rate_count[template]), 2)
+        a = self._direction[template] * rate
+
+        # בתבנית יורדת x מוגבל כך ש-y לא יורד מתחת ל-0
+        x_limit = np.where(a < 0, np.floor(b / rate + 1e-9), self._x_max[template])
+        x_limit = np.clip(np.minimum(x_limit, self._x_max[template]), 1, None).astype(np.int64)
+        x0 = 1 + rng.integers(0, x_limit, size=shape)
+        x1 = 1 + rng.integers(0, x_limit, size=shape)
+
+        return {
+            'template': template, 'kind': kind, 'a': a, 'b': b, 'rate': rate,
+            'x0': x0, 'value': np.round(a * x0 + b, 2),
+            'x1': x1, 'y1': np.round(a * x1 + b, 2),
+        }
+
+    def generate(self, variants: int, questions: int = 50, seed: int = 0) -> List[Dict]:
+        """
+        יצירת גרסאות של דף השאלות
+
+        Args:
+            variants: מספר הגרסאות (למשל אחת לכל תלמיד)
+            questions: מספר השאלות בכל גרסה
+            seed: זרע הדגימה - אותו seed ואותן מידות נותנים אותן גרסאות
+
+        Returns:
+            לכל גרסה: 'variant' (מספר מ-1), 'seed' ו-'questions' - רשימה של
+            {'template', 'kind', 'a', 'b', 'text', 'equation', 'answer'}
+        """
+        params = self.sample(variants, questions, seed)
+        columns = {name: values.tolist() for name, values in params.items()}
+
+        result = []
+        for v in range(variants):
+            items = []
+            for q in range(questions):
+                row = {name: columns[name][v][q] for name in columns}
+                items.append(self._render_question(row))
+            result.append({'variant': v + 1, 'seed': seed, 'questions': items})
+        return result
+
+    def _render_question(self, row: Dict) -> Dict:
+        """ניסוח שאלה ותשובה מפרמטרים שכבר נדגמו וחושבו"""
+        name = self.template_names[row['template']]
+        spec = self.templates[name]
+        kind = self.kinds[row['kind']]
+        a, b = row['a'], row['b']
+        equation = format_linear(a, b)
+
+        story = spec['story'].format(b=format_number(b), rate=format_number(row['rate']))
+        question = QUESTION_KINDS[kind].format(y=spec['y'], x0=row['x0'], y1=format_number(row['y1']))
+        text = f"{story} אם $x$ הוא {spec['x']} ו-$y$ הוא {spec['y']}, {question}"
+
+        if kind == 'slope':
+            change = 'גדל' if a > 0 else 'קטן'
+            answer = (f"המקדם של $x$ הוא ${format_number(a)}$ - {spec['y']} {change} "
+                      f"ב-{format_number(row['rate'])} בכל פעם ש-$x$ גדל ב-1.")
+        elif kind == 'intercept':
+            answer = f"המספר החופשי הוא ${format_number(b)}$ - הערך של {spec['y']} בהתחלה (כאשר $x = 0$)."
+        elif kind == 'value':
+            answer = (f"${format_number(a)} \\cdot {row['x0']} + {format_number(b)} = "
+                      f"{format_number(row['value'])}$")
+        else:
+            answer = (f"${format_linear(a, b)[4:]} = {format_number(row['y1'])}$, "
+                      f"ולכן $x = {row['x1']}$")
+
+        return {'template': name, 'kind': kind, 'a': a, 'b': b,
+                'text': text, 'equation': equation, 'answer': answer}
+
+    def to_markdown(self, variant: Dict, title: Optional[str] = None,
+                    student: Optional[str] = None) -> str:
+        """
+        דף עבודה ב-Markdown בפורמט של דפי העבודה הקיימים
+
+        Args:
+            variant: גרסה מ-generate
+            title: כותרת הדף
+            student: שם תלמיד/ה למילוי מראש בשורת השם (אופציונלי)
+        """
+        title = title or self.DEFAULT_TITLE
+        name_line = student or '_' * 48
+        lines = self._front_matter(title, variant) + [
+            f'# {title}',
+            '',
+            '## הוראות',
+            '',
+            '1. **קרא כל סיפור בעיון** - הבן מה מתאר כל משתנה ($x$ ו-$y$).',
+            '2. **כתוב את דרך הפתרון** בצורה קצרה וברורה תחת כל שאלה.',
+            '3. **בדוק שהתשובה הגיונית** - האם היא מתאימה לסיפור?',
+            '',
+            '---',
+            '',
+            f'**שם התלמיד/ה**: {name_line}',
+            '',
+            '**תאריך**: _______________',
+            '',
+        ]
+        for number, question in enumerate(variant['questions'], 1):
+            lines += [
+                '---', '',
+                f'### שאלה {number}', '',
+                question['text'], '',
+                '**דרך פתרון**:', '',
+                ANSWER_LINE, '',
+                ANSWER_LINE, '',
+                '**תשובה**: ___________', '',
+            ]
+        return '\n'.join(lines)
+
+    def answer_key_markdown(self, variant: Dict, title: Optional[str] = None) -> str:
+        """מפתח התשובות של גרסה - המשוואה והתשובה לכל שאלה"""
+        title = f"{title or self.DEFAULT_TITLE} - מפתח תשובות"
+        lines = self._front_matter(title, variant) + [f'# {title}', '']
+        for number, question in enumerate(variant['questions'], 1):
+            lines += [
+                f'### שאלה {number}', '',
+                f"**משוואה**: ${question['equation']}$", '',
+                f"**תשובה**: {question['answer']}", '',
+            ]
+        return '\n'.join(lines)
+
+    def _front_matter(self, title: str, variant: Dict) -> List[str]:
+        return [
+            '---',
+            f'title: "{title}"',
+            'subject: "אלגברה"',
+            'grade: "כיתה ח"',
+            f'topic: "{self.DEFAULT_TOPIC}"',
+            f'variant: {variant["variant"]}',
+            f'seed: {variant["seed"]}',
+            '---',
+            '',
+        ]
+
+    def write_batch(self, variants: int, output_dir: str, questions: int = 50, seed: int = 0,
+                    title: Optional[str] = None, students: Optional[List[str]] = None) -> List[Dict]:
+        """
+        כתיבת כל הגרסאות ומפתחות התשובות לתיקייה
+
+        Args:
+            variants: מספר הגרסאות (אם יש students - לפחות מספר התלמידים)
+            output_dir: תיקיית הפלט
+            questions: מספר השאלות בכל גרסה
+            seed: זרע הדגימה
+            title: כותרת הדפים
+            students: שמות תלמידים - גרסה i נכתבת עם השם i ממולא מראש
+
+        Returns:
+            לכל גרסה: 'variant', 'worksheet', 'key' (נתיבים)
+        """
+        students = list(students or [])
+        variants = max(variants, len(students))
+        output = Path(output_dir)
+        output.mkdir(parents=True, exist_ok=True)
+
+        written = []
+        for variant in self.generate(variants, questions, seed):
+            index = variant['variant']
+            student = students[index - 1] if index <= len(students) else None
+            worksheet = output / f"variant_{index:02d}.md"
+            key = output / f"variant_{index:02d}_key.md"
+            worksheet.write_text(self.to_markdown(variant, title, student), encoding='utf-8')
+            key.write_text(self.answer_key_markdown(variant, title), encoding='utf-8')
+            written.append({'variant': index, 'worksheet': worksheet, 'key': key})
+        return written
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+    parser = argparse.ArgumentParser(
+        description='יצירת גרסאות של דף שאלות מקדמים עם מפתח תשובות',
+        epilog='דוגמאות:\n'
+               '  python core/question_generator.py --variants 40 --seed 7 -o generated\n'
+               '  python core/question_generator.py --variants 40 -o generated --pdf --jobs 8',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--variants', '-n', type=int, default=1, help='מספר גרסאות')
+    parser.add_argument('--questions', '-q', type=int, default=50, help='מספר שאלות בכל גרסה')
+    parser.add_argument('--seed', type=int, default=0, help='זרע הדגימה')
+    parser.add_argument('--title', default=None, help='כותרת הדפים')
+    parser.add_argument('--students', default=None,
+                        help='קובץ עם שם תלמיד/ה בכל שורה - גרסה אחת לכל שם, עם השם ממולא')
+    parser.add_argument('--output-dir', '-o', default='generated', help='תיקיית פלט')
+    parser.add_argument('--pdf', action='store_true', help='יצירת PDF לכל גרסה ומפתח')
+    parser.add_argument('--jobs', '-j', type=int, default=None, help='מספר תהליכים ליצירת PDF')
+    parser.add_argument('--json', action='store_true', help='הדפסת הגרסאות כ-JSON במקום כתיבת קבצים')
+    args = parser.parse_args()
+
+    generator = QuestionGenerator()
+    if args.json:
+        variants = generator.generate(args.variants, args.questions, args.seed)
+        sys.stdout.buffer.write(json.dumps(variants, ensure_ascii=False, indent=2).encode('utf-8') + b'\n')
+        sys.exit(0)
+
+    students = None
+    if args.students:
+        students = [line.strip() for line in Path(args.students).read_text(encoding='utf-8').splitlines()
+                    if line.strip()]
+
+    start = time.perf_counter()
+    written = generator.write_batch(args.variants, args.output_dir, args.questions, args.seed,
+                                    args.title, students)
+    sys.stdout.buffer.write(
+        f"✅ {len(written)} גרסאות ומפתחות נכתבו ל-{args.output_dir} "
+        f"({time.perf_counter() - start:.2f}s)\n".encode('utf-8'))
+
+    if args.pdf:
+        from core.pdf_engine import PDFEngine
+        paths = [path for item in written for path in (item['worksheet'], item['key'])]
+        results = PDFEngine().generate_many(paths, jobs=args.jobs)
+        failed = [result for result in results if result['error']]
+        for result in failed:
+            sys.stderr.buffer.write(f"❌ {result['input']}: {result['error']}\n".encode('utf-8'))
+        sys.stdout.buffer.write(
+            f"📄 {len(results) - len(failed)}/{len(results)} קבצי PDF נוצרו\n".encode('utf-8'))
+        sys.exit(1 if failed else 0)
@@ -5,23 +5,301 @@
 Worksheet Validator - Automatic quality checks for worksheets
 """
 
+import os
 import sys
 import re
+import json
+import time
+import pickle
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional, Iterable
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from core.build_cache import BuildCache
 
 # Ensure UTF-8 encoding
 if sys.stdout.encoding != 'utf-8':
     sys.stdout.reconfigure(encoding='utf-8')
 
 
+class WorksheetOutline:
+    """
+    מתאר של דף עבודה - כל מה שהבדיקות צריכות, נאסף במעבר אחד על שורות המסמך
+
+    הבדיקות של WorksheetValidator הן כללים על המתאר ואינן סורקות את הטקסט
+    מחדש, כך שזמן הבדיקה ליניארי באורך דף העבודה גם במאות שאלות.
+    """
+
+    HEBREW_CHAR_RE = re.compile(r'[\u0590-\u05FF]')
+    QUESTION_MARKER_RE = re.compile(r'###\s*\([א-ת]\)')
+    MARKER_CONTINUATION_RE = re.compile(r'\s*\([א-ת]\)')
+    NUMBERED_LINE_RE = re.compile(r'\d+\.')
+    ANSWER_PROMPT_RE = re.compile(r'דרך פתרון|הסבר|נימוק')
+    ANSWER_BLANK_RE = re.compile(r'[_ ]+')
+    SOLUTION_RE = re.compile(r'תשובה:|פתרון:|דוגמה פתורה', re.IGNORECASE)
+    ADVANCED_TOPICS = ('נגזרת', 'אינטגרל', 'לוגריתם', 'מטריצה')
+
+    # חלקי המתאר שכלל בדיקה יכול לבקש - רק החלקים שהכללים הפעילים צריכים נאספים
+    FEATURES = ('headings', 'questions', 'instructions', 'answer_blanks', 'hebrew',
+                'content_flags', 'front_matter')
+
+    def __init__(self, content: str, features: Optional[Iterable[str]] = None):
+        """
+        בניית המתאר
+
+        Args:
+            content: תוכן ה-Markdown של דף העבודה
+            features: חלקי המתאר לאיסוף (ראו FEATURES; ברירת מחדל: כולם)
+        """
+        self.features = set(self.FEATURES if features is None else features)
+        unknown = self.features - set(self.FEATURES)
+        if unknown:
+            raise ValueError(f"חלקי מתאר לא מוכרים: {', '.join(sorted(unknown))}")
+
+        # שדות ה-front matter (למשל grade) - מחרוזות בלי מירכאות
+        self.front_matter: Dict[str, str] = {}
+        # כותרות: (רמה, מספר שורה, טקסט) - רמות 1-3
+        self.headings: List[Tuple[int, int, str]] = []
+        # שאלות בתחילת שורה: ### (א) ..., ושורות ממוספרות: 1. ...
+        self.lettered_questions = 0
+        self.numbered_lines = 0
+        self.has_instructions = False
+        # שורות תשובה: (מילת הפתיחה בשורה הקודמת, רצף הקווים והרווחים)
+        self.answer_blanks: List[Tuple[str, str]] = []
+        # לכל סעיף אחרי סימון ### (א): אורך השורה האחרונה שאינה ריקה בסעיף
+        self.section_tails: List[int] = []
+        self.hebrew_chars = 0
+        self.has_solutions = False
+        self.has_hints = False
+        self.advanced_topics: List[str] = []
+
+        # '###' בסוף שורה שה-(א) שלו אולי בשורה הבאה: (קטע השורה, מיקום ה-###, בתחילת שורה?)
+        self._open_marker: Optional[Tuple[str, int, bool]] = None
+        self._tokenize(content)
+
+    def heading_count(self, level: int) -> int:
+        """מספר הכותרות ברמה נתונה"""
+        return sum(1 for heading_level, _, _ in self.headings if heading_level == level)
+
+    def _tokenize(self, content: str):
+        """מעבר יחיד על השורות"""
+        lines = content.split('\n')
+        last_index = len(lines) - 1
+        pending_prompt = None
+        topics_found = set()
+
+        want_headings = 'headings' in self.features
+        want_questions = 'questions' in self.features
+        want_instructions = 'instructions' in self.features
+        want_answer_blanks = 'answer_blanks' in self.features
+        want_hebrew = 'hebrew' in self.features
+        want_content_flags = 'content_flags' in self.features
+        in_front_matter = 'front_matter' in self.features and lines[0] == '---'
+
+        for index, line in enumerate(lines):
+            if not line:
+                # שורה ריקה - רק מנתקת שורת תשובה משורת הפתיחה שלפניה
+                pending_prompt = None
+                continue
+
+            if in_front_matter and index > 0:
+                if line == '---':
+                    in_front_matter = False
+                else:
+                    self._read_front_matter(line)
+
+            if want_headings and line[0] == '#':
+                self._read_heading(line, index, index == last_index)
+            if want_questions:
+                if '###' in line or self.section_tails or self._open_marker is not None:
+                    self._read_question_markers(line)
+                if self.NUMBERED_LINE_RE.match(line):
+                    self.numbered_lines += 1
+
+            # שורת תשובה: רצף קווים/רווחים בתחילת השורה שאחרי "דרך פתרון"/"הסבר"/"נימוק"
+            if want_answer_blanks:
+                scan_start = 0
+                if pending_prompt is not None:
+                    blank = self.ANSWER_BLANK_RE.match(line)
+                    if blank:
+                        self.answer_blanks.append((pending_prompt, blank.group()))
+                        scan_start = blank.end()
+                prompt = self.ANSWER_PROMPT_RE.search(line, scan_start)
+                pending_prompt = prompt.group() if prompt else None
+
+            if want_hebrew:
+                self.hebrew_chars += len(self.HEBREW_CHAR_RE.findall(line))
+            if want_instructions and not self.has_instructions and 'הוראות' in line:
+                self.has_instructions = True
+            if want_content_flags:
+                if not self.has_solutions and self.SOLUTION_RE.search(line):
+                    self.has_solutions = True
+                if not self.has_hints and ('רמז:' in line or 'hint:' in line.lower()):
+                    self.has_hints = True
+                for topic in self.ADVANCED_TOPICS:
+                    if topic in line:
+                        topics_found.add(topic)
+
+        if self._open_marker is not None:
+            self._extend_section(self._open_marker[0])
+        self.advanced_topics = [topic for topic in self.ADVANCED_TOPICS if topic in topics_found]
+
+    def _read_front_matter(self, line: str):
+        """שדה front matter בצורת key: value"""
+        key, separator, value = line.partition(':')
+        if separator and key.strip():
+            self.front_matter[key.strip()] = value.strip().strip('"\'')
+
+    def _read_heading(self, line: str, index: int, is_last: bool):
+        """רישום כותרת: # ואחריהם רווח (שורה של # בלבד נחשבת כשאחריה יש שורה נוספת)"""
+        level = len(line) - len(line.lstrip('#'))
+        if level > 3:
+            return
+        if len(line) > level:
+            if not line[level].isspace():
+                return
+        elif is_last:
+            return
+        self.headings.append((level, index + 1, line[level:].strip()))
+
+    def _read_question_markers(self, line: str):
+        """
+        סימוני שאלה ### (א) - בתחילת שורה נספרים כשאלה, וכל סימון פותח סעיף חדש.
+        רווח בין ה-### ל-(א) יכול לכלול גם מעברי שורה, כמו \s בביטוי הרגולרי.
+        """
+        piece_start = 0
+        if self._open_marker is not None:
+            if not line.strip():
+                return
+            open_piece, marker_start, at_line_start = self._open_marker
+            self._open_marker = None
+            continued = self.MARKER_CONTINUATION_RE.match(line)
+            if continued:
+                self._extend_section(open_piece[:marker_start])
+                self.section_tails.append(0)
+                if at_line_start:
+                    self.lettered_questions += 1
+                piece_start = continued.end()
+            else:
+                self._extend_section(open_piece)
+
+        markers = list(self.QUESTION_MARKER_RE.finditer(line, piece_start)) if '###' in line else []
+        if markers and markers[0].start() == 0:
+            self.lettered_questions += 1
+        for marker in markers:
+            self._extend_section(line[piece_start:marker.start()])
+            self.section_tails.append(0)
+            piece_start = marker.end()
+
+        piece = line[piece_start:]
+        stripped = piece.rstrip()
+        if stripped.endswith('###'):
+            self._open_marker = (piece, len(stripped) - 3, piece_start == 0 and len(stripped) == 3)
+        else:
+            self._extend_section(piece)
+
+    def _extend_section(self, piece: str):
+        """עדכון סוף הסעיף הנוכחי בקטע שורה ששייך אליו"""
+        tail = piece.rstrip()
+        if tail and self.section_tails:
+            self.section_tails[-1] = len(tail)
+
+
 class WorksheetValidator:
     """בודק איכות אוטומטי לדפי עבודה"""
 
-    def __init__(self):
-        """אתחול בודק"""
+    # יש להעלות את הגרסה בכל שינוי בבדיקות - תוצאות שמורות מגרסה אחרת אינן בשימוש
+    RULES_VERSION = '1'
+    DEFAULT_CACHE_DIR = '.cache/validation'
+
+    # כללי הבדיקה לפי סדר הרצתם: שם -> מילון עם
+    #   'check' - שם מתודה, או פונקציה (validator, outline) שמוסיפה ל-errors/warnings
+    #   'needs' - חלקי המתאר שהכלל קורא (ראו WorksheetOutline.FEATURES)
+    #   'grades' - ערכי grade ב-front matter שהכלל חל עליהם (ללא - כל הכיתות)
+    #   'version' - גרסת הכלל, חלק ממפתח מטמון התוצאות (ללא - RULES_VERSION)
+    RULES = {
+        'structure': {'check': '_check_structure', 'needs': ('headings', 'instructions', 'questions')},
+        'writing_space': {'check': '_check_writing_space', 'needs': ('answer_blanks', 'questions')},
+        'rtl_hebrew': {'check': '_check_rtl_hebrew', 'needs': ('hebrew',)},
+        'design_consistency': {'check': '_check_design_consistency', 'needs': ('headings',)},
+        'pedagogical_content': {'check': '_check_pedagogical_content', 'needs': ('content_flags',)},
+    }
+    BUILTIN_RULES = RULES
+
+    def __init__(self, cache_dir: Optional[str] = None, use_cache: bool = True,
+                 skip_rules: Iterable[str] = ()):
+        """
+        אתחול בודק
+
+        Args:
+            cache_dir: תיקיית מטמון התוצאות של validate_many (ברירת מחדל: .cache/validation)
+            use_cache: האם לשמור ולקרוא תוצאות לפי גיבוב תוכן הקובץ
+            skip_rules: שמות כללים שלא יורצו
+        """
         self.errors = []
         self.warnings = []
+        self.cache_dir = Path(cache_dir or self.DEFAULT_CACHE_DIR)
+        self.use_cache = use_cache
+
+        self.skip_rules = tuple(skip_rules)
+        unknown = set(self.skip_rules) - set(self.RULES)
+        if unknown:
+            raise ValueError(f"כללים לא מוכרים: {', '.join(sorted(unknown))}")
+        self.rules = {name: rule for name, rule in self.RULES.items() if name not in self.skip_rules}
+        self.features = {feature for rule in self.rules.values() for feature in rule.get('needs', ())}
+        if any(rule.get('grades') for rule in self.rules.values()):
+            self.features.add('front_matter')
+
+        # זמן ריצה ומספר ממצאים לכל כלל, מצטבר על כל הבדיקות של המופע;
+        # 'outline' הוא המעבר על המסמך עצמו
+        self.rule_stats: Dict[str, Dict] = {}
+
+    @classmethod
+    def register_rule(cls, name: str, check, needs: Iterable[str] = (),
+                      grades: Optional[Iterable[str]] = None, version: str = '1'):
+        """
+        רישום כלל בדיקה נוסף - רץ אחרי הכללים הקיימים בכל מופע חדש
+
+        Args:
+            name: שם הכלל (מופיע בפרופיל ובשמות שאפשר לדלג עליהם)
+            check: פונקציה (validator, outline) שמוסיפה ל-validator.errors/warnings
+            needs: חלקי המתאר שהכלל קורא (ראו WorksheetOutline.FEATURES)
+            grades: ערכי grade ב-front matter שהכלל חל עליהם, למשל ['כיתה ח'] (ברירת מחדל: כולם)
+            version: גרסת הכלל - יש להעלות בכל שינוי כדי לבטל תוצאות שמורות
+
+        בבדיקה במקביל (validate_many עם jobs > 1) הכלל מועבר לתהליכים העובדים,
+        ולכן check צריכה להיות פונקציה ברמת מודול שאפשר לייבא (לא lambda או פונקציה פנימית).
+        """
+        unknown = set(needs) - set(WorksheetOutline.FEATURES)
+        if unknown:
+            raise ValueError(f"חלקי מתאר לא מוכרים: {', '.join(sorted(unknown))}")
+        cls.RULES = {**cls.RULES, name: {
+            'check': check, 'needs': tuple(needs),
+            'grades': tuple(grades) if grades else None, 'version': version
+        }}
+
+    def registered_rules(self) -> Dict[str, Dict]:
+        """
+        הכללים הפעילים שנרשמו בזמן ריצה (register_rule) - תהליך עובד שהתחיל ב-spawn
+        מייבא את המודול מחדש ומכיר רק את הכללים המובנים, ולכן הם מועברים אליו
+
+        Raises:
+            ValueError: אם כלל כזה אינו ניתן להעברה לתהליך אחר
+        """
+        registered = {name: rule for name, rule in self.rules.items()
+                      if self.BUILTIN_RULES.get(name) is not rule}
+        for name, rule in registered.items():
+            try:
+                pickle.dumps(rule)
+            except (pickle.PicklingError, AttributeError, TypeError) as e:
+                raise ValueError(f"הכלל {name} אינו ניתן להעברה לתהליכים עובדים ({e}) - "
+                                 f"יש לרשום פונקציה ברמת מודול, או לבדוק עם jobs=1") from e
+        return registered
+
+    def rules_signature(self) -> str:
+        """מזהה הכללים הפעילים וגרסאותיהם - חלק ממפתח מטמון התוצאות"""
+        return ','.join(f"{name}:{rule.get('version', self.RULES_VERSION)}" for name, rule in self.rules.items())
 
     def validate(self, markdown_file: Path) -> Tuple[List[str], List[str]]:
         """
@@ -37,49 +315,87 @@ class WorksheetValidator:
             self.errors.append(f"קובץ לא נמצא: {markdown_file}")
             return self.errors, self.warnings
 
-        content = markdown_file.read_text(encoding='utf-8')
+        return self.validate_content(markdown_file.read_text(encoding='utf-8'))
 
-        # בדיקות מבנה
-        self._check_structure(content)
-
-        # בדיקת מקום לכתיבה
-        self._check_writing_space(content)
-
-        # בדיקת RTL ועברית
-        self._check_rtl_hebrew(content)
+    def validate_content(self, content: str) -> Tuple[List[str], List[str]]:
+        """
+        בדיקת איכות של תוכן דף עבודה (ראו validate)
 
-        # בדיקת עקביות עיצוב
-        self._check_design_consistency(content)
+        Returns:
+            (רשימת שגיאות, רשימת אזהרות)
+        """
+        self.errors = []
+        self.warnings = []
 
-        # בדיקת תוכן פדגוגי
-        self._check_pedagogical_content(content)
+        start = time.perf_counter()
+        outline = WorksheetOutline(content, self.features)
+        self._record_rule_stats('outline', time.perf_counter() - start, 0)
+
+        grade = outline.front_matter.get('grade')
+        for name, rule in self.rules.items():
+            if rule.get('grades') and grade not in rule['grades']:
+                continue
+
+            findings_before = len(self.errors) + len(self.warnings)
+            start = time.perf_counter()
+            check = rule['check']
+            if isinstance(check, str):
+                getattr(self, check)(outline)
+            else:
+                check(self, outline)
+            self._record_rule_stats(name, time.perf_counter() - start,
+                                    len(self.errors) + len(self.warnings) - findings_before)
 
         return self.errors, self.warnings
 
-    def _check_structure(self, content: str):
+    def _record_rule_stats(self, name: str, seconds: float, hits: int):
+        """צבירת זמן ריצה וממצאים של כלל"""
+        stats = self.rule_stats.setdefault(name, {'calls': 0, 'seconds': 0.0, 'hits': 0})
+        stats['calls'] += 1
+        stats['seconds'] += seconds
+        stats['hits'] += hits
+
+    @staticmethod
+    def merge_rule_stats(stats_list: Iterable[Dict[str, Dict]]) -> Dict[str, Dict]:
+        """איחוד סטטיסטיקות כללים (למשל מתהליכים עובדים שונים)"""
+        merged: Dict[str, Dict] = {}
+        for stats in stats_list:
+            for name, entry in stats.items():
+                total = merged.setdefault(name, {'calls': 0, 'seconds': 0.0, 'hits': 0})
+                for field in total:
+                    total[field] += entry[field]
+        return merged
+
+    @staticmethod
+    def format_rule_profile(rule_stats: Dict[str, Dict]) -> str:
+        """טבלת פרופיל הכללים, מהאיטי למהיר"""
+        lines = [f"{'כלל':<22}{'הרצות':>8}{'סה״כ ms':>12}{'ממוצע µs':>12}{'ממצאים':>9}"]
+        for name, entry in sorted(rule_stats.items(), key=lambda item: -item[1]['seconds']):
+            mean_us = entry['seconds'] / entry['calls'] * 1e6 if entry['calls'] else 0.0
+            lines.append(f"{name:<22}{entry['calls']:>8}{entry['seconds'] * 1000:>12.2f}"
+                         f"{mean_us:>12.1f}{entry['hits']:>9}")
+        return '\n'.join(lines)
+
+    def _check_structure(self, outline: WorksheetOutline):
         """בדיקת מבנה דף העבודה"""
         # חובה: כותרת
-        if not re.search(r'^#\s+', content, re.MULTILINE):
+        if not outline.heading_count(1):
             self.warnings.append("לא נמצאה כותרת ראשית (# ...)")
 
         # חובה: הוראות
-        if '## הוראות' not in content and 'הוראות' not in content:
+        if not outline.has_instructions:
             self.warnings.append("לא נמצאו הוראות לתלמידים")
 
         # בדיקת מספיק שאלות
-        question_count = len(re.findall(r'^###\s*\([א-ת]\)', content, re.MULTILINE))
-        if question_count == 0:
-            question_count = len(re.findall(r'^\d+\.', content, re.MULTILINE))
+        question_count = outline.lettered_questions or outline.numbered_lines
 
         if question_count < 3:
             self.warnings.append(f"מספר שאלות נמוך: {question_count}")
 
-    def _check_writing_space(self, content: str):
+    def _check_writing_space(self, outline: WorksheetOutline):
         """בדיקת מקום מספיק לכתיבה"""
-        # חיפוש "דרך פתרון" או "הסבר"
-        solution_blocks = re.findall(r'(דרך פתרון|הסבר|נימוק)[^\n]*\n([_ ]+)', content, re.MULTILINE)
-
-        for match_type, space in solution_blocks:
+        # שורת קווים אחרי "דרך פתרון" או "הסבר"
+        for match_type, space in outline.answer_blanks:
             lines = space.count('\n')
             underscores = space.count('_')
 
@@ -88,49 +404,136 @@ class WorksheetValidator:
                 self.warnings.append(f"מקום לכתיבה קטן מדי בסעיף '{match_type}': {lines} שורות, {underscores} תווים")
 
         # בדיקה: מספיק שורות ריקות אחרי שאלות
-        question_sections = re.split(r'###\s*\([א-ת]\)', content)
-        for i, section in enumerate(question_sections[1:], 1):  # התעלם מהחלק הראשון
-            trailing_lines = len(section.rstrip().split('\n')[-1]) if section.rstrip() else 0
+        for i, trailing_lines in enumerate(outline.section_tails, 1):
             if trailing_lines < 3:
                 self.warnings.append(f"סעיף ({chr(0x05D0 + i - 1)}): מקום לכתיבה קטן מדי אחרי השאלה")
 
-    def _check_rtl_hebrew(self, content: str):
+    def _check_rtl_hebrew(self, outline: WorksheetOutline):
         """בדיקת RTL ועברית"""
         # בדיקת תווים עבריים
-        hebrew_chars = len(re.findall(r'[\u0590-\u05FF]', content))
-        if hebrew_chars < 100:
-            self.warnings.append(f"תוכן עברי מועט: {hebrew_chars} תווים עבריים")
+        if outline.hebrew_chars < 100:
+            self.warnings.append(f"תוכן עברי מועט: {outline.hebrew_chars} תווים עבריים")
 
         # בדיקת LTR לא תקין (אנגלית במקום לא נכון)
         # לא נבדוק יותר מדי כדי לא להתלונן על נוסחאות LaTeX
 
-    def _check_design_consistency(self, content: str):
+    def _check_design_consistency(self, outline: WorksheetOutline):
         """בדיקת עקביות עיצוב"""
-        # בדיקת שימוש עקבי בכותרות
-        h1_count = len(re.findall(r'^#\s+', content, re.MULTILINE))
-        h2_count = len(re.findall(r'^##\s+', content, re.MULTILINE))
-        h3_count = len(re.findall(r'^###\s+', content, re.MULTILINE))
-
         # חובה: כותרת ראשית אחת
+        h1_count = outline.heading_count(1)
         if h1_count != 1:
             self.warnings.append(f"מספר כותרות ראשיות שונה מ-1: {h1_count}")
 
-    def _check_pedagogical_content(self, content: str):
+    def _check_pedagogical_content(self, outline: WorksheetOutline):
         """בדיקת תוכן פדגוגי"""
         # אסור: פתרונות
-        if re.search(r'(תשובה:|פתרון:|דוגמה פתורה)', content, re.IGNORECASE):
+        if outline.has_solutions:
             self.errors.append("נמצאו פתרונות או תשובות - זה אסור לפי EXTREME PROMPT")
 
         # אסור: רמזים מובהקים
-        if 'רמז:' in content or 'hint:' in content.lower():
+        if outline.has_hints:
             self.warnings.append("נמצאו רמזים - זה אסור לפי EXTREME PROMPT")
 
         # בדיקה: שאלות מתאימות לכיתה ח'
         # לא נבדוק כאן בפירוט, אבל נבדוק שלא נמצא חומר מתקדם מדי
-        advanced_topics = ['נגזרת', 'אינטגרל', 'לוגריתם', 'מטריצה']
-        for topic in advanced_topics:
-            if topic in content:
-                self.warnings.append(f"נמצא נושא מתקדם: {topic} - יתכן שלא מתאים לכיתה ח'")
+        for topic in outline.advanced_topics:
+            self.warnings.append(f"נמצא נושא מתקדם: {topic} - יתכן שלא מתאים לכיתה ח'")
+
+    def validate_many(self, markdown_files: Iterable[Path], jobs: Optional[int] = None) -> List[Dict]:
+        """
+        בדיקת קבוצת דפי עבודה - רק קבצים שהשתנו נבדקים, במקביל במאגר תהליכים
+
+        התוצאה של כל קובץ נשמרת לפי גיבוב התוכן שלו וגרסת הבדיקות, כך שקובץ
+        שלא השתנה (גם אם הועבר או שוכפל) אינו נבדק שוב.
+
+        Args:
+            markdown_files: נתיבים לקבצי Markdown
+            jobs: מספר תהליכים לקבצים שאינם במטמון (ברירת מחדל: מספר הליבות)
+
+        Returns:
+            רשימת תוצאות לפי סדר הקלט, כל אחת מילון עם המפתחות
+            'file', 'errors', 'warnings', 'cached', 'seconds'
+        """
+        results = []
+        pending = []  # (מיקום בתוצאות, מפתח מטמון, נתיב)
+        for markdown_file in markdown_files:
+            path = Path(markdown_file)
+            start = time.perf_counter()
+            if not path.is_file():
+                results.append({'file': str(path), 'errors': [f"קובץ לא נמצא: {path}"], 'warnings': [],
+                                'cached': False, 'seconds': 0.0})
+                continue
+
+            key = BuildCache.make_key(self.RULES_VERSION, self.rules_signature(), path.read_bytes())
+            cached = self._load_cached(key)
+            if cached is not None:
+                results.append({'file': str(path), 'errors': cached['errors'], 'warnings': cached['warnings'],
+                                'cached': True, 'seconds': time.perf_counter() - start})
+            else:
+                results.append(None)
+                pending.append((len(results) - 1, key, str(path)))
+
+        if not pending:
+            return results
+
+        paths = [path for _, _, path in pending]
+        jobs = min(jobs or os.cpu_count() or 1, len(paths))
+        if jobs == 1:
+            fresh = [_validate_batch_task(self, path) for path in paths]
+        else:
+            # בדיקת קובץ זולה - מנות גדולות חוסכות את התקורה של העברה לתהליך לכל קובץ
+            chunksize = max(1, len(paths) // (jobs * 4))
+            with ProcessPoolExecutor(max_workers=jobs, initializer=_init_validator_worker,
+                                     initargs=(self.skip_rules, self.registered_rules())) as executor:
+                fresh = list(executor.map(_validate_worker_task, paths, chunksize=chunksize))
+
+        for (position, key, _), result in zip(pending, fresh):
+            self._store_cached(key, result['errors'], result['warnings'])
+            results[position] = result
+        if jobs > 1:
+            # בתהליך יחיד הסטטיסטיקה כבר נצברה במופע הזה
+            self.rule_stats = self.merge_rule_stats([self.rule_stats] + [r['rule_stats'] for r in fresh])
+        return results
+
+    @classmethod
+    def summary(cls, results: List[Dict]) -> Dict:
+        """סיכום קריא-מכונה של תוצאות validate_many"""
+        return {
+            'rules_version': cls.RULES_VERSION,
+            'files': len(results),
+            'failed': sum(1 for result in results if result['errors']),
+            'with_warnings': sum(1 for result in results if result['warnings']),
+            'cached': sum(1 for result in results if result['cached']),
+            'results': [
+                {'file': result['file'], 'errors': result['errors'], 'warnings': result['warnings'],
+                 'cached': result['cached']}
+                for result in results
+            ],
+        }
+
+    def _cache_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def _load_cached(self, key: str) -> Optional[Dict]:
+        """טעינת תוצאת בדיקה שמורה"""
+        if not self.use_cache:
+            return None
+        try:
+            entry = json.loads(self._cache_path(key).read_text(encoding='utf-8'))
+            return {'errors': entry['errors'], 'warnings': entry['warnings']}
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _store_cached(self, key: str, errors: List[str], warnings: List[str]):
+        """שמירת תוצאת בדיקה (כתיבה אטומית)"""
+        if not self.use_cache:
+            return
+        path = self._cache_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+        tmp_path.write_text(json.dumps({'errors': errors, 'warnings': warnings}, ensure_ascii=False),
+                            encoding='utf-8')
+        tmp_path.replace(path)
 
     def print_report(self, markdown_file: Path):
         """הדפסת דוח בדיקה"""
@@ -159,13 +562,114 @@ class WorksheetValidator:
         return len(errors) == 0
 
 
+# הבודק של תהליך עובד במאגר - נוצר פעם אחת לכל תהליך
+_batch_validator: Optional[WorksheetValidator] = None
+
+
+def _init_validator_worker(skip_rules: Tuple[str, ...], registered_rules: Dict[str, Dict]):
+    """אתחול תהליך עובד: רישום הכללים שנוספו בזמן ריצה ויצירת בודק שישמש את כל הקבצים של התהליך"""
+    global _batch_validator
+    for name, rule in registered_rules.items():
+        WorksheetValidator.RULES = {**WorksheetValidator.RULES, name: rule}
+    _batch_validator = WorksheetValidator(use_cache=False, skip_rules=skip_rules)
+
+
+def _validate_worker_task(path: str) -> Dict:
+    """בדיקת קובץ בתהליך עובד עם הבודק של התהליך"""
+    return _validate_batch_task(_batch_validator, path)
+
+
+def _validate_batch_task(validator: WorksheetValidator, path: str) -> Dict:
+    """בדיקת קובץ אחד מתוך אצווה - שגיאת קריאה מוחזרת כתוצאה ולא נזרקת"""
+    start = time.perf_counter()
+    stats_before = {name: dict(entry) for name, entry in validator.rule_stats.items()}
+    try:
+        errors, warnings = validator.validate(Path(path))
+    except Exception as e:
+        errors, warnings = [f"שגיאה בקריאת הקובץ: {e}"], []
+
+    rule_stats = {}
+    for name, entry in validator.rule_stats.items():
+        before = stats_before.get(name, {'calls': 0, 'seconds': 0.0, 'hits': 0})
+        if entry['calls'] > before['calls']:
+            rule_stats[name] = {field: entry[field] - before[field] for field in entry}
+
+    return {
+        'file': path,
+        'errors': list(errors),
+        'warnings': list(warnings),
+        'cached': False,
+        'seconds': time.perf_counter() - start,
+        'rule_stats': rule_stats
+    }
+
+
 if __name__ == '__main__':
-    import sys
-    if len(sys.argv) < 2:
-        print("שימוש: python worksheet_validator.py <קובץ_markdown>")
-        sys.exit(1)
-
-    validator = WorksheetValidator()
-    markdown_file = Path(sys.argv[1])
-    is_valid = validator.print_report(markdown_file)
-    sys.exit(0 if is_valid else 1)
+    import argparse
+    parser = argparse.ArgumentParser(
+        description='בדיקת איכות של דפי עבודה',
+        epilog='דוגמאות:\n'
+               '  python core/worksheet_validator.py worksheets/grade-8/kavba_a1_graph_reading.md\n'
+               '  python core/worksheet_validator.py --all worksheets --jobs 8 --json',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('files', nargs='*', help='קבצי Markdown לבדיקה')
+    parser.add_argument('--all', metavar='DIR', action='append', default=[],
+                        help='בדיקת כל קבצי ה-Markdown בתיקייה (רקורסיבית)')
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+                        help='מספר תהליכים במקביל (ברירת מחדל: מספר הליבות)')
+    parser.add_argument('--json', action='store_true',
+                        help='הדפסת סיכום JSON במקום דוח קריא')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='בדיקה מחדש של כל קובץ, בלי מטמון התוצאות')
+    parser.add_argument('--cache-dir', default=None,
+                        help='תיקיית מטמון התוצאות (ברירת מחדל: .cache/validation)')
+    parser.add_argument('--skip-rule', action='append', default=[], metavar='NAME',
+                        choices=list(WorksheetValidator.RULES),
+                        help='דילוג על כלל בדיקה (אפשר לחזור)')
+    parser.add_argument('--profile-rules', action='store_true',
+                        help='הדפסת זמן ריצה ומספר ממצאים לכל כלל (הקבצים נבדקים בלי מטמון)')
+    args = parser.parse_args()
+
+    if not args.files and not args.all:
+        parser.error('יש לציין קובץ Markdown או --all DIR')
+
+    validator = WorksheetValidator(cache_dir=args.cache_dir,
+                                   use_cache=not (args.no_cache or args.profile_rules),
+                                   skip_rules=args.skip_rule)
+
+    # קובץ יחיד - הדוח המלא
+    if len(args.files) == 1 and not args.all and not args.json:
+        is_valid = validator.print_report(Path(args.files[0]))
+        if args.profile_rules:
+            sys.stdout.buffer.write(f"{validator.format_rule_profile(validator.rule_stats)}\n".encode('utf-8'))
+        sys.exit(0 if is_valid else 1)
+
+    markdown_files = [Path(path) for path in args.files]
+    for directory in args.all:
+        markdown_files.extend(sorted(Path(directory).rglob('*.md')))
+
+    start = time.perf_counter()
+    results = validator.validate_many(markdown_files, jobs=args.jobs)
+    summary = WorksheetValidator.summary(results)
+    summary['seconds'] = round(time.perf_counter() - start, 3)
+    if args.profile_rules:
+        summary['rule_profile'] = validator.rule_stats
+
+    if args.json:
+        sys.stdout.buffer.write(json.dumps(summary, ensure_ascii=False, indent=2).encode('utf-8') + b'\n')
+    else:
+        for result in results:
+            status = '❌' if result['errors'] else '⚠️' if result['warnings'] else '✅'
+            sys.stdout.buffer.write(
+                f"{status} {result['file']} ({len(result['errors'])} שגיאות, "
+                f"{len(result['warnings'])} אזהרות)\n".encode('utf-8'))
+            for error in result['errors']:
+                sys.stdout.buffer.write(f"  - {error}\n".encode('utf-8'))
+        sys.stdout.buffer.write(
+            f"\n📊 {summary['files'] - summary['failed']}/{summary['files']} דפי עבודה ללא שגיאות, "
+            f"{summary['cached']} מהמטמון ({summary['seconds']:.2f}s)\n".encode('utf-8'))
+        if args.profile_rules:
+            sys.stdout.buffer.write(f"\n{validator.format_rule_profile(validator.rule_stats)}\n".encode('utf-8'))
+
+    sys.exit(1 if summary['failed'] else 0)
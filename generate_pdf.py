@@ -6,22 +6,181 @@ Convenient script for generating PDFs from worksheets
 """
 
 import sys
+import time
+import argparse
 from pathlib import Path
-from core.pdf_engine import generate_pdf
+from typing import List
+from core.pdf_engine import PDFEngine, generate_pdf
 
-if __name__ == '__main__':
-    if len(sys.argv) < 2:
-        print("שימוש: python generate_pdf.py <קובץ_markdown> [קובץ_pdf_פלט]")
-        print("\nדוגמה:")
-        print("  python generate_pdf.py worksheets/grade-8/kavba_a1_graph_reading.md")
-        sys.exit(1)
 
-    input_file = sys.argv[1]
-    output_file = sys.argv[2] if len(sys.argv) > 2 else None
+def collect_markdown_files(inputs: List[str]) -> List[Path]:
+    """איסוף קבצי Markdown מרשימת קבצים ותיקיות (תיקיות נסרקות רקורסיבית)"""
+    files = []
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            files.extend(sorted(path.rglob('*.md')))
+        else:
+            files.append(path)
+    return files
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description='יצירת PDF מדפי עבודה',
+        epilog='דוגמאות:\n'
+               '  python generate_pdf.py worksheets/grade-8/kavba_a1_graph_reading.md\n'
+               '  python generate_pdf.py --jobs 8 worksheets/grade-8\n'
+               '  python generate_pdf.py worksheets/grade-8/kavba_a1_50_questions_coefficients.md '
+               '--students class.txt --merged class.pdf\n'
+               '  python generate_pdf.py --booklet unit.pdf worksheets/grade-8\n'
+               '  python generate_pdf.py --with-key -o pdfs worksheets/grade-8',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('inputs', nargs='+',
+                        help='קובץ Markdown ו[קובץ PDF פלט], או קבצים/תיקיות לעיבוד באצווה')
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+                        help='מספר תהליכים במקביל (ברירת מחדל: מספר הליבות)')
+    parser.add_argument('--output-dir', '-o', default=None,
+                        help='תיקיית פלט לקבצי ה-PDF')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='רינדור מחדש של כל קובץ, בלי מטמון הבנייה')
+    parser.add_argument('--cache-dir', default=None,
+                        help='תיקיית מטמון הבנייה (ברירת מחדל: .cache/pdf)')
+    parser.add_argument('--students', default=None,
+                        help='קובץ עם שם תלמיד/ה בכל שורה - עותק אישי לכל שם, עם השם ממולא')
+    parser.add_argument('--merged', default=None,
+                        help='עם --students: קובץ PDF אחד עם כל העותקים, להדפסה')
+    parser.add_argument('--no-shuffle', action='store_true',
+                        help='עם --students: בלי ערבוב סדר השאלות')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='עם --students: זרע ערבוב סדר השאלות')
+    parser.add_argument('--booklet', default=None,
+                        help='חוברת PDF אחת מכל הקבצים, עם סימניות ומספרי עמודים')
+    parser.add_argument('--with-key', action='store_true',
+                        help='גם מפתח למורה (<שם הדף>_key.pdf) מאותו פענוח, עם הפתרונות מ-SOLUTION_KEY.md')
+    parser.add_argument('--key-file', default=None,
+                        help='עם --with-key: קובץ מפתח התשובות (ברירת מחדל: SOLUTION_KEY.md)')
+    args = parser.parse_args()
+
+    if args.with_key:
+        return with_key(args)
+
+    if args.students:
+        return personalized(args, parser)
+
+    if args.booklet:
+        return booklet(args)
+
+    # מצב קובץ יחיד: generate_pdf.py <קובץ_markdown> [קובץ_pdf_פלט]
+    single = (
+        args.jobs is None and not args.output_dir
+        and len(args.inputs) <= 2 and not Path(args.inputs[0]).is_dir()
+        and (len(args.inputs) == 1 or args.inputs[1].endswith('.pdf'))
+    )
+    if single:
+        input_file = args.inputs[0]
+        output_file = args.inputs[1] if len(args.inputs) > 1 else None
+        try:
+            pdf_path = generate_pdf(input_file, output_file,
+                                    cache_dir=args.cache_dir, use_cache=not args.no_cache)
+            sys.stdout.buffer.write(f"\n✅ PDF נוצר בהצלחה: {pdf_path}\n".encode('utf-8'))
+            return 0
+        except Exception as e:
+            sys.stderr.buffer.write(f"\n❌ שגיאה: {e}\n".encode('utf-8'))
+            return 1
+
+    # מצב אצווה
+    markdown_files = collect_markdown_files(args.inputs)
+    engine = PDFEngine(cache_dir=args.cache_dir, use_cache=not args.no_cache)
+    results = engine.generate_many(markdown_files, jobs=args.jobs, output_dir=args.output_dir)
+
+    failed = 0
+    for result in results:
+        if result['error']:
+            failed += 1
+            sys.stderr.buffer.write(f"❌ {result['input']}: {result['error']}\n".encode('utf-8'))
+        else:
+            sys.stdout.buffer.write(
+                f"✅ {result['output']} ({result['seconds']:.2f}s)\n".encode('utf-8'))
+
+    sys.stdout.buffer.write(
+        f"\n📄 {len(results) - failed}/{len(results)} קבצי PDF נוצרו בהצלחה\n".encode('utf-8'))
+
+    fetch_totals = {'hits': 0, 'misses': 0, 'refused': 0}
+    for result in results:
+        for name, count in result['fetch_stats'].items():
+            fetch_totals[name] += count
+    sys.stdout.buffer.write(
+        f"🌐 נכסים: {fetch_totals['hits']} מהמטמון, {fetch_totals['misses']} מהדיסק, "
+        f"{fetch_totals['refused']} כתובות מרוחקות נחסמו\n".encode('utf-8'))
+    return 1 if failed else 0
 
+
+def with_key(args) -> int:
+    """מצב דף ומפתח: לכל קובץ, PDF לתלמיד ו-PDF מפתח למורה מפענוח אחד"""
+    engine = PDFEngine(cache_dir=args.cache_dir, use_cache=not args.no_cache)
+    failed = 0
+    for markdown_file in collect_markdown_files(args.inputs):
+        output_file = str(Path(args.output_dir) / markdown_file.with_suffix('.pdf').name) if args.output_dir else None
+        start = time.perf_counter()
+        try:
+            result = engine.generate_with_key(markdown_file, output_file, key_file=args.key_file)
+        except Exception as e:
+            failed += 1
+            sys.stderr.buffer.write(f"❌ {markdown_file}: {e}\n".encode('utf-8'))
+            continue
+        missing = f", {len(result['unanswered'])} שאלות בלי פתרון במפתח" if result['unanswered'] else ''
+        sys.stdout.buffer.write(
+            f"✅ {result['worksheet']} + {result['key']} ({result['answered']} פתרונות{missing}, "
+            f"{time.perf_counter() - start:.2f}s)\n".encode('utf-8'))
+    return 1 if failed else 0
+
+
+def booklet(args) -> int:
+    """מצב חוברת: כל הקבצים ב-PDF אחד"""
+    markdown_files = collect_markdown_files(args.inputs)
+    engine = PDFEngine(cache_dir=args.cache_dir, use_cache=not args.no_cache)
+    start = time.perf_counter()
     try:
-        pdf_path = generate_pdf(input_file, output_file)
-        sys.stdout.buffer.write(f"\n✅ PDF נוצר בהצלחה: {pdf_path}\n".encode('utf-8'))
+        pdf_path = engine.generate_booklet(markdown_files, args.booklet)
     except Exception as e:
         sys.stderr.buffer.write(f"\n❌ שגיאה: {e}\n".encode('utf-8'))
-        sys.exit(1)
+        return 1
+    sys.stdout.buffer.write(
+        f"\n📚 חוברת של {len(markdown_files)} דפי עבודה: {pdf_path} "
+        f"({time.perf_counter() - start:.2f}s)\n".encode('utf-8'))
+    return 0
+
+
+def personalized(args, parser) -> int:
+    """מצב עותקים אישיים: דף עבודה אחד, עותק לכל תלמיד/ה"""
+    if len(args.inputs) != 1 or Path(args.inputs[0]).is_dir():
+        parser.error('עם --students יש לתת דף עבודה אחד')
+    students = [line.strip() for line in Path(args.students).read_text(encoding='utf-8').splitlines()
+                if line.strip()]
+    output_dir = args.output_dir or (None if args.merged else 'personalized')
+
+    engine = PDFEngine(cache_dir=args.cache_dir, use_cache=not args.no_cache)
+    start = time.perf_counter()
+    results = engine.generate_personalized(args.inputs[0], students, output_dir=output_dir,
+                                           merged_file=args.merged, shuffle=not args.no_shuffle,
+                                           seed=args.seed)
+    elapsed = time.perf_counter() - start
+
+    failed = 0
+    for result in results:
+        label = result['student'] or args.merged
+        if result['error']:
+            failed += 1
+            sys.stderr.buffer.write(f"❌ {label}: {result['error']}\n".encode('utf-8'))
+        elif result['output']:
+            sys.stdout.buffer.write(f"✅ {label}: {result['output']}\n".encode('utf-8'))
+
+    sys.stdout.buffer.write(
+        f"\n📄 {len(students)} עותקים אישיים ({elapsed:.2f}s)\n".encode('utf-8'))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())